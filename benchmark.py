@@ -0,0 +1,200 @@
+"""
+Module: benchmark.py
+Author: Satej
+Description:
+This script benchmarks every stage of the energy analytics pipeline on synthetic data.
+For each scale it generates deterministic smart-meter data, runs loading, preprocessing,
+feature engineering, daily consumption, model training and export, and records wall time,
+throughput and peak traced memory per stage. Each stage is timed over several repeats, so
+runs from different commits can be compared on their median and best times instead of a
+single noisy measurement. Results are written as JSON.
+
+Example Usage:
+    python benchmark.py --scales 100x30 1000x30 --output bench.json
+    python benchmark.py --scales 100x30 --output current.json --compare baseline.json --repeats 5
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+import pandas as pd
+
+from data_collection import load_energy_data
+from data_preprocessing import preprocess_energy_data
+from feature_engineering import create_time_features, calculate_daily_consumption
+from predictive_modeling import train_regression_model, train_classification_model
+from visualization_dashboard import export_dashboard_data
+from synthetic_data import write_synthetic_csv
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def time_stage(results: list, scale: str, stage: str, rows: int, function, *args, repeats: int = 3, **kwargs):
+    """
+    Runs one stage, appends its timing and peak memory to results and returns its output.
+
+    Peak memory is measured with tracemalloc, which also sees numpy and pandas buffers,
+    in a first run whose output is returned. Tracing slows allocations down, so the stage
+    is then timed over separate untraced repeats, and the median, minimum and maximum
+    are recorded.
+
+    Args:
+        results (list): List the measurement is appended to.
+        scale (str): Label of the data scale, e.g. '100x30'.
+        stage (str): Stage name.
+        rows (int): Number of input rows, used for the throughput.
+        function (Callable): Stage function.
+        *args, **kwargs: Arguments passed to the stage function.
+        repeats (int): Number of timed runs.
+
+    Returns:
+        The stage function's return value.
+    """
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    output = function(*args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    timings = []
+    for _ in range(max(repeats, 1)):
+        start_time = time.perf_counter()
+        function(*args, **kwargs)
+        timings.append(time.perf_counter() - start_time)
+    seconds = statistics.median(timings)
+    results.append({
+        'scale': scale,
+        'stage': stage,
+        'rows': rows,
+        'repeats': len(timings),
+        'seconds': seconds,
+        'min_seconds': min(timings),
+        'max_seconds': max(timings),
+        'rows_per_second': rows / seconds if seconds > 0 else None,
+        'peak_bytes': peak,
+    })
+    print(f"[{scale}] {stage}: median {seconds:.3f}s (min {min(timings):.3f}s, max {max(timings):.3f}s "
+          f"over {len(timings)} runs), peak {peak / 1024 ** 2:.1f} MiB")
+    return output
+
+def run_benchmarks(scales: list, resolution_minutes: int = 60, seed: int = 42, repeats: int = 3) -> dict:
+    """
+    Benchmarks every pipeline stage at each scale.
+
+    Args:
+        scales (list): (households, days) pairs.
+        resolution_minutes (int): Minutes between synthetic readings.
+        seed (int): Random seed of the synthetic data.
+        repeats (int): Number of timed runs per stage.
+
+    Returns:
+        dict: Run metadata and a list of per-stage measurements.
+    """
+    results = []
+    with tempfile.TemporaryDirectory(prefix='energy_bench_') as work_dir:
+        for households, days in scales:
+            scale = f'{households}x{days}'
+            csv_path = os.path.join(work_dir, f'energy_{scale}.csv')
+            rows = len(write_synthetic_csv(csv_path, households=households, days=days,
+                                           resolution_minutes=resolution_minutes, seed=seed))
+
+            raw = time_stage(results, scale, 'load_energy_data', rows, load_energy_data, csv_path, repeats=repeats)
+            # Stages get a copy each run, so a repeat never sees the previous run's changes
+            processed = time_stage(results, scale, 'preprocess_energy_data', rows,
+                                   lambda raw=raw: preprocess_energy_data(raw.copy()), repeats=repeats)
+            processed = time_stage(results, scale, 'create_time_features', len(processed),
+                                   lambda processed=processed: create_time_features(processed.copy(), 'timestamp'),
+                                   repeats=repeats)
+            time_stage(results, scale, 'calculate_daily_consumption', len(processed),
+                       calculate_daily_consumption, processed, 'timestamp', 'energy_usage', repeats=repeats)
+            time_stage(results, scale, 'train_regression_model', len(processed), train_regression_model,
+                       processed, ['hour', 'temperature'], 'energy_usage', 'timestamp', repeats=repeats)
+            time_stage(results, scale, 'train_classification_model', len(processed), train_classification_model,
+                       processed, ['hour', 'temperature'], 'high_usage_flag', repeats=repeats)
+            time_stage(results, scale, 'export_dashboard_data', len(processed), export_dashboard_data,
+                       processed, os.path.join(work_dir, f'dashboard_{scale}.parquet'), repeats=repeats)
+    return {
+        'commit': _git_commit(),
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'resolution_minutes': resolution_minutes,
+        'seed': seed,
+        'repeats': repeats,
+        'results': results,
+    }
+
+def compare_results(baseline: dict, current: dict, tolerance: float = 0.10) -> pd.DataFrame:
+    """
+    Compares two benchmark runs stage by stage.
+
+    A stage is flagged as slower only if both its median and its best time grew by more
+    than the tolerance, and the median did so by more than the run-to-run spread
+    ((max - min) / median) measured in either run, so noise alone is not reported.
+
+    Args:
+        baseline (dict): Earlier run, as written by run_benchmarks.
+        current (dict): Later run.
+        tolerance (float): Relative slowdown or memory growth flagged as a regression.
+
+    Returns:
+        pd.DataFrame: Time and memory ratios per scale and stage, with a 'regression' flag.
+    """
+    keys = ['scale', 'stage']
+    columns = ['seconds', 'min_seconds', 'max_seconds', 'peak_bytes']
+
+    def measurements(run):
+        frame = pd.DataFrame(run['results']).set_index(keys)
+        # Runs recorded before repeats were introduced hold a single timing
+        for column in ('min_seconds', 'max_seconds'):
+            frame[column] = frame[column].fillna(frame['seconds']) if column in frame else frame['seconds']
+        return frame[columns]
+
+    joined = measurements(baseline).join(measurements(current), lsuffix='_baseline', rsuffix='_current', how='inner')
+    joined['time_ratio'] = joined['seconds_current'] / joined['seconds_baseline']
+    joined['min_time_ratio'] = joined['min_seconds_current'] / joined['min_seconds_baseline']
+    joined['noise'] = pd.concat([(joined[f'max_seconds_{run}'] - joined[f'min_seconds_{run}']) / joined[f'seconds_{run}']
+                                 for run in ('baseline', 'current')], axis=1).max(axis=1)
+    joined['memory_ratio'] = joined['peak_bytes_current'] / joined['peak_bytes_baseline']
+    slower = ((joined['time_ratio'] > 1 + tolerance + joined['noise'])
+              & (joined['min_time_ratio'] > 1 + tolerance))
+    joined['regression'] = slower | (joined['memory_ratio'] > 1 + tolerance)
+    return joined.reset_index()
+
+def _parse_scale(value: str) -> tuple:
+    households, days = value.lower().split('x')
+    return int(households), int(days)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the energy analytics pipeline on synthetic data.")
+    parser.add_argument('--scales', nargs='+', default=['100x30', '1000x30'],
+                        help="Scales as HOUSEHOLDSxDAYS, e.g. 100x30")
+    parser.add_argument('--resolution', type=int, default=60, help="Minutes between readings")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='bench_results.json', help="Path of the JSON results file")
+    parser.add_argument('--compare', help="Baseline JSON results file to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.10)
+    parser.add_argument('--repeats', type=int, default=3, help="Timed runs per stage")
+    args = parser.parse_args()
+
+    run = run_benchmarks([_parse_scale(scale) for scale in args.scales], args.resolution, args.seed, args.repeats)
+    with open(args.output, 'w') as output_file:
+        json.dump(run, output_file, indent=2)
+    print(f"Benchmark results written to {args.output}.")
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            comparison = compare_results(json.load(baseline_file), run, args.tolerance)
+        print(comparison.to_string(index=False))
+        if comparison['regression'].any():
+            raise SystemExit("Performance regressions detected.")
@@ -6,56 +6,182 @@ This script automates data ingestion and model updates for the energy analytics
 It ensures that the dashboard remains current and actionable by running scheduled updates.
 """
 
+import logging
 import pandas as pd
-from datetime import datetime
+from data_store import append_to_store
+from data_preprocessing import preprocess_energy_data
+from feature_engineering import categorize_consumption, load_tier_edges
+from visualization_dashboard import update_rollup
+from instrumentation import instrumented
+from scheduler import JobScheduler
 
-def update_data_source(file_path: str, data: pd.DataFrame):
+logger = logging.getLogger(__name__)
+
+@instrumented()
+def update_data_source(store_path: str, data: pd.DataFrame, timestamp_column: str = 'timestamp',
+                       rollup_dir: str = None, tier_edges: dict = None):
     """
     Updates the energy usage data source by appending new data.
 
+    The data source is an append-only columnar store partitioned by date, so an ingest
+    only writes the new partitions and never rewrites the existing history. When a rollup
+    directory is given, the batch is preprocessed and categorized like the full pipeline
+    in main.py does, and folded into the same rollup extracts. The tier boundaries that
+    the last full run saved in the rollup directory are reused, so a batch is not tiered
+    against its own distribution.
+
     Args:
-        file_path (str): Path to the existing CSV data file.
-        data (pd.DataFrame): New data to append to the existing data file.
+        store_path (str): Root directory of the columnar store.
+        data (pd.DataFrame): New data to append to the store.
+        timestamp_column (str): Column used to partition the data by date.
+        rollup_dir (str): Optional directory of rollup extracts to update.
+        tier_edges (dict): Consumption tier boundaries, e.g. from consumption_tier_edges
+            over the history. Defaults to the boundaries saved in rollup_dir by the last
+            full run, and only without those to boundaries derived from the batch itself.
 
     Example Usage:
-        update_data_source("C:/Users/Satej/Data/energy_data.csv", new_data)
+        update_data_source("C:/Users/Satej/Data/energy_store", new_data, rollup_dir="C:/Users/Satej/Data/rollups",
+                           tier_edges={None: [50.0, 150.0]})
     """
     try:
-        # Load existing data and append new data
-        existing_data = pd.read_csv(file_path)
-        updated_data = pd.concat([existing_data, data], ignore_index=True)
-        updated_data.to_csv(file_path, index=False)
-        print(f"Data source updated successfully at {file_path}.")
+        append_to_store(store_path, data, timestamp_column=timestamp_column)
+        if rollup_dir is not None:
+            if tier_edges is None:
+                tier_edges = load_tier_edges(rollup_dir)
+                if tier_edges is None:
+                    logger.warning(f"No saved tier boundaries in {rollup_dir}; deriving them from the batch.")
+            processed = categorize_consumption(preprocess_energy_data(data.copy()), 'energy_usage', edges=tier_edges)
+            update_rollup(rollup_dir, processed, timestamp_column=timestamp_column)
+        logger.info(f"Data source updated successfully at {store_path}.")
     except Exception as e:
-        print("Error updating data source.")
+        logger.error("Error updating data source.")
         raise e
 
-def schedule_model_update(model_update_function, interval_hours: int):
+def schedule_model_update(model_update_function, interval_hours: int,
+                          state_path: str = "C:/Users/Satej/Data/scheduler_state.json",
+                          scheduler: JobScheduler = None, blocking: bool = False) -> JobScheduler:
     """
     Schedules the periodic execution of a model update function.
 
+    The update runs at a fixed rate on a background scheduler, so the cadence does not
+    drift by the update's runtime, a run is skipped if the previous one is still going,
+    failures are retried with jittered backoff, and missed runs are caught up after a
+    restart from the persisted last-run state.
+
     Args:
         model_update_function (function): Function that updates the predictive models.
         interval_hours (int): Time interval in hours between updates.
+        state_path (str): JSON file holding the scheduler's last-run state.
+        scheduler (JobScheduler): Optional running scheduler to add the job to, e.g. one
+            that also runs ingestion and rollup export jobs.
+        blocking (bool): Whether to run in the foreground until SIGINT/SIGTERM.
+
+    Returns:
+        JobScheduler: The scheduler running the update job.
 
     Example Usage:
-        schedule_model_update(update_regression_model, 24)
+        scheduler = schedule_model_update(update_regression_model, 24)
     """
-    import time
+    logger.info(f"Scheduling model updates every {interval_hours} hours.")
+    scheduler = scheduler or JobScheduler(state_path)
+    scheduler.add_job('retrain', model_update_function, interval_seconds=interval_hours * 3600)
+    if blocking:
+        scheduler.run_forever()
+    else:
+        scheduler.start()
+    return scheduler
 
-    print(f"Scheduling model updates every {interval_hours} hours.")
-    while True:
-        print(f"Model update started at {datetime.now()}")
-        model_update_function()
-        print(f"Model update completed at {datetime.now()}")
-        time.sleep(interval_hours * 3600)
+def schedule_dashboard_jobs(jobs: dict, state_path: str = "C:/Users/Satej/Data/scheduler_state.json",
+                            max_workers: int = 4, blocking: bool = False) -> JobScheduler:
+    """
+    Runs several dashboard jobs side by side, each at its own fixed rate.
 
-def update_regression_model():
+    Args:
+        jobs (dict): Maps job names to (function, interval_hours) pairs.
+        state_path (str): JSON file holding the scheduler's last-run state.
+        max_workers (int): Maximum number of jobs running at the same time.
+        blocking (bool): Whether to run in the foreground until SIGINT/SIGTERM.
+
+    Returns:
+        JobScheduler: The running scheduler; call shutdown() to stop it gracefully.
+
+    Example Usage:
+        scheduler = schedule_dashboard_jobs({
+            'ingest': (ingest_new_readings, 0.25),
+            'retrain': (update_regression_model, 24),
+            'rollup_export': (export_rollups, 1),
+        })
     """
-    Updates the regression model by retraining it with the latest data.
-    This is an example function that can be replaced with the specific update logic.
+    scheduler = JobScheduler(state_path, max_workers=max_workers)
+    for name, (function, interval_hours) in jobs.items():
+        scheduler.add_job(name, function, interval_seconds=interval_hours * 3600)
+    if blocking:
+        scheduler.run_forever()
+    else:
+        scheduler.start()
+    return scheduler
+
+@instrumented()
+def update_regression_model(store_path: str = "C:/Users/Satej/Data/energy_store",
+                            state_dir: str = "C:/Users/Satej/Data/model_state",
+                            features: list = ('hour', 'temperature'),
+                            target: str = 'energy_usage',
+                            classification_target: str = 'high_usage_flag',
+                            timestamp_column: str = 'timestamp'):
     """
-    print("Retraining the regression model...")
-    # Placeholder logic; replace with actual retraining steps
-    # e.g., load updated data, preprocess, retrain model, and save
-    print("Regression model retrained and updated.")
+    Updates the predictive models incrementally with data added since the last run.
+
+    Progress is tracked by position in the store's append-only manifest rather than by
+    event time, so late or backfilled readings appended after an update are still picked
+    up. The new files are folded into the linear model's X^T X / X^T y accumulators and
+    used to grow the classification forest with warm-started trees, so the cost of an
+    update scales with the new data rather than with the whole history.
+
+    Args:
+        store_path (str): Root directory of the columnar data store.
+        state_dir (str): Directory holding the manifest position, statistics and models.
+        features (list): List of feature column names.
+        target (str): Target column name for regression.
+        classification_target (str): Target column name for classification, or None to
+            update only the regression model.
+        timestamp_column (str): Column holding the reading timestamps.
+
+    Returns:
+        tuple: Updated regression model (or None if no data was seen yet) and
+        classification model (or None).
+
+    Example Usage:
+        schedule_model_update(update_regression_model, 24)
+    """
+    from data_store import is_store, read_manifest, read_store_files
+    from schema import apply_schema
+    from data_preprocessing import parse_timestamp_column
+    from feature_engineering import create_time_features
+    from predictive_modeling import (load_incremental_state, save_incremental_state, update_linear_statistics,
+                                     solve_linear_statistics, warm_start_classification_model)
+
+    features = list(features)
+    logger.info("Updating the predictive models with new data...")
+    state = load_incremental_state(state_dir)
+    files = read_manifest(store_path)['files'] if is_store(store_path) else []
+    new_files = files[state['manifest_position'] or 0:]
+    if not new_files:
+        # Nothing appended since the last run: the state stays as it is
+        logger.info("No new data since the last update.")
+    else:
+        new_data = parse_timestamp_column(apply_schema(read_store_files(store_path, new_files)), timestamp_column)
+        if len(new_data) > 0:
+            latest = new_data[timestamp_column].max()
+            if state['watermark'] is None or latest > pd.Timestamp(state['watermark']):
+                state['watermark'] = latest.isoformat()
+            new_data = create_time_features(preprocess_energy_data(new_data), timestamp_column)
+            state['linear'] = update_linear_statistics(state['linear'], new_data, features, target)
+            if classification_target is not None:
+                state['classification_model'] = warm_start_classification_model(
+                    state['classification_model'], new_data, features, classification_target)
+        logger.info(f"Folded {len(new_data)} new rows from {len(new_files)} store files into the models.")
+        state['manifest_position'] = len(files)
+        save_incremental_state(state_dir, state)
+
+    regression_model = solve_linear_statistics(state['linear'], features) if state['linear'] is not None else None
+    return regression_model, state['classification_model']
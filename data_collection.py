@@ -7,40 +7,185 @@ It gathers energy usage data from a specified data source (e.g., smart meter log
 The script supports reading from local files, APIs, or databases.
 """
 
+import logging
 import pandas as pd
+from data_store import is_store, read_store, iter_store_chunks
+from schema import ENERGY_DATA_SCHEMA, read_dtypes, apply_schema
+from instrumentation import instrumented
 
-def load_energy_data(file_path: str) -> pd.DataFrame:
+logger = logging.getLogger(__name__)
+
+# Explicit read-time dtypes for the known smart-meter columns, taken from the compact
+# schema, so that every chunk is parsed identically and straight into compact types.
+ENERGY_DATA_DTYPES = read_dtypes(ENERGY_DATA_SCHEMA)
+
+def _resolve_dtypes(file_path: str, dtype: dict = None) -> dict:
+    """
+    Restricts a dtype mapping to the columns actually present in the file header.
+    """
+    dtype = ENERGY_DATA_DTYPES if dtype is None else dtype
+    columns = pd.read_csv(file_path, nrows=0).columns
+    return {column: kind for column, kind in dtype.items() if column in columns}
+
+def _compact_chunks(chunks):
+    """
+    Applies the compact schema to every chunk of a stream.
+    """
+    for chunk in chunks:
+        yield apply_schema(chunk)
+
+@instrumented()
+def load_energy_data(file_path: str, chunksize: int = None, dtype: dict = None,
+                     columns: list = None, start=None, end=None, compact: bool = True):
     """
     Loads energy usage data from a specified file path.
 
     Args:
-        file_path (str): Path to the CSV file containing energy usage data.
+        file_path (str): Path to the CSV file or columnar store directory containing
+            energy usage data.
+        chunksize (int): Optional number of rows per chunk. When set, the file is
+            streamed and an iterator of DataFrames is returned instead, so peak
+            memory depends on the chunk size rather than the file size.
+        dtype (dict): Optional column-to-dtype mapping. Defaults to ENERGY_DATA_DTYPES
+            when streaming or when compact is set.
+        columns (list): Optional columns to read. Only applied to columnar stores.
+        start: Optional inclusive lower timestamp bound. Only applied to columnar
+            stores, where partitions outside the range are skipped.
+        end: Optional inclusive upper timestamp bound. Only applied to columnar stores.
+        compact (bool): Whether to apply the compact schema (float32 readings,
+            categorical labels, integer epoch timestamps) at read time.
 
     Returns:
-        pd.DataFrame: DataFrame containing the energy usage data.
+        pd.DataFrame or Iterator[pd.DataFrame]: The energy usage data, or an
+        iterator of fixed-size chunks when chunksize is given.
 
     Example Usage:
         df = load_energy_data("C:/Users/Satej/Data/energy_data.csv")
+        for chunk in load_energy_data("C:/Users/Satej/Data/energy_data.csv", chunksize=1_000_000):
+            ...
     """
     try:
+        if is_store(file_path):
+            # Columnar store: project columns and prune partitions by date range
+            if chunksize is not None:
+                logger.info(f"Streaming data from store at {file_path} in chunks of {chunksize} rows")
+                chunks = iter_store_chunks(file_path, chunksize, columns=columns, start=start, end=end)
+                return _compact_chunks(chunks) if compact else chunks
+            data = read_store(file_path, columns=columns, start=start, end=end)
+            logger.info(f"Data successfully loaded from store at {file_path}")
+            return apply_schema(data) if compact else data
+        if chunksize is not None:
+            # Streaming mode: yield fixed-size chunks with explicit dtypes
+            chunks = pd.read_csv(file_path, chunksize=chunksize, dtype=_resolve_dtypes(file_path, dtype))
+            logger.info(f"Streaming data from {file_path} in chunks of {chunksize} rows")
+            return _compact_chunks(chunks) if compact else chunks
         # Reading data from a CSV file
-        data = pd.read_csv(file_path)
-        print(f"Data successfully loaded from {file_path}")
+        if compact:
+            data = apply_schema(pd.read_csv(file_path, dtype=_resolve_dtypes(file_path, dtype)))
+        else:
+            data = pd.read_csv(file_path, dtype=dtype)
+        logger.info(f"Data successfully loaded from {file_path}")
         return data
     except FileNotFoundError as e:
-        print(f"Error: File not found at {file_path}")
+        logger.error(f"File not found at {file_path}")
         raise e
     except Exception as e:
-        print("An unexpected error occurred while loading data.")
+        logger.error("An unexpected error occurred while loading data.")
         raise e
 
-def fetch_data_from_api(api_url: str, headers: dict = None) -> pd.DataFrame:
+def create_api_session(headers: dict = None, max_connections: int = 10, retries: int = 3,
+                       backoff_factor: float = 0.5):
+    """
+    Creates an HTTP session with a keep-alive connection pool and automatic retries.
+
+    Args:
+        headers (dict): Optional HTTP headers sent with every request.
+        max_connections (int): Maximum number of pooled connections per host.
+        retries (int): Number of retries for connection errors and 429/5xx responses.
+        backoff_factor (float): Exponential backoff factor between retries, in seconds.
+
+    Returns:
+        requests.Session: Configured session.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(total=retries, backoff_factor=backoff_factor, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=frozenset(['GET']))
+    adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+def _records_to_frame(records: list, dtype: dict = None) -> pd.DataFrame:
+    """
+    Builds a DataFrame from decoded JSON records and casts known columns to their dtypes.
+    """
+    data = pd.DataFrame.from_records(records)
+    if dtype is None:
+        return apply_schema(data)
+    present = {column: kind for column, kind in dtype.items() if column in data.columns}
+    return data.astype(present) if present else data
+
+def fetch_paginated(session, api_url: str, params: dict = None, timeout: float = 30,
+                    records_key: str = 'data', next_key: str = 'next', dtype: dict = None) -> pd.DataFrame:
+    """
+    Fetches every page of an endpoint, following next-page links.
+
+    A page body may be a JSON list of records, or a JSON object holding the records
+    under records_key and the URL of the following page under next_key. Each page is
+    converted to typed columns as soon as it is decoded, so only one raw page is held
+    in memory at a time.
+
+    Args:
+        session (requests.Session): Session used for the requests.
+        api_url (str): URL of the first page.
+        params (dict): Optional query parameters for the first page.
+        timeout (float): Timeout in seconds for each request.
+        records_key (str): Key holding the records in object-shaped pages.
+        next_key (str): Key holding the next page URL in object-shaped pages.
+        dtype (dict): Optional column-to-dtype mapping; defaults to the compact schema.
+
+    Returns:
+        pd.DataFrame: Records from all pages.
+    """
+    from urllib.parse import urljoin
+
+    frames = []
+    url = api_url
+    while url:
+        response = session.get(url, params=params, timeout=timeout)
+        response.raise_for_status()  # Raise an HTTPError for bad responses
+        body = response.json()
+        if isinstance(body, dict):
+            records = body.get(records_key, [])
+            next_url = body.get(next_key)
+        else:
+            records = body
+            next_url = None
+        frames.append(_records_to_frame(records, dtype))
+        url = urljoin(url, next_url) if next_url else None
+        params = None  # Next-page links already carry their query string
+    if not frames:
+        return pd.DataFrame()
+    # Re-apply the schema so per-page categoricals are unified after concatenation
+    data = pd.concat(frames, ignore_index=True)
+    return apply_schema(data) if dtype is None else data
+
+@instrumented()
+def fetch_data_from_api(api_url: str, headers: dict = None, timeout: float = 30, retries: int = 3) -> pd.DataFrame:
     """
     Fetches energy usage data from an API.
 
     Args:
         api_url (str): API endpoint URL to fetch data from.
         headers (dict): Optional HTTP headers for authentication.
+        timeout (float): Timeout in seconds for each request.
+        retries (int): Number of retries with backoff for failed requests.
 
     Returns:
         pd.DataFrame: DataFrame containing the fetched data.
@@ -51,11 +196,64 @@ def fetch_data_from_api(api_url: str, headers: dict = None) -> pd.DataFrame:
     import requests
 
     try:
-        response = requests.get(api_url, headers=headers)
-        response.raise_for_status()  # Raise an HTTPError for bad responses
-        data = pd.DataFrame(response.json())
-        print(f"Data successfully fetched from API: {api_url}")
+        with create_api_session(headers=headers, max_connections=1, retries=retries) as session:
+            data = fetch_paginated(session, api_url, timeout=timeout)
+        logger.info(f"Data successfully fetched from API: {api_url}")
         return data
     except requests.exceptions.RequestException as e:
-        print(f"Error fetching data from API: {api_url}")
+        logger.error(f"Error fetching data from API: {api_url}")
+        raise e
+
+@instrumented()
+def fetch_data_from_apis(api_urls: list, headers: dict = None, max_workers: int = 8, timeout: float = 30,
+                         retries: int = 3, backoff_factor: float = 0.5, dtype: dict = None) -> pd.DataFrame:
+    """
+    Fetches energy usage data from many endpoints concurrently.
+
+    Endpoints are fetched on a bounded thread pool. Each worker thread keeps its own
+    pooled keep-alive session, so connections are reused across endpoints and pages
+    instead of being set up per request.
+
+    Args:
+        api_urls (list): Endpoint URLs to fetch (e.g. one per meter gateway).
+        headers (dict): Optional HTTP headers for authentication.
+        max_workers (int): Maximum number of endpoints fetched at the same time.
+        timeout (float): Timeout in seconds for each request.
+        retries (int): Number of retries with backoff for failed requests.
+        backoff_factor (float): Exponential backoff factor between retries, in seconds.
+        dtype (dict): Optional column-to-dtype mapping; defaults to the compact schema.
+
+    Returns:
+        pd.DataFrame: Records from all endpoints, in the order of api_urls.
+
+    Example Usage:
+        df = fetch_data_from_apis([f"https://gateway-{i}.example.com/readings" for i in range(200)],
+                                  headers={"Authorization": "Bearer token"}, max_workers=16)
+    """
+    import threading
+    import requests
+    from concurrent.futures import ThreadPoolExecutor
+
+    local = threading.local()
+    sessions = []
+
+    def fetch(api_url):
+        if not hasattr(local, 'session'):
+            local.session = create_api_session(headers=headers, retries=retries, backoff_factor=backoff_factor)
+            sessions.append(local.session)
+        return fetch_paginated(local.session, api_url, timeout=timeout, dtype=dtype)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            frames = list(executor.map(fetch, api_urls))
+        logger.info(f"Data successfully fetched from {len(api_urls)} API endpoints.")
+        if not frames:
+            return pd.DataFrame()
+        data = pd.concat(frames, ignore_index=True)
+        return apply_schema(data) if dtype is None else data
+    except requests.exceptions.RequestException as e:
+        logger.error("Error fetching data from API endpoints.")
         raise e
+    finally:
+        for session in sessions:
+            session.close()
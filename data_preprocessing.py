@@ -6,36 +6,348 @@ This script handles data cleaning and preprocessing for the energy analytics pro
 It ensures the energy usage data is clean, consistent, and ready for analysis.
 """
 
+import logging
+import warnings
 import pandas as pd
 import numpy as np
+from typing import Callable, Iterable, Iterator
+from instrumentation import instrumented
 
-def handle_missing_values(data: pd.DataFrame) -> pd.DataFrame:
+logger = logging.getLogger(__name__)
+
+def _guess_timestamp_format(values: pd.Series):
+    """
+    Guesses a fixed strptime format from the first non-null timestamp string.
+    """
+    try:
+        from pandas.tseries.api import guess_datetime_format
+    except ImportError:  # pandas < 2.2
+        from pandas._libs.tslibs.parsing import guess_datetime_format
+    first_index = values.first_valid_index()
+    if first_index is None:
+        return None
+    with warnings.catch_warnings():
+        # A day-first guess is intended here: the format is fixed from the first value
+        warnings.simplefilter('ignore', UserWarning)
+        return guess_datetime_format(str(values.loc[first_index]))
+
+def ensure_datetime(values: pd.Series, format: str = None, unit: str = 's') -> pd.Series:
+    """
+    Converts timestamp values to datetime64, doing no work if they already are.
+
+    Strings are parsed with a fixed format (given or guessed once from the first value),
+    which avoids per-row format inference; integer values are treated as epochs.
+
+    Args:
+        values (pd.Series): Timestamp strings, integer epochs or datetime64 values.
+        format (str): Optional strptime format of the timestamp strings.
+        unit (str): Epoch unit for integer values (e.g. 's', 'ms').
+
+    Returns:
+        pd.Series: The timestamps as a datetime64 Series.
+
+    Example Usage:
+        timestamps = ensure_datetime(data['timestamp'])
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    if pd.api.types.is_integer_dtype(values):
+        return pd.to_datetime(values, unit=unit)
+    if format is None:
+        format = _guess_timestamp_format(values)
+    return pd.to_datetime(values, format=format, cache=True)
+
+def parse_timestamp_column(data: pd.DataFrame, timestamp_column: str = 'timestamp', format: str = None,
+                           unit: str = 's') -> pd.DataFrame:
+    """
+    Parses a timestamp column once and stores it back as a typed datetime64 column,
+    so that later feature, EDA and summary steps reuse it without re-parsing.
+
+    Args:
+        data (pd.DataFrame): Input DataFrame with a timestamp column.
+        timestamp_column (str): Column containing timestamp values.
+        format (str): Optional strptime format of the timestamp strings.
+        unit (str): Epoch unit for integer timestamps.
+
+    Returns:
+        pd.DataFrame: The DataFrame with the timestamp column as datetime64.
+    """
+    data[timestamp_column] = ensure_datetime(data[timestamp_column], format=format, unit=unit)
+    return data
+
+def _fill_statistics(data: pd.DataFrame, columns: list) -> dict:
+    """
+    Computes fill values for the given columns: the median for numerical columns
+    (one vectorized call over all of them) and the mode for the others.
+    """
+    numeric = [column for column in columns if pd.api.types.is_numeric_dtype(data[column])
+               and not pd.api.types.is_bool_dtype(data[column])]
+    fill_values = data[numeric].median().to_dict() if numeric else {}
+    for column in columns:
+        if column not in fill_values:
+            modes = data[column].mode()
+            if len(modes) > 0:
+                fill_values[column] = modes.iloc[0]
+    return fill_values
+
+def _epoch_values(timestamps: pd.Series) -> pd.Series:
+    """
+    Converts datetime64 values to float nanoseconds, with NaT as NaN.
+    """
+    epochs = pd.Series(timestamps.to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(np.float64),
+                       index=timestamps.index)
+    return epochs.where(timestamps.notna())
+
+def handle_missing_values_chunk(data: pd.DataFrame, method: str = 'median', group_column: str = None,
+                                timestamp_column: str = 'timestamp', carry: dict = None, fill_remaining: bool = True,
+                                hold_back: bool = False):
+    """
+    Fills missing values in one DataFrame or chunk, carrying state across chunks.
+
+    With method='ffill' or method='interpolate', gaps are filled per group (e.g. per
+    household) from the previous reading or by linear interpolation in time between the
+    surrounding readings. Both are computed with grouped ffill/bfill passes rather than
+    Python loops, and the data is assumed to be sorted by time within each group.
+    Gaps at the start of a chunk are filled from the last observed (never a filled)
+    reading of the previous chunks, held in the carry state. A gap at the end of a chunk
+    has no following reading yet: it is forward-filled, or with hold_back=True its rows
+    (and the group's later rows, to keep them in order) are kept in the carry state and
+    returned with the next chunk, so the result matches filling all the data at once.
+    After the last chunk, pass an empty frame (e.g. carry['pending'].iloc[:0]) without
+    hold_back to release the held rows. Anything still missing (e.g. a group with no
+    reading yet) falls back to the median for numerical columns and the mode for the
+    others, unless fill_remaining is False. Only the columns that contain gaps are
+    replaced, so the frame itself is not copied unless held rows are prepended.
+
+    Args:
+        data (pd.DataFrame): Input DataFrame or chunk with potential missing values.
+        method (str): 'median', 'ffill' or 'interpolate'.
+        group_column (str): Optional column identifying households for time-aware filling.
+        timestamp_column (str): Column holding the reading timestamps, used by 'interpolate'.
+        carry (dict): State returned for the previous chunk, or None.
+        fill_remaining (bool): Whether to fill leftover gaps with the median or mode.
+        hold_back (bool): Whether to hold back rows whose interpolation gap is still open.
+
+    Returns:
+        tuple: The DataFrame with gaps filled, and the carry state for the next chunk.
+
+    Example Usage:
+        carry = None
+        for chunk in chunks:
+            chunk, carry = handle_missing_values_chunk(chunk, 'interpolate', 'household_id', carry=carry,
+                                                       hold_back=True)
+        rest, carry = handle_missing_values_chunk(carry['pending'].iloc[:0], 'interpolate', 'household_id',
+                                                  carry=carry)
+    """
+    if method not in ('median', 'ffill', 'interpolate'):
+        raise ValueError(f"Unsupported imputation method '{method}'; expected 'median', 'ffill' or 'interpolate'")
+    if method != 'median':
+        carry = carry or {'values': pd.DataFrame(), 'times': pd.DataFrame(), 'pending': None}
+        if carry.get('pending') is not None and len(carry['pending']):
+            data = pd.concat([carry['pending'], data])
+    null_counts = data.isna().sum()
+    columns = [column for column in null_counts.index[null_counts > 0]
+               if column not in (group_column, timestamp_column)]
+
+    if method != 'median':
+        groups = data[group_column] if group_column is not None else pd.Series(0, index=data.index)
+        group_values = groups.to_numpy()
+        carried_columns = [column for column in carry['values'].columns if column in data.columns]
+        epochs = _epoch_values(ensure_datetime(data[timestamp_column])) if method == 'interpolate' else None
+        tracked = [column for column in data.columns if column not in (group_column, timestamp_column)]
+        # Observed before filling: the carry must never hold a filled value
+        observed = data[tracked].notna()
+        originals = {}
+        open_gap = np.zeros(len(data), dtype=bool)
+
+        for column in columns:
+            values = data[column]
+            valid = values.notna()
+            grouped = values.groupby(groups, sort=False, observed=True)
+            previous = grouped.ffill()
+            if column in carried_columns:
+                previous = previous.fillna(pd.Series(carry['values'][column].reindex(group_values).to_numpy(),
+                                                     index=data.index))
+            filled = previous
+            if method == 'interpolate' and pd.api.types.is_numeric_dtype(values):
+                valid_epochs = epochs.where(valid)
+                epoch_groups = valid_epochs.groupby(groups, sort=False, observed=True)
+                previous_epochs = epoch_groups.ffill()
+                if column in carried_columns:
+                    previous_epochs = previous_epochs.fillna(pd.Series(
+                        carry['times'][column].reindex(group_values).to_numpy(), index=data.index))
+                following = grouped.bfill()
+                following_epochs = epoch_groups.bfill()
+                fraction = (epochs - previous_epochs) / (following_epochs - previous_epochs)
+                interpolated = previous + (following - previous) * fraction
+                filled = interpolated.fillna(previous)
+                open_gap |= (~valid & previous.notna() & following.isna()).to_numpy()
+            originals[column] = values
+            data[column] = values.where(valid, filled)
+
+        held = np.zeros(len(data), dtype=bool)
+        if hold_back and open_gap.any():
+            # A group's rows from its first open gap on wait for the next chunk
+            held = pd.Series(open_gap.astype(np.int8), index=data.index).groupby(
+                groups, sort=False, observed=True).cummax().to_numpy().astype(bool)
+        pending = data[held]
+        for column, values in originals.items():
+            pending[column] = values[held]
+        kept = ~held
+
+        # Remember the last observed reading of every group among the rows returned now
+        kept_groups = groups[kept]
+        last_values = data[tracked].where(observed)[kept].groupby(kept_groups, sort=False, observed=True).last()
+        carry_values = last_values.combine_first(carry['values']) if len(carry['values']) else last_values
+        if epochs is not None:
+            valid_times = pd.DataFrame({column: epochs.where(observed[column]) for column in tracked})[kept]
+            last_times = valid_times.groupby(kept_groups, sort=False, observed=True).last()
+            carry_times = last_times.combine_first(carry['times']) if len(carry['times']) else last_times
+        else:
+            carry_times = carry['times']
+        carry = {'values': carry_values, 'times': carry_times, 'pending': pending}
+        if held.any():
+            data = data[kept]
+
+        if columns:
+            logger.info(f"Filled gaps by {method} in columns: {columns}")
+        remaining = data[columns].isna().sum() if columns else pd.Series(dtype='int64')
+        columns = list(remaining.index[remaining > 0])
+
+    fill_values = _fill_statistics(data, columns) if fill_remaining else {}
+    for column, value in fill_values.items():
+        statistic = 'median' if pd.api.types.is_numeric_dtype(data[column]) else 'mode'
+        data[column] = data[column].fillna(value)
+        logger.info(f"Filled missing values in column '{column}' with {statistic}: {value}")
+    return data, carry
+
+@instrumented()
+def handle_missing_values(data: pd.DataFrame, method: str = 'median', group_column: str = None,
+                          timestamp_column: str = 'timestamp') -> pd.DataFrame:
     """
     Handles missing values in the dataset.
 
     Args:
         data (pd.DataFrame): Input DataFrame with potential missing values.
+        method (str): 'median', 'ffill' or 'interpolate'; see handle_missing_values_chunk.
+        group_column (str): Optional column identifying households for time-aware filling.
+        timestamp_column (str): Column holding the reading timestamps.
 
     Returns:
         pd.DataFrame: Cleaned DataFrame with missing values handled.
 
     Strategy:
-        - Numerical columns: Fill missing values with the median.
-        - Categorical columns: Fill missing values with the mode.
-    """
-    for column in data.columns:
-        if data[column].isnull().sum() > 0:
-            if data[column].dtype in [np.float64, np.int64]:  # Numerical columns
-                median_value = data[column].median()
-                data[column].fillna(median_value, inplace=True)
-                print(f"Filled missing values in numerical column '{column}' with median: {median_value}")
-            else:  # Categorical columns
-                mode_value = data[column].mode()[0]
-                data[column].fillna(mode_value, inplace=True)
-                print(f"Filled missing values in categorical column '{column}' with mode: {mode_value}")
+        - 'median': numerical columns (any numeric dtype, including float32 and nullable
+          types) are filled with the median, the other columns with the mode.
+        - 'ffill' / 'interpolate': gaps are filled per household from neighbouring
+          readings, then any remaining gaps are filled as for 'median'.
+    """
+    data, _ = handle_missing_values_chunk(data, method, group_column, timestamp_column)
     return data
 
-def remove_anomalies(data: pd.DataFrame, column: str, threshold: float) -> pd.DataFrame:
+# Scale factor that makes the median absolute deviation comparable to a standard deviation
+MAD_SCALE = 0.6745
+
+def _merge_moment_state(state: pd.DataFrame, chunk_stats: pd.DataFrame, decay: float) -> pd.DataFrame:
+    """
+    Merges per-group count/mean/m2 statistics with Chan's parallel update, after
+    decaying the previous state by the given factor.
+    """
+    if state is None:
+        return chunk_stats
+    index = state.index.union(chunk_stats.index)
+    old = state.reindex(index, fill_value=0.0)
+    old[['count', 'm2']] *= decay
+    new = chunk_stats.reindex(index, fill_value=0.0)
+    total = old['count'] + new['count']
+    safe_total = total.where(total > 0, 1.0)
+    delta = new['mean'] - old['mean']
+    return pd.DataFrame({
+        'count': total,
+        'mean': old['mean'] + delta * new['count'] / safe_total,
+        'm2': old['m2'] + new['m2'] + delta ** 2 * old['count'] * new['count'] / safe_total,
+    })
+
+def _merge_robust_state(state: pd.DataFrame, chunk_stats: pd.DataFrame, decay: float) -> pd.DataFrame:
+    """
+    Merges per-group median/MAD estimates as count-weighted averages of chunk estimates.
+    """
+    if state is None:
+        return chunk_stats
+    index = state.index.union(chunk_stats.index)
+    old = state.reindex(index, fill_value=0.0)
+    old['count'] *= decay
+    new = chunk_stats.reindex(index, fill_value=0.0)
+    total = old['count'] + new['count']
+    safe_total = total.where(total > 0, 1.0)
+    return pd.DataFrame({
+        'count': total,
+        'median': (old['median'] * old['count'] + new['median'] * new['count']) / safe_total,
+        'mad': (old['mad'] * old['count'] + new['mad'] * new['count']) / safe_total,
+    })
+
+def detect_anomalies(data: pd.DataFrame, column: str, threshold: float = 3.0, group_columns: list = None,
+                     method: str = 'zscore', state: pd.DataFrame = None, decay: float = 1.0):
+    """
+    Flags anomalous readings chunk by chunk with per-group running statistics.
+
+    For method='zscore' the state holds a running count, mean and sum of squared
+    deviations per group (Welford/Chan updates); a decay below 1.0 down-weights older
+    chunks exponentially. For method='mad' the state holds count-weighted median and
+    MAD estimates, a robust variant that is less affected by the anomalies themselves.
+    Each chunk is scored against the state merged with the chunk's own statistics, so a
+    single call on a whole DataFrame reproduces the global z-score. The state is
+    O(groups) and the input DataFrame is neither modified nor copied.
+
+    Args:
+        data (pd.DataFrame): DataFrame or chunk to score.
+        column (str): Column name to check for anomalies.
+        threshold (float): Score above which a reading is flagged.
+        group_columns (list): Optional columns defining independent groups, e.g.
+            ['household_id'] or ['household_id', 'hour'].
+        method (str): 'zscore' or 'mad'.
+        state (pd.DataFrame): State returned by the previous chunk, or None.
+        decay (float): Weight kept by the previous state for each new chunk.
+
+    Returns:
+        tuple: Boolean Series (True for anomalies) aligned with data, and the new state.
+
+    Example Usage:
+        state = None
+        for chunk in chunks:
+            mask, state = detect_anomalies(chunk, 'energy_usage', 3.0, ['household_id'], state=state)
+    """
+    if method not in ('zscore', 'mad'):
+        raise ValueError(f"Unsupported anomaly detection method '{method}'; expected 'zscore' or 'mad'")
+    values = data[column]
+    keys = [data[group_column] for group_column in group_columns] if group_columns else np.zeros(len(data), dtype=np.int8)
+    grouped = values.groupby(keys, sort=False, dropna=False, observed=True)
+    codes = grouped.ngroup().to_numpy()
+
+    if method == 'zscore':
+        chunk_stats = grouped.agg(['count', 'mean'])
+        chunk_stats['m2'] = grouped.var(ddof=0).fillna(0.0) * chunk_stats['count']
+        state = _merge_moment_state(state, chunk_stats, decay)
+        current = state.loc[chunk_stats.index]
+        center = current['mean'].to_numpy()[codes]
+        scale = np.sqrt(current['m2'] / current['count'].where(current['count'] > 0)).to_numpy()[codes]
+    else:
+        chunk_stats = grouped.agg(['count', 'median'])
+        deviations = np.abs(values.to_numpy() - chunk_stats['median'].to_numpy()[codes])
+        chunk_stats['mad'] = pd.Series(deviations).groupby(codes).median().to_numpy()
+        state = _merge_robust_state(state, chunk_stats, decay)
+        current = state.loc[chunk_stats.index]
+        center = current['median'].to_numpy()[codes]
+        scale = current['mad'].to_numpy()[codes] / MAD_SCALE
+
+    # Constant groups have zero scale; their NaN scores are never flagged
+    with np.errstate(divide='ignore', invalid='ignore'):
+        anomalies = np.abs((values.to_numpy(dtype=np.float64, na_value=np.nan) - center) / scale) > threshold
+    return pd.Series(anomalies, index=data.index, name=f'{column}_anomaly'), state
+
+@instrumented()
+def remove_anomalies(data: pd.DataFrame, column: str, threshold: float, group_columns: list = None,
+                     method: str = 'zscore') -> pd.DataFrame:
     """
     Removes anomalies from a specified column based on a threshold.
 
@@ -43,23 +355,25 @@ def remove_anomalies(data: pd.DataFrame, column: str, threshold: float) -> pd.Da
         data (pd.DataFrame): Input DataFrame with potential anomalies.
         column (str): Column name to check for anomalies.
         threshold (float): Threshold value to define anomalies (e.g., z-score).
+        group_columns (list): Optional columns whose groups are scored independently.
+        method (str): 'zscore' or the robust 'mad' variant; see detect_anomalies.
 
     Returns:
         pd.DataFrame: Cleaned DataFrame with anomalies removed.
     """
-    from scipy.stats import zscore
-
-    data['z_score'] = zscore(data[column])  # Calculate z-scores for the column
-    data_cleaned = data[data['z_score'].abs() <= threshold]  # Filter based on threshold
-    print(f"Removed {len(data) - len(data_cleaned)} anomalies from column '{column}' based on z-score threshold of {threshold}.")
-    data_cleaned.drop(columns=['z_score'], inplace=True)
+    anomalies, _ = detect_anomalies(data, column, threshold, group_columns=group_columns, method=method)
+    data_cleaned = data[~anomalies]
+    logger.info(f"Removed {int(anomalies.sum())} anomalies from column '{column}' "
+                f"based on {method} threshold of {threshold}.")
     return data_cleaned
 
+@instrumented()
 def preprocess_energy_data(data: pd.DataFrame) -> pd.DataFrame:
     """
     Performs full preprocessing pipeline on the energy data.
 
     Steps:
+        - Parse the 'timestamp' column to datetime64 once.
         - Handle missing values.
         - Remove anomalies.
 
@@ -69,10 +383,139 @@ def preprocess_energy_data(data: pd.DataFrame) -> pd.DataFrame:
     Returns:
         pd.DataFrame: Preprocessed DataFrame ready for analysis.
     """
-    print("Starting data preprocessing...")
+    logger.info("Starting data preprocessing...")
+    if 'timestamp' in data.columns:
+        data = parse_timestamp_column(data, 'timestamp')
     data = handle_missing_values(data)
     # Remove anomalies from 'energy_usage' column with a z-score threshold of 3
     if 'energy_usage' in data.columns:
         data = remove_anomalies(data, column='energy_usage', threshold=3.0)
-    print("Data preprocessing completed.")
+    logger.info("Data preprocessing completed.")
     return data
+
+@instrumented()
+def compute_column_statistics(chunks: Iterable[pd.DataFrame]) -> dict:
+    """
+    Computes mergeable per-column statistics over a stream of chunks.
+
+    Numerical columns keep a count, mean and sum of squared deviations (merged with
+    Chan's parallel update), categorical columns keep value counts, so memory stays
+    proportional to the number of columns and categories rather than rows.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): Chunks of the raw energy data.
+
+    Returns:
+        dict: Mapping of column name to its merged statistics, plus the total row
+        count under the key '__rows__'.
+    """
+    stats = {'__rows__': 0}
+    for chunk in chunks:
+        stats['__rows__'] += len(chunk)
+        for column in chunk.columns:
+            values = chunk[column].dropna()
+            if pd.api.types.is_numeric_dtype(chunk[column]):
+                entry = stats.setdefault(column, {'numeric': True, 'count': 0, 'mean': 0.0, 'm2': 0.0})
+                count = len(values)
+                if count == 0:
+                    continue
+                mean = float(values.mean())
+                m2 = float(((values - mean) ** 2).sum())
+                total = entry['count'] + count
+                delta = mean - entry['mean']
+                entry['m2'] += m2 + delta ** 2 * entry['count'] * count / total
+                entry['mean'] += delta * count / total
+                entry['count'] = total
+            else:
+                entry = stats.setdefault(column, {'numeric': False, 'counts': pd.Series(dtype='int64')})
+                entry['counts'] = entry['counts'].add(values.value_counts(), fill_value=0)
+    return stats
+
+def preprocess_energy_data_chunked(chunk_source: Callable[[], Iterable[pd.DataFrame]],
+                                   threshold: float = 3.0, fill_method: str = 'mean',
+                                   group_column: str = 'household_id', anomaly_group_columns: list = None,
+                                   anomaly_method: str = 'zscore', decay: float = 1.0) -> Iterator[pd.DataFrame]:
+    """
+    Streaming counterpart of preprocess_energy_data for data too large for memory.
+
+    The source is read twice: a first pass merges per-chunk statistics, a second pass
+    fills missing values with them and drops anomalies chunk by chunk. Numerical gaps
+    are filled with the global mean, because an exact median would need the full column
+    in memory. With fill_method='ffill' or 'interpolate', gaps are first filled per
+    household across chunk boundaries (see handle_missing_values_chunk) and the global
+    means only cover what remains; rows inside a gap that is still open at the end of a
+    chunk are yielded with a later chunk, once the gap can be interpolated. Anomalies are flagged by detect_anomalies, whose
+    per-group state is carried from chunk to chunk, so each chunk is scored against the
+    statistics of all readings seen so far.
+
+    Args:
+        chunk_source (Callable): Zero-argument callable returning a fresh iterator of
+            raw chunks, e.g. lambda: load_energy_data(path, chunksize=1_000_000).
+        threshold (float): Z-score threshold for the 'energy_usage' column.
+        fill_method (str): 'mean', 'ffill' or 'interpolate'.
+        group_column (str): Column identifying households for time-aware filling.
+        anomaly_group_columns (list): Optional columns whose groups are scored
+            independently, e.g. ['household_id'].
+        anomaly_method (str): 'zscore' or 'mad'; see detect_anomalies.
+        decay (float): Weight kept by the anomaly statistics for each new chunk.
+
+    Yields:
+        pd.DataFrame: Preprocessed chunks ready for analysis.
+
+    Example Usage:
+        chunks = preprocess_energy_data_chunked(lambda: load_energy_data(path, chunksize=500_000))
+    """
+    logger.info("Starting chunked data preprocessing...")
+    stats = compute_column_statistics(chunk_source())
+    stats.pop('__rows__')
+
+    fill_values = {}
+    for column, entry in stats.items():
+        if entry['numeric'] and entry['count'] > 0:
+            fill_values[column] = entry['mean']
+        elif not entry['numeric'] and len(entry['counts']) > 0:
+            fill_values[column] = entry['counts'].idxmax()
+
+    # Missing timestamps stay NaT, as in handle_missing_values_chunk: a mean of epoch
+    # seconds is not a meaningful reading time
+    fill_values.pop('timestamp', None)
+
+    # Each chunk infers its own categories, so categorical columns are recast to the
+    # categories seen over all chunks: the global mode is always a valid fill value, and
+    # the chunks stay categorical when they are concatenated downstream
+    categories = {column: pd.CategoricalDtype(entry['counts'].index)
+                  for column, entry in stats.items() if not entry['numeric']}
+
+    def filled_chunks():
+        carry = None
+        for chunk in chunk_source():
+            if 'timestamp' in chunk.columns:
+                chunk = parse_timestamp_column(chunk, 'timestamp')
+            for column, dtype in categories.items():
+                if column in chunk.columns and isinstance(chunk[column].dtype, pd.CategoricalDtype):
+                    chunk[column] = chunk[column].astype(dtype)
+            if fill_method != 'mean':
+                chunk, carry = handle_missing_values_chunk(
+                    chunk, fill_method, group_column if group_column in chunk.columns else None, carry=carry,
+                    fill_remaining=False, hold_back=True)
+            if len(chunk) > 0:
+                yield chunk
+        # Rows whose gap was still open at the end of the data are released last
+        if carry is not None and len(carry['pending']) > 0:
+            pending = carry['pending']
+            chunk, carry = handle_missing_values_chunk(
+                pending.iloc[:0], fill_method, group_column if group_column in pending.columns else None,
+                carry=carry, fill_remaining=False)
+            yield chunk
+
+    removed = 0
+    anomaly_state = None
+    for chunk in filled_chunks():
+        chunk = chunk.fillna(fill_values)
+        if 'energy_usage' in chunk.columns and len(chunk) > 0:
+            anomalies, anomaly_state = detect_anomalies(chunk, 'energy_usage', threshold, anomaly_group_columns,
+                                                        anomaly_method, anomaly_state, decay)
+            removed += int(anomalies.sum())
+            chunk = chunk[~anomalies]
+        yield chunk
+    logger.info(f"Chunked data preprocessing completed. Removed {removed} anomalies from column 'energy_usage'.")
@@ -0,0 +1,252 @@
+"""
+Module: data_store.py
+Author: Satej
+Description:
+This script implements the append-only columnar store used to keep the energy usage history.
+Data is written as Parquet files partitioned by date, and a small JSON manifest records every
+file together with its row count and timestamp range. Ingesting a new batch only writes new
+partition files, and readers can project columns and prune partitions by date range.
+"""
+
+import json
+import os
+import uuid
+import pandas as pd
+from data_preprocessing import ensure_datetime
+
+MANIFEST_FILE = "_manifest.json"
+
+def atomic_write(path: str, write_function):
+    """
+    Writes a file through a temporary sibling and renames it into place, so readers
+    never observe a partially written file even if the process dies mid-write.
+    """
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        write_function(temp_path)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def is_store(path: str) -> bool:
+    """
+    Returns True if the path points to a columnar store (a directory with a manifest).
+    """
+    return os.path.isfile(os.path.join(path, MANIFEST_FILE))
+
+def read_manifest(store_path: str) -> dict:
+    """
+    Reads the store manifest, returning an empty manifest for a new store.
+
+    Args:
+        store_path (str): Root directory of the store.
+
+    Returns:
+        dict: Manifest with a 'files' list of partition file entries.
+    """
+    manifest_path = os.path.join(store_path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return {'version': 1, 'files': []}
+    with open(manifest_path) as manifest_file:
+        return json.load(manifest_file)
+
+def _write_manifest(store_path: str, manifest: dict):
+    def write(temp_path):
+        with open(temp_path, 'w') as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+    atomic_write(os.path.join(store_path, MANIFEST_FILE), write)
+
+def _row_group_entries(partition: pd.DataFrame, timestamps: pd.Series, household_keys: pd.Series,
+                       appliance_column: str, row_group_size: int) -> list:
+    entries = []
+    for start in range(0, len(partition), row_group_size):
+        stop = min(start + row_group_size, len(partition))
+        entry = {
+            'rows': stop - start,
+            'min_timestamp': timestamps.iloc[start:stop].min().isoformat(),
+            'max_timestamp': timestamps.iloc[start:stop].max().isoformat(),
+        }
+        if household_keys is not None:
+            entry['min_household'] = household_keys.iloc[start]
+            entry['max_household'] = household_keys.iloc[stop - 1]
+        if appliance_column in partition.columns:
+            entry['appliances'] = sorted(partition[appliance_column].iloc[start:stop].dropna().astype(str).unique())
+        entries.append(entry)
+    return entries
+
+def append_to_store(store_path: str, data: pd.DataFrame, timestamp_column: str = 'timestamp',
+                    household_column: str = 'household_id', appliance_column: str = 'appliance',
+                    row_group_size: int = 65_536) -> list:
+    """
+    Appends a batch of readings to the store, writing one new file per date partition.
+
+    Each partition file is written atomically and only then registered in the manifest,
+    so an interrupted ingest leaves the existing history untouched. Existing files are
+    never rewritten, so the cost of an append depends only on the size of the batch.
+    The store assumes a single writer at a time.
+
+    Rows are sorted by household and time within each file and written in row groups
+    whose household range, time range and appliances are recorded in the manifest, so
+    store_query can skip row groups without opening the files.
+
+    Args:
+        store_path (str): Root directory of the store; created if missing.
+        data (pd.DataFrame): New readings to append.
+        timestamp_column (str): Column used to partition the data by date.
+        household_column (str): Column the rows are clustered by within each file.
+        appliance_column (str): Column whose values are recorded per row group.
+        row_group_size (int): Number of rows per Parquet row group.
+
+    Returns:
+        list: Manifest entries of the files written.
+
+    Example Usage:
+        append_to_store("C:/Users/Satej/Data/energy_store", new_data)
+    """
+    os.makedirs(store_path, exist_ok=True)
+    manifest = read_manifest(store_path)
+    timestamps = ensure_datetime(data[timestamp_column])
+    written = []
+    # Positions rather than index labels, so a non-unique index never duplicates rows
+    for day, positions in timestamps.groupby(timestamps.dt.normalize()).indices.items():
+        date = pd.Timestamp(day).strftime('%Y-%m-%d')
+        partition = data.iloc[positions].reset_index(drop=True)
+        partition_timestamps = timestamps.iloc[positions].reset_index(drop=True)
+        household_keys = None
+        if household_column in partition.columns:
+            # Household ids are compared as strings, so the sort order matches the recorded ranges
+            household_keys = partition[household_column].astype(str)
+            order = pd.DataFrame({'household': household_keys, 'timestamp': partition_timestamps}).sort_values(
+                ['household', 'timestamp'], kind='stable').index
+        else:
+            order = partition_timestamps.sort_values(kind='stable').index
+        partition = partition.iloc[order].reset_index(drop=True)
+        partition_timestamps = partition_timestamps.iloc[order].reset_index(drop=True)
+        if household_keys is not None:
+            household_keys = household_keys.iloc[order].reset_index(drop=True)
+        relative_path = f"date={date}/part-{uuid.uuid4().hex}.parquet"
+        os.makedirs(os.path.join(store_path, f"date={date}"), exist_ok=True)
+        atomic_write(os.path.join(store_path, relative_path),
+                     lambda temp_path, partition=partition: partition.to_parquet(
+                         temp_path, index=False, row_group_size=row_group_size))
+        written.append({
+            'path': relative_path,
+            'date': date,
+            'rows': int(len(partition)),
+            'min_timestamp': partition_timestamps.min().isoformat(),
+            'max_timestamp': partition_timestamps.max().isoformat(),
+            'row_groups': _row_group_entries(partition, partition_timestamps, household_keys,
+                                             appliance_column, row_group_size),
+        })
+    manifest['files'].extend(written)
+    _write_manifest(store_path, manifest)
+    print(f"Appended {len(data)} rows in {len(written)} partition files to store at {store_path}.")
+    return written
+
+def select_store_files(store_path: str, start=None, end=None) -> list:
+    """
+    Returns the manifest entries whose timestamp range overlaps [start, end].
+
+    Args:
+        store_path (str): Root directory of the store.
+        start: Optional inclusive lower bound (anything accepted by pd.Timestamp).
+        end: Optional inclusive upper bound (anything accepted by pd.Timestamp).
+
+    Returns:
+        list: Matching manifest entries.
+    """
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    selected = []
+    for entry in read_manifest(store_path)['files']:
+        if start is not None and pd.Timestamp(entry['max_timestamp']) < start:
+            continue
+        if end is not None and pd.Timestamp(entry['min_timestamp']) > end:
+            continue
+        selected.append(entry)
+    return selected
+
+def _filter_range(data: pd.DataFrame, timestamp_column: str, start, end) -> pd.DataFrame:
+    if (start is None and end is None) or timestamp_column not in data.columns:
+        return data
+    timestamps = ensure_datetime(data[timestamp_column])
+    mask = pd.Series(True, index=data.index)
+    if start is not None:
+        mask &= timestamps >= pd.Timestamp(start)
+    if end is not None:
+        mask &= timestamps <= pd.Timestamp(end)
+    return data[mask]
+
+def read_store_files(store_path: str, entries: list, columns: list = None) -> pd.DataFrame:
+    """
+    Reads the given manifest entries, e.g. the files appended since a previous read.
+
+    Args:
+        store_path (str): Root directory of the store.
+        entries (list): Manifest entries to read.
+        columns (list): Optional list of columns to read.
+
+    Returns:
+        pd.DataFrame: The readings of those files.
+    """
+    frames = [pd.read_parquet(os.path.join(store_path, entry['path']), columns=columns) for entry in entries]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+def read_store(store_path: str, columns: list = None, start=None, end=None,
+               timestamp_column: str = 'timestamp') -> pd.DataFrame:
+    """
+    Reads readings from the store, touching only partitions that overlap the date range.
+
+    Args:
+        store_path (str): Root directory of the store.
+        columns (list): Optional list of columns to read (column projection).
+        start: Optional inclusive lower timestamp bound.
+        end: Optional inclusive upper timestamp bound.
+        timestamp_column (str): Column holding the reading timestamps.
+
+    Returns:
+        pd.DataFrame: The matching readings.
+
+    Example Usage:
+        data = read_store("C:/Users/Satej/Data/energy_store", columns=['timestamp', 'energy_usage'],
+                          start='2024-01-01', end='2024-01-07')
+    """
+    read_columns = columns
+    if columns is not None and (start is not None or end is not None) and timestamp_column not in columns:
+        read_columns = list(columns) + [timestamp_column]
+    frames = []
+    for entry in select_store_files(store_path, start, end):
+        frame = pd.read_parquet(os.path.join(store_path, entry['path']), columns=read_columns)
+        frames.append(_filter_range(frame, timestamp_column, start, end))
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    data = pd.concat(frames, ignore_index=True)
+    return data if columns is None else data[list(columns)]
+
+def iter_store_chunks(store_path: str, chunksize: int, columns: list = None, start=None, end=None,
+                      timestamp_column: str = 'timestamp'):
+    """
+    Streams readings from the store in batches of at most chunksize rows.
+
+    Args:
+        store_path (str): Root directory of the store.
+        chunksize (int): Maximum number of rows per chunk.
+        columns (list): Optional list of columns to read.
+        start: Optional inclusive lower timestamp bound.
+        end: Optional inclusive upper timestamp bound.
+        timestamp_column (str): Column holding the reading timestamps.
+
+    Yields:
+        pd.DataFrame: Chunks of matching readings.
+    """
+    import pyarrow.parquet as pq
+
+    read_columns = columns
+    if columns is not None and (start is not None or end is not None) and timestamp_column not in columns:
+        read_columns = list(columns) + [timestamp_column]
+    for entry in select_store_files(store_path, start, end):
+        parquet_file = pq.ParquetFile(os.path.join(store_path, entry['path']))
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=read_columns):
+            chunk = _filter_range(batch.to_pandas(), timestamp_column, start, end)
+            yield chunk if columns is None else chunk[list(columns)]
@@ -8,13 +8,17 @@ and relationships in the energy usage data.
 """
 
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+from data_preprocessing import ensure_datetime
+from rendering import downsample_minmax, max_points, render
 
 def plot_energy_usage_trends(data: pd.DataFrame, date_column: str, usage_column: str):
     """
     Plots energy usage trends over time.
 
+    Readings sharing a timestamp (e.g. from different households) are averaged with a
+    plain grouped mean instead of a bootstrapped confidence interval, and the series is
+    min/max downsampled to the configured number of points before drawing.
+
     Args:
         data (pd.DataFrame): DataFrame containing energy usage data.
         date_column (str): Column representing date/time values.
@@ -23,15 +27,23 @@ def plot_energy_usage_trends(data: pd.DataFrame, date_column: str, usage_column:
     Example Usage:
         plot_energy_usage_trends(data, 'timestamp', 'energy_usage')
     """
-    plt.figure(figsize=(12, 6))
-    sns.lineplot(x=date_column, y=usage_column, data=data)
-    plt.title('Energy Usage Over Time')
-    plt.xlabel('Date')
-    plt.ylabel('Energy Usage (kWh)')
-    plt.xticks(rotation=45)
-    plt.grid(True)
-    plt.tight_layout()
-    plt.show()
+    dates = data[date_column]
+    if not pd.api.types.is_numeric_dtype(dates):
+        dates = ensure_datetime(dates)
+    usage_over_time = data[usage_column].groupby(dates).mean()
+    x, y = downsample_minmax(usage_over_time.index.to_numpy(), usage_over_time.to_numpy(), max_points())
+
+    def draw(figure):
+        ax = figure.add_subplot()
+        ax.plot(x, y, linewidth=0.8)
+        ax.set_title('Energy Usage Over Time')
+        ax.set_xlabel('Date')
+        ax.set_ylabel('Energy Usage (kWh)')
+        ax.tick_params(axis='x', labelrotation=45)
+        ax.grid(True)
+        figure.tight_layout()
+
+    render(draw, 'energy_usage_trends', figsize=(12, 6))
 
 def plot_peak_hours(data: pd.DataFrame, time_column: str, usage_column: str):
     """
@@ -45,16 +57,18 @@ def plot_peak_hours(data: pd.DataFrame, time_column: str, usage_column: str):
     Example Usage:
         plot_peak_hours(data, 'hour', 'energy_usage')
     """
-    data['hour'] = pd.to_datetime(data[time_column]).dt.hour
-    hourly_usage = data.groupby('hour')[usage_column].mean()
-    
-    plt.figure(figsize=(10, 5))
-    hourly_usage.plot(kind='bar', color='skyblue')
-    plt.title('Average Energy Usage by Hour')
-    plt.xlabel('Hour of the Day')
-    plt.ylabel('Average Energy Usage (kWh)')
-    plt.grid(axis='y')
-    plt.show()
+    hours = ensure_datetime(data[time_column]).dt.hour.rename('hour')
+    hourly_usage = data[usage_column].groupby(hours).mean()
+
+    def draw(figure):
+        ax = figure.add_subplot()
+        ax.bar(hourly_usage.index.astype(str), hourly_usage.to_numpy(), color='skyblue')
+        ax.set_title('Average Energy Usage by Hour')
+        ax.set_xlabel('Hour of the Day')
+        ax.set_ylabel('Average Energy Usage (kWh)')
+        ax.grid(axis='y')
+
+    render(draw, 'peak_hours', figsize=(10, 5))
 
 def summarize_data(data: pd.DataFrame):
     """
@@ -4,11 +4,23 @@ Author: Satej
 Description:
 This script handles feature engineering for the energy analytics project.
 It creates new features to enhance predictive models, such as average daily consumption
-and peak-hour usage, and categorizes households based on energy consumption tiers.
+and peak-hour usage, and categorizes households based on energy consumption tiers, with
+tier boundaries taken from mergeable streaming quantile sketches.
 """
 
+import json
+import logging
+import os
+import numpy as np
 import pandas as pd
+from typing import Iterable, Iterator
+from data_preprocessing import ensure_datetime
+from instrumentation import instrumented
+from quantile_sketch import new_sketch, update_sketch, merge_sketches, sketch_quantiles
 
+logger = logging.getLogger(__name__)
+
+@instrumented()
 def create_time_features(data: pd.DataFrame, timestamp_column: str) -> pd.DataFrame:
     """
     Creates time-based features such as hour, day, and month from a timestamp column.
@@ -23,13 +35,124 @@ def create_time_features(data: pd.DataFrame, timestamp_column: str) -> pd.DataFr
     Example Usage:
         data = create_time_features(data, 'timestamp')
     """
-    data['hour'] = pd.to_datetime(data[timestamp_column]).dt.hour
-    data['day_of_week'] = pd.to_datetime(data[timestamp_column]).dt.dayofweek
-    data['month'] = pd.to_datetime(data[timestamp_column]).dt.month
-    print("Time-based features created: ['hour', 'day_of_week', 'month']")
+    # Parse once and keep the typed column so later steps do not parse it again
+    timestamps = ensure_datetime(data[timestamp_column])
+    data[timestamp_column] = timestamps
+    data['hour'] = timestamps.dt.hour
+    data['day_of_week'] = timestamps.dt.dayofweek
+    data['month'] = timestamps.dt.month
+    logger.info("Time-based features created: ['hour', 'day_of_week', 'month']")
     return data
 
-def calculate_daily_consumption(data: pd.DataFrame, timestamp_column: str, usage_column: str) -> pd.DataFrame:
+# Resampling frequencies supported by the grouped aggregation, mapped to numpy datetime units
+AGGREGATION_FREQUENCIES = {'hourly': 'h', 'daily': 'D', 'monthly': 'M'}
+
+def _aggregation_keys(data: pd.DataFrame, timestamp_column: str, household_column: str, frequency: str) -> list:
+    """
+    Builds the group keys: a categorical household key (if present) and datetime64
+    period bins floored to the requested frequency.
+    """
+    if frequency not in AGGREGATION_FREQUENCIES:
+        raise ValueError(f"Unsupported frequency '{frequency}'; expected one of {list(AGGREGATION_FREQUENCIES)}")
+    timestamps = ensure_datetime(data[timestamp_column])
+    if timestamps.dt.tz is not None:
+        timestamps = timestamps.dt.tz_localize(None)
+    unit = AGGREGATION_FREQUENCIES[frequency]
+    periods = timestamps.to_numpy().astype(f'datetime64[{unit}]').astype('datetime64[ns]')
+    keys = [pd.Series(periods, index=data.index, name='period')]
+    if household_column is not None and household_column in data.columns:
+        households = data[household_column]
+        if households.dtype == object:
+            households = households.astype('category')
+        keys.insert(0, households.rename(household_column))
+    return keys
+
+def consumption_partial(data: pd.DataFrame, timestamp_column: str, usage_column: str,
+                        household_column: str = 'household_id', frequency: str = 'daily') -> pd.DataFrame:
+    """
+    Reduces data to mergeable per-household, per-period partial aggregates in one pass.
+
+    Args:
+        data (pd.DataFrame): DataFrame (or chunk) with timestamp and usage columns.
+        timestamp_column (str): Column containing timestamp values.
+        usage_column (str): Column containing energy usage values.
+        household_column (str): Column identifying households; ignored if absent.
+        frequency (str): One of 'hourly', 'daily' or 'monthly'.
+
+    Returns:
+        pd.DataFrame: 'total', 'readings' and 'peak' columns indexed by
+        (household, period), or by period alone when there is no household column.
+    """
+    keys = _aggregation_keys(data, timestamp_column, household_column, frequency)
+    grouped = data[usage_column].groupby(keys, observed=True, sort=False)
+    return grouped.agg(['sum', 'count', 'max']).rename(columns={'sum': 'total', 'count': 'readings', 'max': 'peak'})
+
+def merge_consumption_partials(left: pd.DataFrame, right: pd.DataFrame) -> pd.DataFrame:
+    """
+    Merges two partial aggregates produced by consumption_partial.
+
+    Args:
+        left (pd.DataFrame): Running partial aggregate, or None.
+        right (pd.DataFrame): Partial aggregate to fold in.
+
+    Returns:
+        pd.DataFrame: The combined partial aggregate.
+    """
+    if left is None:
+        return right
+    combined = pd.concat([left, right])
+    return combined.groupby(level=list(range(combined.index.nlevels)), observed=True, sort=False).agg(
+        {'total': 'sum', 'readings': 'sum', 'peak': 'max'})
+
+def finalize_consumption(partial: pd.DataFrame) -> pd.DataFrame:
+    """
+    Turns a partial aggregate into the final statistics table.
+
+    Args:
+        partial (pd.DataFrame): Partial aggregate produced by consumption_partial or
+            merge_consumption_partials.
+
+    Returns:
+        pd.DataFrame: Key columns plus 'total_usage', 'mean_usage', 'peak_usage',
+        'load_factor' (mean over peak) and 'readings', sorted by key.
+    """
+    result = partial.sort_index().reset_index()
+    result['mean_usage'] = result['total'] / result['readings']
+    result['load_factor'] = result['mean_usage'] / result['peak'].where(result['peak'] != 0)
+    result = result.rename(columns={'total': 'total_usage', 'peak': 'peak_usage'})
+    key_columns = [column for column in result.columns
+                   if column not in ('total_usage', 'mean_usage', 'peak_usage', 'load_factor', 'readings')]
+    return result[key_columns + ['total_usage', 'mean_usage', 'peak_usage', 'load_factor', 'readings']]
+
+@instrumented()
+def aggregate_consumption(data: pd.DataFrame, timestamp_column: str, usage_column: str,
+                          household_column: str = 'household_id', frequency: str = 'daily') -> pd.DataFrame:
+    """
+    Computes per-household consumption statistics at hourly, daily or monthly resolution.
+
+    Households are grouped on categorical keys and periods on floored datetime64 bins, so
+    no object-dtype keys are created. Sum, mean, peak and load factor come from a single
+    grouped pass.
+
+    Args:
+        data (pd.DataFrame): Input DataFrame with timestamp and usage columns.
+        timestamp_column (str): Column containing timestamp values.
+        usage_column (str): Column containing energy usage values.
+        household_column (str): Column identifying households; ignored if absent.
+        frequency (str): One of 'hourly', 'daily' or 'monthly'.
+
+    Returns:
+        pd.DataFrame: One row per household and period with 'total_usage', 'mean_usage',
+        'peak_usage', 'load_factor' and 'readings'.
+
+    Example Usage:
+        monthly = aggregate_consumption(data, 'timestamp', 'energy_usage', frequency='monthly')
+    """
+    return finalize_consumption(consumption_partial(data, timestamp_column, usage_column, household_column, frequency))
+
+@instrumented()
+def calculate_daily_consumption(data: pd.DataFrame, timestamp_column: str, usage_column: str,
+                                household_column: str = 'household_id') -> pd.DataFrame:
     """
     Calculates daily energy consumption for each household.
 
@@ -37,35 +160,218 @@ def calculate_daily_consumption(data: pd.DataFrame, timestamp_column: str, usage
         data (pd.DataFrame): Input DataFrame with timestamp and usage columns.
         timestamp_column (str): Column containing timestamp values.
         usage_column (str): Column containing energy usage values.
+        household_column (str): Column identifying households; if absent, all readings
+            are aggregated per day.
 
     Returns:
-        pd.DataFrame: DataFrame with daily energy consumption added.
+        pd.DataFrame: One row per household and day with 'date', 'daily_consumption',
+        'mean_usage', 'peak_usage', 'load_factor' and 'readings'.
 
     Example Usage:
         data = calculate_daily_consumption(data, 'timestamp', 'energy_usage')
     """
-    data['date'] = pd.to_datetime(data[timestamp_column]).dt.date
-    daily_consumption = data.groupby('date')[usage_column].sum().reset_index()
-    daily_consumption.rename(columns={usage_column: 'daily_consumption'}, inplace=True)
-    print("Daily energy consumption calculated.")
+    daily_consumption = aggregate_consumption(data, timestamp_column, usage_column, household_column, 'daily')
+    daily_consumption.rename(columns={'period': 'date', 'total_usage': 'daily_consumption'}, inplace=True)
+    logger.info("Daily energy consumption calculated.")
     return daily_consumption
 
-def categorize_consumption(data: pd.DataFrame, usage_column: str, bins: list, labels: list) -> pd.DataFrame:
+def create_time_features_chunked(chunks: Iterable[pd.DataFrame], timestamp_column: str) -> Iterator[pd.DataFrame]:
+    """
+    Streaming counterpart of create_time_features; the features are row-wise, so each
+    chunk is processed independently.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): Chunks with a timestamp column.
+        timestamp_column (str): Column containing timestamp values.
+
+    Yields:
+        pd.DataFrame: Chunks with 'hour', 'day_of_week' and 'month' added.
+    """
+    for chunk in chunks:
+        timestamps = ensure_datetime(chunk[timestamp_column])
+        yield chunk.assign(**{timestamp_column: timestamps}, hour=timestamps.dt.hour,
+                           day_of_week=timestamps.dt.dayofweek, month=timestamps.dt.month)
+
+def calculate_daily_consumption_chunked(chunks: Iterable[pd.DataFrame], timestamp_column: str, usage_column: str,
+                                        household_column: str = 'household_id') -> pd.DataFrame:
+    """
+    Streaming counterpart of calculate_daily_consumption.
+
+    Each chunk is reduced to per-household, per-day partial aggregates which are merged
+    into a running total, so memory is bounded by the number of household-days.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): Chunks with timestamp and usage columns.
+        timestamp_column (str): Column containing timestamp values.
+        usage_column (str): Column containing energy usage values.
+        household_column (str): Column identifying households; ignored if absent.
+
+    Returns:
+        pd.DataFrame: Same layout as calculate_daily_consumption.
+    """
+    partial = None
+    for chunk in chunks:
+        partial = merge_consumption_partials(partial, consumption_partial(
+            chunk, timestamp_column, usage_column, household_column, 'daily'))
+    daily_consumption = finalize_consumption(partial)
+    daily_consumption.rename(columns={'period': 'date', 'total_usage': 'daily_consumption'}, inplace=True)
+    logger.info("Daily energy consumption calculated from chunks.")
+    return daily_consumption
+
+def update_consumption_sketches(sketches: dict, data: pd.DataFrame, usage_column: str, group_column: str = None,
+                                k: int = 200) -> dict:
+    """
+    Folds a batch of readings into streaming quantile sketches of the usage column.
+
+    A sketch over all readings is kept under the key None; with a group column (e.g. a
+    region or household class), one sketch per group is kept as well. The sketches stay
+    a few kilobytes each however many readings they summarize.
+
+    Args:
+        sketches (dict): Sketches from a previous batch, or None.
+        data (pd.DataFrame): New batch of readings.
+        usage_column (str): Column containing energy usage values.
+        group_column (str): Optional column to keep separate sketches for.
+        k (int): Sketch accuracy parameter.
+
+    Returns:
+        dict: The updated sketches, keyed by group.
+
+    Example Usage:
+        sketches = None
+        for chunk in chunks:
+            sketches = update_consumption_sketches(sketches, chunk, 'energy_usage', 'region')
+    """
+    sketches = dict(sketches) if sketches is not None else {}
+    values = data[usage_column].to_numpy(dtype=np.float64, na_value=np.nan)
+    sketches[None] = update_sketch(sketches.get(None) or new_sketch(k), values)
+    if group_column is not None:
+        for group, positions in data.groupby(group_column, observed=True, sort=False).indices.items():
+            sketches[group] = update_sketch(sketches.get(group) or new_sketch(k), values[positions])
+    return sketches
+
+def merge_consumption_sketches(left: dict, right: dict) -> dict:
+    """
+    Merges the consumption sketches built on different chunks or by different workers.
+
+    Args:
+        left (dict): Sketches from update_consumption_sketches, or None.
+        right (dict): Sketches from update_consumption_sketches, or None.
+
+    Returns:
+        dict: Merged sketches, keyed by group.
+    """
+    left, right = left or {}, right or {}
+    return {group: merge_sketches(left.get(group), right.get(group)) for group in {**left, **right}}
+
+def consumption_tier_edges(sketches: dict, tiers: int = 3, min_count: int = 100) -> dict:
+    """
+    Derives tier boundaries at equally spaced quantiles from consumption sketches.
+
+    Args:
+        sketches (dict): Sketches from update_consumption_sketches.
+        tiers (int): Number of tiers; tiers - 1 inner boundaries are returned per group.
+        min_count (int): Groups with fewer readings use the boundaries of all readings.
+
+    Returns:
+        dict: Sorted boundary arrays keyed by group, with the overall boundaries under None.
+    """
+    quantiles = np.arange(1, tiers) / tiers
+    overall = sketch_quantiles(sketches[None], quantiles)
+    return {group: sketch_quantiles(sketch, quantiles) if group is None or sketch['count'] >= min_count else overall
+            for group, sketch in sketches.items()}
+
+# File, inside a rollup directory, holding the tier boundaries of the last full run
+TIER_EDGES_FILE = 'tier_edges.json'
+
+def save_tier_edges(directory: str, edges: dict):
+    """
+    Saves tier boundaries from consumption_tier_edges, so incremental updates can tier
+    new readings with the boundaries of the last full run instead of their own.
+
+    Args:
+        directory (str): Directory to write TIER_EDGES_FILE to, e.g. the rollup directory.
+        edges (dict): Boundaries keyed by group, with the overall boundaries under None.
+    """
+    from data_store import atomic_write
+
+    # A list of entries keeps None and non-string group keys intact through JSON
+    entries = [{'group': group.item() if isinstance(group, np.generic) else group,
+                'edges': [float(edge) for edge in group_edges]} for group, group_edges in edges.items()]
+
+    def write_edges(temp_path):
+        with open(temp_path, 'w') as edges_file:
+            json.dump(entries, edges_file, indent=2)
+    os.makedirs(directory, exist_ok=True)
+    atomic_write(os.path.join(directory, TIER_EDGES_FILE), write_edges)
+
+def load_tier_edges(directory: str) -> dict:
+    """
+    Loads tier boundaries saved by save_tier_edges.
+
+    Args:
+        directory (str): Directory containing TIER_EDGES_FILE.
+
+    Returns:
+        dict: Boundaries keyed by group, or None if none were saved.
+    """
+    path = os.path.join(directory, TIER_EDGES_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as edges_file:
+        return {entry['group']: np.asarray(entry['edges'], dtype=np.float64) for entry in json.load(edges_file)}
+
+@instrumented()
+def categorize_consumption(data: pd.DataFrame, usage_column: str, bins: list = None,
+                           labels: list = ('Low', 'Medium', 'High'), edges: dict = None,
+                           group_column: str = None) -> pd.DataFrame:
     """
     Categorizes households into consumption tiers (e.g., low, medium, high).
 
+    Tier boundaries are either fixed bin edges or data-driven quantile boundaries from
+    consumption_tier_edges, optionally per group. Without either, the boundaries are
+    derived from a sketch of the data itself. A reading on a boundary belongs to the
+    lower tier, and readings beyond the outer edges fall into the lowest or highest
+    tier instead of being left uncategorized.
+
     Args:
         data (pd.DataFrame): Input DataFrame with energy usage data.
         usage_column (str): Column containing energy usage values.
-        bins (list): List of bin edges for categorization.
+        bins (list): Optional fixed bin edges, e.g. [0, 50, 150, 500].
         labels (list): List of labels for each category.
+        edges (dict): Optional boundaries from consumption_tier_edges.
+        group_column (str): Column selecting the per-group boundaries in edges; groups
+            without their own boundaries use the overall ones.
 
     Returns:
         pd.DataFrame: DataFrame with a new column 'consumption_tier' added.
 
     Example Usage:
         data = categorize_consumption(data, 'energy_usage', [0, 50, 150, 500], ['Low', 'Medium', 'High'])
+        data = categorize_consumption(data, 'energy_usage', edges=consumption_tier_edges(sketches), group_column='region')
     """
-    data['consumption_tier'] = pd.cut(data[usage_column], bins=bins, labels=labels, include_lowest=True)
-    print("Consumption tiers categorized: ['Low', 'Medium', 'High']")
+    labels = list(labels)
+    if bins is not None:
+        edges = {None: np.asarray(bins[1:-1], dtype=np.float64)}
+    elif edges is None:
+        edges = consumption_tier_edges(update_consumption_sketches(None, data, usage_column), len(labels))
+    if any(len(group_edges) != len(labels) - 1 for group_edges in edges.values()):
+        raise ValueError(f"Tier boundaries must have {len(labels) - 1} values for labels {labels}.")
+
+    values = data[usage_column].to_numpy(dtype=np.float64, na_value=np.nan)
+    groups = [group for group in edges if group is not None]
+    if group_column is None or not groups:
+        codes = np.searchsorted(edges[None], values, side='left')
+    else:
+        # One boundary array per group plus the overall one for unseen groups, searched
+        # once per group so no values-by-boundaries matrix is materialized
+        boundaries = [edges[group] for group in groups] + [edges[None]]
+        rows = pd.Index(groups).get_indexer(data[group_column]).astype(np.int64)
+        rows[rows < 0] = len(groups)
+        codes = np.empty(len(values), dtype=np.int64)
+        for row, positions in pd.Series(rows).groupby(rows, sort=False).indices.items():
+            codes[positions] = np.searchsorted(boundaries[row], values[positions], side='left')
+    codes[np.isnan(values)] = -1
+    data['consumption_tier'] = pd.Categorical.from_codes(codes, categories=labels, ordered=True)
+    logger.info(f"Consumption tiers categorized: {labels}")
     return data
@@ -0,0 +1,265 @@
+"""
+Module: forecasting.py
+Author: Satej
+Description:
+This script implements time-series forecasting of household energy usage.
+It builds lag, rolling-mean and rolling-max features per household in vectorized passes over
+the sorted data, validates models with walk-forward splits so no future readings leak into
+training, and produces multi-step forecasts with one model per horizon.
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error, mean_squared_error
+from data_preprocessing import ensure_datetime
+
+def _group_positions(groups: np.ndarray) -> tuple:
+    """
+    Returns each row's position within its group and the size of its group, for rows
+    already sorted so that every group is contiguous.
+    """
+    n = len(groups)
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]]) if n else np.array([], dtype=np.int64)
+    sizes = np.diff(np.r_[starts, n])
+    positions = np.arange(n) - np.repeat(starts, sizes)
+    return positions, np.repeat(sizes, sizes)
+
+def grouped_shift(values: np.ndarray, positions: np.ndarray, sizes: np.ndarray, periods: int) -> np.ndarray:
+    """
+    Shifts values within contiguous groups; positive periods look back, negative look ahead.
+    """
+    shifted = np.full(len(values), np.nan)
+    if periods > 0:
+        shifted[periods:] = values[:-periods]
+        shifted[positions < periods] = np.nan
+    elif periods < 0:
+        ahead = -periods
+        shifted[:-ahead] = values[ahead:]
+        shifted[sizes - 1 - positions < ahead] = np.nan
+    else:
+        shifted[:] = values
+    return shifted
+
+def grouped_rolling_mean(values: np.ndarray, positions: np.ndarray, window: int) -> np.ndarray:
+    """
+    Trailing rolling mean within contiguous groups in O(n) using cumulative sums.
+    Missing values are skipped; windows are truncated at the start of each group.
+    """
+    valid = ~np.isnan(values)
+    sums = np.r_[0.0, np.cumsum(np.where(valid, values, 0.0))]
+    counts = np.r_[0, np.cumsum(valid)]
+    index = np.arange(len(values))
+    left = index - np.minimum(positions, window - 1)
+    window_counts = counts[index + 1] - counts[left]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(window_counts > 0, (sums[index + 1] - sums[left]) / window_counts, np.nan)
+
+def grouped_rolling_max(values: np.ndarray, positions: np.ndarray, window: int) -> np.ndarray:
+    """
+    Trailing rolling max within contiguous groups in O(n) (van Herk/Gil-Werman).
+
+    Each group is cut into blocks of `window` rows. A window ending at row i covers the
+    tail of one block and the head of the next, so its max is the larger of a suffix max
+    and a prefix max, both computed with one grouped cumulative max per direction.
+    Missing values are skipped, as in grouped_rolling_mean: they enter the cumulative
+    maxima as -inf, and only windows without any reading come out as NaN.
+    """
+    segments = np.cumsum(positions % window == 0)
+    series = pd.Series(np.where(np.isnan(values), -np.inf, values))
+    prefix = series.groupby(segments).cummax().to_numpy()
+    suffix = series[::-1].groupby(segments[::-1]).cummax().to_numpy()[::-1]
+    index = np.arange(len(values))
+    left = index - np.minimum(positions, window - 1)
+    same_block = segments[left] == segments
+    maxima = np.where(same_block, prefix, np.maximum(suffix[left], prefix))
+    return np.where(np.isneginf(maxima), np.nan, maxima)
+
+def build_forecast_features(data: pd.DataFrame, group_column: str, timestamp_column: str, usage_column: str,
+                            lags: tuple = (1, 24, 168), windows: tuple = (24, 168),
+                            exogenous: tuple = ('temperature', 'hour', 'day_of_week')) -> tuple:
+    """
+    Builds lag, rolling-mean and rolling-max features per household.
+
+    Rows are sorted by household and time once; every feature is then computed for all
+    households together with numpy passes that respect group boundaries. Lags and windows
+    are counted in readings, so the data is assumed to be regularly sampled (e.g. hourly).
+    Rolling features cover the readings before the current one, so no feature uses the
+    value being predicted.
+
+    Args:
+        data (pd.DataFrame): Input DataFrame with household, timestamp and usage columns.
+        group_column (str): Column identifying households.
+        timestamp_column (str): Column containing timestamp values.
+        usage_column (str): Column containing energy usage values.
+        lags (tuple): Lags, in readings, to add as features.
+        windows (tuple): Rolling window sizes, in readings.
+        exogenous (tuple): Existing columns to include as features when present.
+
+    Returns:
+        tuple: Feature DataFrame sorted by household and time, and the list of feature names.
+
+    Example Usage:
+        frame, features = build_forecast_features(data, 'household_id', 'timestamp', 'energy_usage')
+    """
+    frame = data.assign(**{timestamp_column: ensure_datetime(data[timestamp_column])})
+    frame = frame.sort_values([group_column, timestamp_column], kind='stable').reset_index(drop=True)
+    groups, _ = pd.factorize(frame[group_column])
+    positions, sizes = _group_positions(groups)
+    values = frame[usage_column].to_numpy(dtype=np.float64)
+
+    features = {}
+    for lag in lags:
+        features[f'lag_{lag}'] = grouped_shift(values, positions, sizes, lag)
+    for window in windows:
+        # Shift by one reading so the window ends just before the current row
+        features[f'rolling_mean_{window}'] = grouped_shift(
+            grouped_rolling_mean(values, positions, window), positions, sizes, 1)
+        features[f'rolling_max_{window}'] = grouped_shift(
+            grouped_rolling_max(values, positions, window), positions, sizes, 1)
+    frame = frame.assign(**features)
+    feature_names = list(features) + [column for column in exogenous if column in frame.columns]
+    print(f"Forecast features created: {feature_names}")
+    return frame, feature_names
+
+def add_horizon_targets(frame: pd.DataFrame, group_column: str, usage_column: str, horizons: tuple = (1, 24)) -> list:
+    """
+    Adds one target column per forecast horizon: the usage `h` readings ahead.
+
+    Args:
+        frame (pd.DataFrame): Feature DataFrame from build_forecast_features; modified in place.
+        group_column (str): Column identifying households.
+        usage_column (str): Column containing energy usage values.
+        horizons (tuple): Forecast horizons, in readings.
+
+    Returns:
+        list: Names of the target columns.
+    """
+    groups, _ = pd.factorize(frame[group_column])
+    positions, sizes = _group_positions(groups)
+    values = frame[usage_column].to_numpy(dtype=np.float64)
+    targets = []
+    for horizon in horizons:
+        frame[f'target_h{horizon}'] = grouped_shift(values, positions, sizes, -horizon)
+        targets.append(f'target_h{horizon}')
+    return targets
+
+def walk_forward_validate(frame: pd.DataFrame, features: list, targets: list, group_column: str,
+                          timestamp_column: str, n_splits: int = 5, model_factory=LinearRegression) -> pd.DataFrame:
+    """
+    Evaluates one model per horizon with expanding-window walk-forward validation.
+
+    The time range is cut into n_splits + 1 equal periods; fold k trains on everything
+    before period k and tests on period k. Training rows whose target lies in or after
+    period k are dropped as well, so no test-period reading is used for training.
+
+    Args:
+        frame (pd.DataFrame): Feature DataFrame with target columns.
+        features (list): Feature column names.
+        targets (list): Target column names, one per horizon.
+        group_column (str): Column identifying households.
+        timestamp_column (str): Column containing timestamp values.
+        n_splits (int): Number of walk-forward folds.
+        model_factory (Callable): Zero-argument callable returning an unfitted estimator.
+
+    Returns:
+        pd.DataFrame: MAE and RMSE per horizon and fold.
+    """
+    timestamps = frame[timestamp_column]
+    edges = pd.date_range(timestamps.min(), timestamps.max(), periods=n_splits + 2)
+    groups, _ = pd.factorize(frame[group_column])
+    positions, sizes = _group_positions(groups)
+    epochs = timestamps.to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(np.float64)
+    results = []
+    for target in targets:
+        usable = frame[features + [target]].notna().all(axis=1)
+        horizon = int(target.rsplit('_h', 1)[1])
+        target_times = pd.Series(pd.to_datetime(grouped_shift(epochs, positions, sizes, -horizon)), index=frame.index)
+        for fold in range(1, n_splits + 1):
+            train = usable & (target_times < edges[fold])
+            test = usable & (timestamps >= edges[fold]) & (timestamps < edges[fold + 1])
+            if fold == n_splits:
+                test |= usable & (timestamps == edges[-1])
+            if train.sum() == 0 or test.sum() == 0:
+                continue
+            model = model_factory().fit(frame.loc[train, features], frame.loc[train, target])
+            predictions = model.predict(frame.loc[test, features])
+            results.append({
+                'target': target,
+                'fold': fold,
+                'train_rows': int(train.sum()),
+                'test_rows': int(test.sum()),
+                'mae': mean_absolute_error(frame.loc[test, target], predictions),
+                'rmse': float(np.sqrt(mean_squared_error(frame.loc[test, target], predictions))),
+            })
+    metrics = pd.DataFrame(results)
+    if len(metrics):
+        print("Walk-forward validation:\n", metrics.groupby('target')[['mae', 'rmse']].mean())
+    return metrics
+
+def train_forecast_models(frame: pd.DataFrame, features: list, targets: list, model_factory=LinearRegression) -> dict:
+    """
+    Fits one model per horizon on all rows with complete features and target.
+
+    Args:
+        frame (pd.DataFrame): Feature DataFrame with target columns.
+        features (list): Feature column names.
+        targets (list): Target column names, one per horizon.
+        model_factory (Callable): Zero-argument callable returning an unfitted estimator.
+
+    Returns:
+        dict: Fitted model per target column.
+    """
+    models = {}
+    for target in targets:
+        usable = frame[features + [target]].notna().all(axis=1)
+        models[target] = model_factory().fit(frame.loc[usable, features], frame.loc[usable, target])
+    return models
+
+def forecast(models: dict, frame: pd.DataFrame, features: list, group_column: str, timestamp_column: str) -> pd.DataFrame:
+    """
+    Forecasts every horizon from the latest reading of each household.
+
+    Args:
+        models (dict): Models per target column from train_forecast_models.
+        frame (pd.DataFrame): Feature DataFrame sorted by household and time.
+        features (list): Feature column names.
+        group_column (str): Column identifying households.
+        timestamp_column (str): Column containing timestamp values.
+
+    Returns:
+        pd.DataFrame: One row per household with its last timestamp and a prediction
+        column per horizon.
+    """
+    latest = frame.groupby(group_column, observed=True, sort=False).tail(1)
+    latest = latest[latest[features].notna().all(axis=1)]
+    result = latest[[group_column, timestamp_column]].reset_index(drop=True)
+    for target, model in models.items():
+        result[target.replace('target_', 'forecast_')] = model.predict(latest[features])
+    return result
+
+def run_forecasting(data: pd.DataFrame, group_column: str = 'household_id', timestamp_column: str = 'timestamp',
+                    usage_column: str = 'energy_usage', horizons: tuple = (1, 24), n_splits: int = 5) -> tuple:
+    """
+    Builds features, validates with walk-forward splits, trains and forecasts in one call.
+
+    Args:
+        data (pd.DataFrame): Preprocessed DataFrame with household, timestamp and usage columns.
+        group_column (str): Column identifying households.
+        timestamp_column (str): Column containing timestamp values.
+        usage_column (str): Column containing energy usage values.
+        horizons (tuple): Forecast horizons, in readings.
+        n_splits (int): Number of walk-forward folds.
+
+    Returns:
+        tuple: Models per horizon, walk-forward metrics and the latest forecasts.
+
+    Example Usage:
+        models, metrics, forecasts = run_forecasting(processed_data, horizons=(1, 24))
+    """
+    frame, features = build_forecast_features(data, group_column, timestamp_column, usage_column)
+    targets = add_horizon_targets(frame, group_column, usage_column, horizons)
+    metrics = walk_forward_validate(frame, features, targets, group_column, timestamp_column, n_splits)
+    models = train_forecast_models(frame, features, targets)
+    forecasts = forecast(models, frame, features, group_column, timestamp_column)
+    return models, metrics, forecasts
@@ -0,0 +1,315 @@
+"""
+Module: instrumentation.py
+Author: Satej
+Description:
+This script instruments the pipeline stages with structured metrics.
+Decorated stages record their duration, input and output row counts, throughput and memory
+high-water mark. Records are kept as in-memory aggregates and can be appended to a JSON lines
+file or exposed in the Prometheus text format. Stages can optionally be profiled with cProfile.
+Stages returning a chunk iterator are also measured while the chunks are consumed.
+Progress messages of the pipeline modules go through the standard logging module, and every
+stage record is also logged at DEBUG level; configure_logging sets up the handlers.
+"""
+
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime
+
+_settings = {'jsonl_path': None, 'profile_dir': None, 'profile_stages': None, 'trace_memory': False}
+_aggregates = {}
+_lock = threading.Lock()
+_local = threading.local()
+logger = logging.getLogger(__name__)
+
+def configure_instrumentation(jsonl_path: str = None, profile_dir: str = None, profile_stages: list = None,
+                              trace_memory: bool = False):
+    """
+    Configures where stage metrics go and which optional collectors are enabled.
+
+    Args:
+        jsonl_path (str): Optional JSON lines file that every stage record is appended to.
+        profile_dir (str): Optional directory for cProfile output. When set, profiled stages
+            write a .prof file per run, readable with pstats or snakeviz.
+        profile_stages (list): Stage names to profile; all stages when None.
+        trace_memory (bool): Whether to measure per-stage peak allocations with tracemalloc.
+            This is precise but slows stages down noticeably, so it is off by default and
+            only the process memory high-water mark is recorded.
+
+    Example Usage:
+        configure_instrumentation(jsonl_path="C:/Users/Satej/Data/metrics.jsonl")
+    """
+    _settings.update(jsonl_path=jsonl_path, profile_dir=profile_dir,
+                     profile_stages=set(profile_stages) if profile_stages else None, trace_memory=trace_memory)
+    if profile_dir is not None:
+        os.makedirs(profile_dir, exist_ok=True)
+    if trace_memory:
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+def configure_logging(level: str = 'INFO', log_path: str = None):
+    """
+    Sends the progress messages of the pipeline modules to the console and, optionally, a file.
+
+    Args:
+        level (str): Logging level; 'DEBUG' also logs every stage record.
+        log_path (str): Optional file that the messages are appended to as well.
+
+    Example Usage:
+        configure_logging(log_path="C:/Users/Satej/Data/pipeline.log")
+    """
+    handlers = [logging.StreamHandler()]
+    if log_path is not None:
+        handlers.append(logging.FileHandler(log_path))
+    logging.basicConfig(level=level, format='%(asctime)s %(levelname)s %(name)s: %(message)s', handlers=handlers)
+
+def _max_rss_bytes() -> int:
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+def _count_rows(value):
+    import pandas as pd
+
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    return len(value) if isinstance(value, (pd.DataFrame, pd.Series)) else None
+
+def _emit(record: dict):
+    with _lock:
+        aggregate = _aggregates.setdefault(record['stage'], {'calls': 0, 'errors': 0, 'seconds': 0.0,
+                                                             'rows': 0, 'max_rss_bytes': 0})
+        aggregate['calls'] += 1
+        aggregate['errors'] += record['status'] == 'error'
+        aggregate['seconds'] += record['seconds']
+        aggregate['rows'] += record['rows_in'] or 0
+        aggregate['max_rss_bytes'] = max(aggregate['max_rss_bytes'], record['max_rss_bytes'] or 0)
+        if _settings['jsonl_path'] is not None:
+            with open(_settings['jsonl_path'], 'a') as jsonl_file:
+                jsonl_file.write(json.dumps(record, default=str) + '\n')
+    logger.debug("Stage %s %s in %.3fs (%s rows in)", record['stage'], record['status'], record['seconds'],
+                  record['rows_in'])
+
+@contextmanager
+def track_stage(stage: str, rows_in: int = None):
+    """
+    Measures a block of code as a pipeline stage.
+
+    The yielded dict can be used to report the output row count ('rows_out') or any
+    extra fields, which are included in the record.
+
+    Args:
+        stage (str): Stage name.
+        rows_in (int): Optional number of input rows, used for the throughput.
+
+    Example Usage:
+        with track_stage('export', rows_in=len(data)) as record:
+            export_dashboard_data(data, path)
+            record['rows_out'] = len(data)
+    """
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    parent = stack[-1] if stack else None
+    record = {'stage': stage, 'parent': parent['stage'] if parent else None, 'rows_in': rows_in, 'rows_out': None}
+    frame = {'stage': stage, 'peak': 0, 'profiling': bool(parent and parent['profiling'])}
+    profiler = None
+    # Only one profiler can be active per thread, so nested stages share their parent's profile
+    if (_settings['profile_dir'] is not None and not frame['profiling']
+            and (_settings['profile_stages'] is None or stage in _settings['profile_stages'])):
+        import cProfile
+        profiler = cProfile.Profile()
+        frame['profiling'] = True
+    if _settings['trace_memory']:
+        import tracemalloc
+        # Keep the parent's peak so far before resetting the counter for this stage
+        if parent is not None:
+            parent['peak'] = max(parent['peak'], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+    stack.append(frame)
+    started_at = datetime.now()
+    start_time = time.perf_counter()
+    status = 'ok'
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield record
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        seconds = time.perf_counter() - start_time
+        stack.pop()
+        record.update(status=status, started_at=started_at.isoformat(), seconds=seconds,
+                      max_rss_bytes=_max_rss_bytes())
+        record['rows_per_second'] = record['rows_in'] / seconds if record['rows_in'] and seconds > 0 else None
+        if _settings['trace_memory']:
+            import tracemalloc
+            record['peak_traced_bytes'] = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+            if parent is not None:
+                parent['peak'] = max(parent['peak'], record['peak_traced_bytes'])
+        if profiler is not None:
+            profile_path = os.path.join(_settings['profile_dir'], f"{stage}-{started_at:%Y%m%dT%H%M%S%f}.prof")
+            profiler.dump_stats(profile_path)
+            record['profile_path'] = profile_path
+        _emit(record)
+
+def instrument_chunks(chunks, stage: str):
+    """
+    Records the consumption of a chunk stream as one stage run.
+
+    Only the time spent producing chunks counts, not the time the consumer spends on
+    them between chunks. The record is emitted once the stream is exhausted, fails or
+    is closed early, with the number of chunks in 'chunks'.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): Chunk stream to measure.
+        stage (str): Stage name.
+
+    Yields:
+        pd.DataFrame: The chunks, unchanged.
+
+    Example Usage:
+        for chunk in instrument_chunks(pd.read_csv(path, chunksize=1_000_000), 'read_csv.chunks'):
+            ...
+    """
+    record = {'stage': stage, 'parent': None, 'rows_in': 0, 'rows_out': 0, 'chunks': 0}
+    started_at = datetime.now()
+    seconds = 0.0
+    status = 'ok'
+    iterator = iter(chunks)
+    try:
+        while True:
+            start_time = time.perf_counter()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                seconds += time.perf_counter() - start_time
+            rows = _count_rows(chunk) or 0
+            record['chunks'] += 1
+            record['rows_in'] += rows
+            record['rows_out'] += rows
+            yield chunk
+    except GeneratorExit:
+        raise  # The consumer stopped early; what was read so far is still recorded
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        record.update(status=status, started_at=started_at.isoformat(), seconds=seconds,
+                      max_rss_bytes=_max_rss_bytes())
+        record['rows_per_second'] = record['rows_in'] / seconds if record['rows_in'] and seconds > 0 else None
+        _emit(record)
+
+def instrumented(stage: str = None):
+    """
+    Decorator that records every call of a function as a pipeline stage.
+
+    Input rows are taken from the first DataFrame argument and output rows from the
+    returned DataFrame (or the first element of a returned tuple). When the function
+    returns a chunk iterator, the call only covers creating it, so the iteration is
+    recorded separately as the stage '<stage>.chunks' through instrument_chunks.
+
+    Args:
+        stage (str): Stage name; defaults to the function name.
+
+    Example Usage:
+        @instrumented()
+        def preprocess_energy_data(data):
+            ...
+    """
+    def decorator(function):
+        name = stage or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            rows_in = next((rows for rows in map(_count_rows, args) if rows is not None), None)
+            with track_stage(name, rows_in) as record:
+                result = function(*args, **kwargs)
+                record['rows_out'] = _count_rows(result)
+            if isinstance(result, Iterator):
+                return instrument_chunks(result, f"{name}.chunks")
+            return result
+        return wrapper
+    return decorator
+
+def stage_summary() -> dict:
+    """
+    Returns the aggregated metrics per stage since the process started.
+
+    Returns:
+        dict: For each stage, 'calls', 'errors', 'seconds', 'rows' and 'max_rss_bytes'.
+    """
+    with _lock:
+        return {stage: dict(aggregate) for stage, aggregate in _aggregates.items()}
+
+def prometheus_text() -> str:
+    """
+    Renders the aggregated stage metrics in the Prometheus text exposition format.
+
+    Returns:
+        str: Metrics text.
+    """
+    metrics = [
+        ('energy_stage_calls_total', 'counter', 'Number of stage runs.', 'calls'),
+        ('energy_stage_errors_total', 'counter', 'Number of failed stage runs.', 'errors'),
+        ('energy_stage_seconds_total', 'counter', 'Total time spent in the stage.', 'seconds'),
+        ('energy_stage_rows_total', 'counter', 'Total input rows processed by the stage.', 'rows'),
+        ('energy_stage_max_rss_bytes', 'gauge', 'Process memory high-water mark after the stage.', 'max_rss_bytes'),
+    ]
+    summary = stage_summary()
+    lines = []
+    for metric, kind, description, field in metrics:
+        lines.append(f"# HELP {metric} {description}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for stage, aggregate in sorted(summary.items()):
+            lines.append(f'{metric}{{stage="{stage}"}} {aggregate[field]}')
+    return '\n'.join(lines) + '\n'
+
+def serve_prometheus(host: str = '127.0.0.1', port: int = 9108):
+    """
+    Serves the stage metrics on /metrics for Prometheus to scrape.
+
+    Args:
+        host (str): Interface to bind.
+        port (int): Port to listen on.
+
+    Returns:
+        ThreadingHTTPServer: The running server; call shutdown() to stop it.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != '/metrics':
+                self.send_response(404)
+                self.end_headers()
+                return
+            payload = prometheus_text().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Stage metrics served on http://{host}:{port}/metrics")
+    return server
@@ -6,50 +6,215 @@ This script orchestrates the entire energy analytics project. It connects all mo
 manages the workflow, and ensures data flows seamlessly through each stage.
 """
 
+import logging
+import numpy as np
+import pandas as pd
+
 from data_collection import load_energy_data
-from data_preprocessing import preprocess_energy_data
+from data_preprocessing import preprocess_energy_data, preprocess_energy_data_chunked
 from eda import summarize_data, plot_energy_usage_trends, plot_peak_hours
-from feature_engineering import create_time_features, calculate_daily_consumption, categorize_consumption
+from feature_engineering import (create_time_features, calculate_daily_consumption, categorize_consumption,
+                                 create_time_features_chunked, consumption_partial, merge_consumption_partials,
+                                 finalize_consumption, update_consumption_sketches, consumption_tier_edges,
+                                 save_tier_edges)
 from predictive_modeling import train_regression_model, train_classification_model
-from visualization_dashboard import export_dashboard_data, generate_usage_summary, plot_usage_summary
+from pipeline_cache import fingerprint_file, run_cached_stage
+from forecasting import run_forecasting
+from model_serving import save_model_artifact
+from rendering import configure_rendering, wait_for_renders
+from instrumentation import configure_instrumentation, configure_logging
+from pipeline_executor import pipeline_stage, run_pipeline
+from visualization_dashboard import (export_dashboard_data, plot_usage_summary, usage_summary_partial,
+                                     compute_rollup, summarize_rollup, write_rollup)
+
+logger = logging.getLogger(__name__)
 
-def main():
+def sample_chunk(sample: pd.DataFrame, chunk: pd.DataFrame, sample_size: int, rng: np.random.Generator) -> pd.DataFrame:
     """
-    Main function to execute the energy analytics project workflow.
+    Folds a chunk into a fixed-size uniform random sample (bottom-k reservoir sampling).
+
+    Every row gets a random key and only the sample_size rows with the smallest keys
+    are kept, so the sample is uniform over all rows seen and never grows past
+    sample_size rows.
     """
-    # Step 1: Load raw energy data
-    data_file_path = "C:/Users/Satej/Data/energy_data.csv"
-    print("Loading energy usage data...")
-    raw_data = load_energy_data(data_file_path)
-    
-    # Step 2: Preprocess the data
-    print("Preprocessing energy usage data...")
-    processed_data = preprocess_energy_data(raw_data)
-    
-    # Step 3: Perform Exploratory Data Analysis (EDA)
-    print("Performing exploratory data analysis...")
-    summarize_data(processed_data)
-    plot_energy_usage_trends(processed_data, 'timestamp', 'energy_usage')
-    plot_peak_hours(processed_data, 'timestamp', 'energy_usage')
-    
-    # Step 4: Feature Engineering
-    print("Engineering features...")
-    processed_data = create_time_features(processed_data, 'timestamp')
-    daily_data = calculate_daily_consumption(processed_data, 'timestamp', 'energy_usage')
-    categorized_data = categorize_consumption(processed_data, 'energy_usage', [0, 50, 150, 500], ['Low', 'Medium', 'High'])
-    
-    # Step 5: Train Predictive Models
-    print("Training predictive models...")
-    regression_model, mse = train_regression_model(processed_data, ['hour', 'temperature'], 'energy_usage')
-    classification_model, report = train_classification_model(processed_data, ['hour', 'temperature'], 'high_usage_flag')
-    
-    # Step 6: Prepare Data for Visualization
-    print("Preparing data for visualization...")
-    usage_summary = generate_usage_summary(processed_data, 'appliance', 'energy_usage')
+    keyed = chunk.assign(_sample_key=rng.random(len(chunk)))
+    combined = keyed if sample is None else pd.concat([sample, keyed], ignore_index=True)
+    return combined.nsmallest(sample_size, '_sample_key')
+
+def run_streaming_pipeline(data_file_path: str, chunksize: int, sample_size: int = 1_000_000):
+    """
+    Runs the workflow in bounded memory by streaming the input in chunks.
+
+    Aggregates (daily consumption, usage summary) are merged from per-chunk partial
+    results in a single pass over the preprocessed data. EDA and model training run
+    on a uniform random sample of at most sample_size rows, so peak memory depends on
+    chunksize and sample_size, not on the file size.
+
+    Args:
+        data_file_path (str): Path to the raw energy data CSV file.
+        chunksize (int): Number of rows per chunk.
+        sample_size (int): Maximum number of rows kept for EDA and model training.
+    """
+    logger.info(f"Streaming energy usage data in chunks of {chunksize} rows...")
+    def chunk_source():
+        return load_energy_data(data_file_path, chunksize=chunksize)
+
+    processed_chunks = create_time_features_chunked(preprocess_energy_data_chunked(chunk_source), 'timestamp')
+
+    rng = np.random.default_rng(42)
+    daily_partial = None
+    usage_totals = pd.Series(dtype='float64')
+    usage_sketches = None
+    sample = None
+    for chunk in processed_chunks:
+        daily_partial = merge_consumption_partials(daily_partial, consumption_partial(chunk, 'timestamp', 'energy_usage'))
+        usage_totals = usage_totals.add(usage_summary_partial(chunk, 'appliance', 'energy_usage'), fill_value=0)
+        usage_sketches = update_consumption_sketches(usage_sketches, chunk, 'energy_usage')
+        sample = sample_chunk(sample, chunk, sample_size, rng)
+    sample = sample.drop(columns=['_sample_key']).reset_index(drop=True)
+    daily_data = finalize_consumption(daily_partial).rename(columns={'period': 'date', 'total_usage': 'daily_consumption'})
+    usage_summary = usage_totals.rename('total_usage').rename_axis('appliance').reset_index()
+
+    logger.info("Performing exploratory data analysis on sampled data...")
+    summarize_data(sample)
+    plot_energy_usage_trends(daily_data, 'date', 'daily_consumption')
+    plot_peak_hours(sample, 'timestamp', 'energy_usage')
+
+    # Tier boundaries come from the sketches over all chunks, not just the sample
+    sample = categorize_consumption(sample, 'energy_usage', labels=['Low', 'Medium', 'High'],
+                                    edges=consumption_tier_edges(usage_sketches, tiers=3))
+
+    logger.info("Training predictive models on sampled data...")
+    regression_model, mse = train_regression_model(sample, ['hour', 'temperature'], 'energy_usage', 'timestamp')
+    classification_model, report = train_classification_model(sample, ['hour', 'temperature'], 'high_usage_flag')
+
+    logger.info("Preparing data for visualization...")
     export_dashboard_data(usage_summary, "C:/Users/Satej/Data/dashboard_data.csv")
     plot_usage_summary(usage_summary, 'appliance', 'total_usage')
-    
-    print("Energy analytics project workflow completed successfully.")
+
+    logger.info("Energy analytics project workflow completed successfully.")
+
+def main(chunksize: int = None, cache_dir: str = None, plot_dir: str = None,
+         data_file_path: str = "C:/Users/Satej/Data/energy_data.csv", metrics_path: str = None,
+         max_workers: int = None, rollup_dir: str = "C:/Users/Satej/Data/rollups"):
+    """
+    Main function to execute the energy analytics project workflow.
+
+    Args:
+        chunksize (int): Optional chunk size. When set, the input is streamed through
+            run_streaming_pipeline instead of being loaded in one piece.
+        cache_dir (str): Optional stage cache directory. When set, preprocessing, feature
+            engineering, daily consumption and model training are memoized on disk, keyed
+            by the input fingerprint, the stage parameters and the code version.
+        plot_dir (str): Optional directory for headless runs. When set, plots are saved
+            there by a background worker instead of blocking on plt.show().
+        data_file_path (str): Path to the raw energy data, e.g. a file written by
+            synthetic_data.write_synthetic_csv.
+        metrics_path (str): Optional JSON lines file that per-stage timing, throughput and
+            memory records are appended to.
+        max_workers (int): Number of threads running independent stages concurrently;
+            defaults to the CPU count. Stages are scheduled by pipeline_executor from the
+            values they read and produce, and a failed stage only skips its dependents.
+        rollup_dir (str): Directory of the dashboard rollup extracts. The dates in the input
+            are recomputed and replaced there, and the consumption tier boundaries are saved
+            next to them; dashboard_automation.update_data_source keeps the same extracts
+            current between full runs, tiering new readings with those boundaries.
+    """
+    # Step 1: Load raw energy data
+    configure_logging()
+    if metrics_path is not None:
+        configure_instrumentation(jsonl_path=metrics_path)
+    if plot_dir is not None:
+        configure_rendering(plot_dir)
+    if chunksize is not None:
+        run_streaming_pipeline(data_file_path, chunksize)
+        wait_for_renders()
+        return
+
+    def cached(name, upstream_key, compute, functions, params=None):
+        if cache_dir is None:
+            return compute(), None
+        return run_cached_stage(cache_dir, name, upstream_key, compute, functions, params)
+
+    input_key = fingerprint_file(data_file_path) if cache_dir is not None else None
+    features = ['hour', 'temperature']
+    # Interactive plt.show() windows must be opened from the main thread
+    interactive = plot_dir is None
+
+    logger.info("Running the energy analytics workflow...")
+    stages = [
+        # Step 2: Preprocess the data
+        pipeline_stage('preprocess', lambda: cached(
+            'preprocess', input_key, lambda: preprocess_energy_data(load_energy_data(data_file_path)),
+            (load_energy_data, preprocess_energy_data)), outputs=('processed_data', 'preprocess_key')),
+
+        # Step 3: Feature Engineering
+        pipeline_stage('time_features', lambda data, key: cached(
+            'time_features', key, lambda: create_time_features(data, 'timestamp'),
+            (create_time_features,), {'timestamp_column': 'timestamp'}),
+            inputs=('processed_data', 'preprocess_key'), outputs=('features_data', 'features_key')),
+        pipeline_stage('daily_consumption', lambda data, key: cached(
+            'daily_consumption', key, lambda: calculate_daily_consumption(data, 'timestamp', 'energy_usage'),
+            (calculate_daily_consumption,), {'timestamp_column': 'timestamp', 'usage_column': 'energy_usage'})[0],
+            inputs=('features_data', 'features_key'), outputs=('daily_data',)),
+        pipeline_stage('tier_edges', lambda data: consumption_tier_edges(
+            update_consumption_sketches(None, data, 'energy_usage'), tiers=3),
+            inputs=('features_data',), outputs=('tier_edges',)),
+        # A shallow copy keeps the shared frame unchanged for the stages reading it concurrently
+        pipeline_stage('categorize', lambda data, edges: categorize_consumption(
+            data.copy(deep=False), 'energy_usage', labels=['Low', 'Medium', 'High'], edges=edges),
+            inputs=('features_data', 'tier_edges'), outputs=('categorized_data',)),
+
+        # Step 4: Perform Exploratory Data Analysis (EDA) on the parsed, read-only frame
+        pipeline_stage('summarize', summarize_data, inputs=('features_data',)),
+        pipeline_stage('plot_trends', lambda data: plot_energy_usage_trends(data, 'timestamp', 'energy_usage'),
+                       inputs=('features_data',), main_thread=interactive),
+        pipeline_stage('plot_peak_hours', lambda data: plot_peak_hours(data, 'timestamp', 'energy_usage'),
+                       inputs=('features_data',), main_thread=interactive),
+
+        # Step 5: Train Predictive Models
+        pipeline_stage('regression_model', lambda data, key: cached(
+            'regression_model', key, lambda: train_regression_model(data, features, 'energy_usage', 'timestamp'),
+            (train_regression_model,), {'features': features, 'target': 'energy_usage',
+                                        'time_column': 'timestamp'})[0],
+            inputs=('features_data', 'features_key'), outputs=('regression_model', 'mse')),
+        # The random forest trains with n_jobs=-1, so it reserves the whole CPU budget
+        pipeline_stage('classification_model', lambda data, key: cached(
+            'classification_model', key, lambda: train_classification_model(data, features, 'high_usage_flag'),
+            (train_classification_model,), {'features': features, 'target': 'high_usage_flag'})[0],
+            inputs=('features_data', 'features_key'), outputs=('classification_model', 'report'), cpu=None),
+        pipeline_stage('save_regression_model', lambda model, mse: save_model_artifact(
+            model, "C:/Users/Satej/Data/models/regression", features, 'energy_usage', 'regression', {'mse': mse}),
+            inputs=('regression_model', 'mse')),
+        pipeline_stage('save_classification_model', lambda model: save_model_artifact(
+            model, "C:/Users/Satej/Data/models/classification", features, 'high_usage_flag', 'classification'),
+            inputs=('classification_model',)),
+        pipeline_stage('forecasting', lambda data: run_forecasting(data, horizons=(1, 24))
+                       if 'household_id' in data.columns else None,
+                       inputs=('features_data',), outputs=('forecasts',)),
+
+        # Step 6: Prepare Data for Visualization
+        pipeline_stage('rollup', lambda data: compute_rollup(data, 'energy_usage', 'timestamp'),
+                       inputs=('categorized_data',), outputs=('rollup_cube',)),
+        pipeline_stage('export_rollup', lambda cube: write_rollup(rollup_dir, cube, replace=True),
+                       inputs=('rollup_cube',)),
+        # Incremental updates tier new readings with the boundaries of this run
+        pipeline_stage('export_tier_edges', lambda edges: save_tier_edges(rollup_dir, edges),
+                       inputs=('tier_edges',)),
+        pipeline_stage('usage_summary', lambda cube: summarize_rollup(cube, ['appliance']),
+                       inputs=('rollup_cube',), outputs=('usage_summary',)),
+        pipeline_stage('export_usage_summary', lambda summary: export_dashboard_data(
+            summary, "C:/Users/Satej/Data/dashboard_data.csv"), inputs=('usage_summary',)),
+        pipeline_stage('plot_usage_summary', lambda summary: plot_usage_summary(summary, 'appliance', 'total_usage'),
+                       inputs=('usage_summary',), main_thread=interactive),
+    ]
+    values, report = run_pipeline(stages, max_workers=max_workers)
+    wait_for_renders()
+
+    failed = [name for name, result in report['stages'].items() if result['status'] != 'done']
+    if failed:
+        raise RuntimeError(f"Energy analytics workflow finished with failed or skipped stages: {failed}")
+    logger.info("Energy analytics project workflow completed successfully.")
 
 # Run the main function
 if __name__ == "__main__":
@@ -0,0 +1,319 @@
+"""
+Module: model_serving.py
+Author: Satej
+Description:
+This script persists trained models as artifacts and serves predictions from them.
+An artifact is a directory with the joblib-serialized model and a JSON metadata file listing
+its features. The scoring service loads each artifact once and keeps it warm, scores whole
+DataFrames or Parquet files in bulk, micro-batches single-reading requests for low latency,
+and tracks p50/p99 latency and throughput. It can also be exposed on a local HTTP endpoint.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from data_store import atomic_write
+
+def save_model_artifact(model, artifact_dir: str, features: list, target: str, kind: str, metrics: dict = None):
+    """
+    Saves a trained model and its metadata as an artifact directory.
+
+    Args:
+        model: Fitted scikit-learn estimator.
+        artifact_dir (str): Directory to write the artifact to; created if missing.
+        features (list): Feature column names, in the order the model expects.
+        target (str): Target column name.
+        kind (str): 'regression' or 'classification'.
+        metrics (dict): Optional evaluation metrics to record.
+
+    Example Usage:
+        save_model_artifact(model, "C:/Users/Satej/Data/models/regression", ['hour', 'temperature'],
+                            'energy_usage', 'regression', {'mse': mse})
+    """
+    import joblib
+    import sklearn
+
+    os.makedirs(artifact_dir, exist_ok=True)
+    atomic_write(os.path.join(artifact_dir, 'model.joblib'), lambda temp_path: joblib.dump(model, temp_path))
+    metadata = {
+        'features': list(features),
+        'target': target,
+        'kind': kind,
+        'metrics': metrics or {},
+        'sklearn_version': sklearn.__version__,
+        'created_at': datetime.now().isoformat(),
+    }
+    def write_metadata(temp_path):
+        with open(temp_path, 'w') as metadata_file:
+            json.dump(metadata, metadata_file, indent=2, default=str)
+    atomic_write(os.path.join(artifact_dir, 'metadata.json'), write_metadata)
+    print(f"Model artifact saved to {artifact_dir}.")
+
+def load_model_artifact(artifact_dir: str) -> tuple:
+    """
+    Loads a model artifact.
+
+    Args:
+        artifact_dir (str): Artifact directory written by save_model_artifact.
+
+    Returns:
+        tuple: The fitted model and its metadata dict.
+    """
+    import joblib
+
+    with open(os.path.join(artifact_dir, 'metadata.json')) as metadata_file:
+        metadata = json.load(metadata_file)
+    return joblib.load(os.path.join(artifact_dir, 'model.joblib')), metadata
+
+class ScoringService:
+    """
+    Keeps models warm in memory and scores readings in bulk or one at a time.
+
+    Single-reading requests are queued and a background thread groups them into micro
+    batches of up to max_batch_size readings, waiting at most max_wait_ms for a batch to
+    fill, so concurrent callers share one vectorized predict call.
+
+    Example Usage:
+        service = ScoringService({'regression': "C:/Users/Satej/Data/models/regression"})
+        usage = service.predict_one('regression', {'hour': 18, 'temperature': 21.5})
+        predictions = service.score_frame('regression', data)
+        print(service.metrics())
+        service.close()
+    """
+
+    def __init__(self, artifact_dirs: dict, max_batch_size: int = 256, max_wait_ms: float = 2.0,
+                 latency_window: int = 10_000):
+        self.models = {}
+        self.features = {}
+        for name, artifact_dir in artifact_dirs.items():
+            model, metadata = load_model_artifact(artifact_dir)
+            self.models[name] = model
+            self.features[name] = metadata['features']
+            # Warm-up call so the first real request does not pay for lazy initialisation
+            model.predict(pd.DataFrame([[0.0] * len(metadata['features'])], columns=metadata['features']))
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        # Whole-batch latencies are kept apart, so they never skew the single-request percentiles
+        self._latencies = {name: deque(maxlen=latency_window) for name in self.models}
+        self._bulk_latencies = {name: deque(maxlen=latency_window) for name in self.models}
+        self._rows = {name: 0 for name in self.models}
+        self._requests = {name: 0 for name in self.models}
+        self._bulk_requests = {name: 0 for name in self.models}
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._stopped = threading.Event()
+        self._worker = threading.Thread(target=self._run_batches, daemon=True)
+        self._worker.start()
+        print(f"Scoring service started with models: {list(self.models)}")
+
+    def _record(self, name: str, seconds: float, rows: int, bulk: bool = False):
+        with self._lock:
+            (self._bulk_latencies if bulk else self._latencies)[name].append(seconds)
+            (self._bulk_requests if bulk else self._requests)[name] += 1
+            self._rows[name] += rows
+
+    def _predict(self, name: str, data: pd.DataFrame) -> np.ndarray:
+        if name not in self.models:
+            raise KeyError(f"Unknown model '{name}'; available models: {list(self.models)}")
+        return self.models[name].predict(data[self.features[name]])
+
+    def score_frame(self, name: str, data: pd.DataFrame, batch_size: int = 100_000) -> np.ndarray:
+        """
+        Scores every row of a DataFrame in batches.
+
+        Args:
+            name (str): Model name.
+            data (pd.DataFrame): Rows containing the model's feature columns.
+            batch_size (int): Number of rows per predict call.
+
+        Returns:
+            np.ndarray: Predictions aligned with the rows of data.
+        """
+        start_time = time.perf_counter()
+        predictions = [self._predict(name, data.iloc[start:start + batch_size])
+                       for start in range(0, len(data), batch_size)]
+        result = np.concatenate(predictions) if predictions else np.array([])
+        self._record(name, time.perf_counter() - start_time, len(data), bulk=True)
+        return result
+
+    def score_parquet(self, name: str, file_path: str, batch_size: int = 100_000) -> np.ndarray:
+        """
+        Scores a Parquet file, reading only the model's feature columns batch by batch.
+
+        Args:
+            name (str): Model name.
+            file_path (str): Path to the Parquet file.
+            batch_size (int): Number of rows per batch.
+
+        Returns:
+            np.ndarray: Predictions for every row of the file.
+        """
+        import pyarrow.parquet as pq
+
+        start_time = time.perf_counter()
+        parquet_file = pq.ParquetFile(file_path)
+        predictions = [self._predict(name, batch.to_pandas())
+                       for batch in parquet_file.iter_batches(batch_size=batch_size, columns=self.features[name])]
+        result = np.concatenate(predictions) if predictions else np.array([])
+        self._record(name, time.perf_counter() - start_time, len(result), bulk=True)
+        return result
+
+    def predict_one(self, name: str, reading: dict, timeout: float = 5.0):
+        """
+        Predicts a single reading through the micro-batching queue.
+
+        Args:
+            name (str): Model name.
+            reading (dict): Feature values of one reading.
+            timeout (float): Seconds to wait for the prediction.
+
+        Returns:
+            The prediction for the reading.
+        """
+        if name not in self.models:
+            raise KeyError(f"Unknown model '{name}'; available models: {list(self.models)}")
+        future = Future()
+        self._queue.put((name, reading, time.perf_counter(), future))
+        return future.result(timeout=timeout)
+
+    def _run_batches(self):
+        while not self._stopped.is_set():
+            try:
+                first = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            batch = [first]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            by_model = {}
+            for request in batch:
+                by_model.setdefault(request[0], []).append(request)
+            for name, requests in by_model.items():
+                try:
+                    predictions = self._predict(name, pd.DataFrame([request[1] for request in requests]))
+                except Exception as e:
+                    for request in requests:
+                        request[3].set_exception(e)
+                    continue
+                finished = time.perf_counter()
+                for request, prediction in zip(requests, predictions):
+                    request[3].set_result(prediction.item() if hasattr(prediction, 'item') else prediction)
+                    self._record(name, finished - request[2], 1)
+
+    def metrics(self) -> dict:
+        """
+        Returns latency percentiles and throughput per model.
+
+        Returns:
+            dict: For each model, the single-reading 'requests', 'p50_ms' and 'p99_ms', the
+            same for bulk scoring calls as 'bulk_requests', 'bulk_p50_ms' and 'bulk_p99_ms',
+            and the 'rows' and 'rows_per_second' of both since the service started.
+        """
+        def percentile(latencies, q):
+            return float(np.percentile(np.array(latencies) * 1000.0, q)) if len(latencies) else None
+
+        elapsed = time.perf_counter() - self._started
+        with self._lock:
+            result = {}
+            for name in self.models:
+                result[name] = {
+                    'requests': self._requests[name],
+                    'rows': self._rows[name],
+                    'p50_ms': percentile(self._latencies[name], 50),
+                    'p99_ms': percentile(self._latencies[name], 99),
+                    'bulk_requests': self._bulk_requests[name],
+                    'bulk_p50_ms': percentile(self._bulk_latencies[name], 50),
+                    'bulk_p99_ms': percentile(self._bulk_latencies[name], 99),
+                    'rows_per_second': self._rows[name] / elapsed if elapsed > 0 else None,
+                }
+        return result
+
+    def close(self):
+        """
+        Stops the micro-batching thread.
+        """
+        self._stopped.set()
+        self._worker.join()
+
+def serve_http(service: ScoringService, host: str = '127.0.0.1', port: int = 8080):
+    """
+    Exposes a scoring service on a local HTTP endpoint.
+
+    POST /predict/<model> accepts a JSON object (one reading, answered through the micro
+    batcher) or a JSON list of objects (scored in bulk). An unknown model is answered with
+    404, a malformed body or a reading missing features with 400. GET /metrics returns the
+    latency and throughput counters.
+
+    Args:
+        service (ScoringService): Service holding the warm models.
+        host (str): Interface to bind.
+        port (int): Port to listen on.
+
+    Returns:
+        ThreadingHTTPServer: The running server; call shutdown() to stop it.
+
+    Example Usage:
+        server = serve_http(service, port=8080)
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class ScoringHandler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, body):
+            payload = json.dumps(body, default=float).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == '/metrics':
+                self._reply(200, service.metrics())
+            else:
+                self._reply(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if not self.path.startswith('/predict/'):
+                self._reply(404, {'error': 'not found'})
+                return
+            name = self.path[len('/predict/'):]
+            if name not in service.models:
+                self._reply(404, {'error': f"Unknown model '{name}'; available models: {list(service.models)}"})
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                if isinstance(body, list):
+                    result = service.score_frame(name, pd.DataFrame(body)).tolist()
+                elif isinstance(body, dict):
+                    result = service.predict_one(name, body)
+                else:
+                    raise ValueError("Expected a JSON object or a list of objects.")
+                self._reply(200, {'prediction': result})
+            except (KeyError, ValueError, TypeError) as e:
+                # Missing feature columns surface as KeyError, malformed JSON as ValueError
+                self._reply(400, {'error': str(e)})
+            except Exception as e:
+                self._reply(500, {'error': str(e)})
+
+        def log_message(self, format, *args):
+            pass  # Request logging would dominate the latency of single predictions
+
+    server = ThreadingHTTPServer((host, port), ScoringHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Scoring service listening on http://{host}:{port}")
+    return server
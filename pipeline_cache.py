@@ -0,0 +1,273 @@
+"""
+Module: pipeline_cache.py
+Author: Satej
+Description:
+This script provides a disk-backed, content-addressed cache for the pipeline stages in main.py.
+Each stage result is stored under a key built from its upstream key, its parameters and the
+source code of the functions it runs, so a change to the input, a parameter or the code only
+invalidates the stages downstream of it. DataFrames are stored as Parquet and other results
+(e.g. trained models) with joblib, and the least recently used entries are evicted once the
+cache grows past its size limit.
+"""
+
+import ast
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import threading
+import pandas as pd
+from data_store import MANIFEST_FILE, atomic_write, is_store
+
+DEFAULT_CACHE_BYTES = 10 * 1024 ** 3
+SAMPLE_BYTES = 1024 ** 2
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Stages store and evict entries from several pipeline threads at once
+_eviction_lock = threading.Lock()
+
+def _digest(*parts) -> str:
+    hasher = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        hasher.update(part if isinstance(part, bytes) else str(part).encode())
+        hasher.update(b'\x00')
+    return hasher.hexdigest()
+
+def fingerprint_file(file_path: str, full: bool = False) -> str:
+    """
+    Fingerprints an input file or columnar store.
+
+    By default the fingerprint covers the file size, modification time and the first
+    and last megabyte of content, which is cheap even for very large files. With
+    full=True the whole content is hashed instead. A columnar store is fingerprinted by
+    the full content of its manifest, which lists every file ever appended to it.
+
+    Args:
+        file_path (str): Path to the input file or store directory.
+        full (bool): Whether to hash the whole file.
+
+    Returns:
+        str: Hex fingerprint.
+    """
+    if os.path.isdir(file_path):
+        if not is_store(file_path):
+            raise ValueError(f"{file_path} is a directory but not a columnar store.")
+        return fingerprint_file(os.path.join(file_path, MANIFEST_FILE), full=True)
+    hasher = hashlib.blake2b(digest_size=16)
+    stat = os.stat(file_path)
+    with open(file_path, 'rb') as input_file:
+        if full:
+            for block in iter(lambda: input_file.read(SAMPLE_BYTES), b''):
+                hasher.update(block)
+        else:
+            hasher.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+            hasher.update(input_file.read(SAMPLE_BYTES))
+            if stat.st_size > SAMPLE_BYTES:
+                input_file.seek(max(stat.st_size - SAMPLE_BYTES, SAMPLE_BYTES))
+                hasher.update(input_file.read())
+    return hasher.hexdigest()
+
+def fingerprint_frame(data: pd.DataFrame) -> str:
+    """
+    Fingerprints the content of an in-memory DataFrame.
+
+    Args:
+        data (pd.DataFrame): DataFrame to fingerprint.
+
+    Returns:
+        str: Hex fingerprint.
+    """
+    row_hashes = pd.util.hash_pandas_object(data, index=True).to_numpy()
+    return _digest(list(data.columns), [str(dtype) for dtype in data.dtypes], row_hashes.tobytes())
+
+def _project_module_path(name: str) -> str:
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+    origin = getattr(spec, 'origin', None)
+    if origin is None or not origin.endswith('.py'):
+        return None
+    origin = os.path.abspath(origin)
+    return origin if os.path.dirname(origin) == PROJECT_DIR else None
+
+def _local_dependencies(module_path: str) -> set:
+    with open(module_path) as module_file:
+        tree = ast.parse(module_file.read())
+    names = set()
+    # Walks the whole tree, so imports inside function bodies are found as well
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            names.add(node.module)
+    return {path for path in map(_project_module_path, names) if path is not None}
+
+def code_version(*functions) -> str:
+    """
+    Hashes the source code of the modules defining the given functions and of every
+    project module they import, directly or transitively, so editing any code a stage
+    depends on (e.g. schema.py under load_energy_data) changes the stage's key.
+    """
+    pending = []
+    for function in functions:
+        module = inspect.getmodule(function)
+        module_path = getattr(module, '__file__', None)
+        if module_path is None:
+            pending.append(None)
+        else:
+            pending.append(os.path.abspath(module_path))
+    sources = [inspect.getsource(function) for function, path in zip(functions, pending) if path is None]
+    seen = set()
+    pending = [path for path in pending if path is not None]
+    while pending:
+        module_path = pending.pop()
+        if module_path in seen:
+            continue
+        seen.add(module_path)
+        pending.extend(_local_dependencies(module_path) - seen)
+    for module_path in sorted(seen):
+        with open(module_path, 'rb') as module_file:
+            sources.append(os.path.basename(module_path).encode() + b'\x00' + module_file.read())
+    return _digest(*sources)
+
+def stage_key(stage_name: str, upstream_key: str, functions: tuple = (), params: dict = None) -> str:
+    """
+    Builds the cache key of a stage from its upstream key, code version and parameters.
+
+    Args:
+        stage_name (str): Name of the stage.
+        upstream_key (str): Key (or input fingerprint) of the stage this one reads from.
+        functions (tuple): Functions run by the stage, used for the code version.
+        params (dict): JSON-serializable stage parameters.
+
+    Returns:
+        str: Hex cache key.
+    """
+    return _digest(stage_name, upstream_key, code_version(*functions),
+                   json.dumps(params or {}, sort_keys=True, default=str))
+
+def _entry_paths(cache_dir: str, key: str) -> tuple:
+    return os.path.join(cache_dir, f"{key}.parquet"), os.path.join(cache_dir, f"{key}.joblib")
+
+def load_cached(cache_dir: str, key: str) -> tuple:
+    """
+    Looks up a cache entry and marks it as recently used.
+
+    Args:
+        cache_dir (str): Cache directory.
+        key (str): Cache key.
+
+    Returns:
+        tuple: (True, value) on a hit, (False, None) on a miss.
+    """
+    import joblib
+
+    parquet_path, joblib_path = _entry_paths(cache_dir, key)
+    for path in (parquet_path, joblib_path):
+        try:
+            value = pd.read_parquet(path) if path == parquet_path else joblib.load(path)
+            os.utime(path)  # The modification time doubles as the LRU timestamp
+        except FileNotFoundError:
+            continue  # Missing, or evicted by another stage in the meantime
+        return True, value
+    return False, None
+
+def evict_lru(cache_dir: str, max_bytes: int = DEFAULT_CACHE_BYTES) -> int:
+    """
+    Deletes the least recently used entries until the cache fits in max_bytes.
+
+    Eviction is serialized between threads, and entries removed by another process in
+    the meantime are skipped.
+
+    Args:
+        cache_dir (str): Cache directory.
+        max_bytes (int): Maximum total size of the cache.
+
+    Returns:
+        int: Number of entries evicted.
+    """
+    with _eviction_lock:
+        entries = []
+        for name in os.listdir(cache_dir):
+            if name.endswith(('.parquet', '.joblib')):
+                try:
+                    stat = os.stat(os.path.join(cache_dir, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, name in sorted(entries):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(os.path.join(cache_dir, name))
+                evicted += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        return evicted
+
+def store_cached(cache_dir: str, key: str, value, max_bytes: int = DEFAULT_CACHE_BYTES):
+    """
+    Stores a stage result atomically and evicts old entries if the cache is too large.
+
+    DataFrames are written as Parquet; anything else, or frames Parquet cannot
+    represent, is written with joblib.
+
+    Args:
+        cache_dir (str): Cache directory; created if missing.
+        key (str): Cache key.
+        value: Stage result to store.
+        max_bytes (int): Maximum total size of the cache.
+    """
+    import joblib
+
+    os.makedirs(cache_dir, exist_ok=True)
+    parquet_path, joblib_path = _entry_paths(cache_dir, key)
+    stored = False
+    if isinstance(value, pd.DataFrame):
+        try:
+            atomic_write(parquet_path, lambda temp_path: value.to_parquet(temp_path))
+            stored = True
+        except (ValueError, TypeError, ImportError):
+            stored = False
+    if not stored:
+        atomic_write(joblib_path, lambda temp_path: joblib.dump(value, temp_path))
+    evicted = evict_lru(cache_dir, max_bytes)
+    if evicted:
+        print(f"Evicted {evicted} least recently used cache entries from {cache_dir}.")
+
+def run_cached_stage(cache_dir: str, stage_name: str, upstream_key: str, compute, functions: tuple = (),
+                     params: dict = None, max_bytes: int = DEFAULT_CACHE_BYTES) -> tuple:
+    """
+    Runs a pipeline stage through the cache.
+
+    Args:
+        cache_dir (str): Cache directory.
+        stage_name (str): Name of the stage.
+        upstream_key (str): Key of the stage this one reads from, or the input fingerprint.
+        compute (Callable): Zero-argument callable computing the stage result on a miss.
+        functions (tuple): Functions run by the stage, used for the code version.
+        params (dict): JSON-serializable stage parameters.
+        max_bytes (int): Maximum total size of the cache.
+
+    Returns:
+        tuple: The stage result and its cache key, to be passed downstream.
+
+    Example Usage:
+        processed, key = run_cached_stage(cache_dir, 'preprocess', fingerprint_file(path),
+                                          lambda: preprocess_energy_data(load_energy_data(path)),
+                                          functions=(load_energy_data, preprocess_energy_data))
+    """
+    key = stage_key(stage_name, upstream_key, functions, params)
+    hit, value = load_cached(cache_dir, key)
+    if hit:
+        print(f"Stage '{stage_name}' loaded from cache ({key}).")
+        return value, key
+    value = compute()
+    store_cached(cache_dir, key, value, max_bytes)
+    print(f"Stage '{stage_name}' computed and cached ({key}).")
+    return value, key
@@ -0,0 +1,220 @@
+"""
+Module: pipeline_executor.py
+Author: Satej
+Description:
+This script runs the pipeline as a graph of stages instead of a fixed sequence.
+Each stage declares the named values it reads and produces; the executor derives the
+dependencies from them and runs every stage whose inputs are ready on a thread pool, within
+a CPU budget. A failed stage only skips the stages that depend on it, and the run report
+includes the critical path, i.e. the chain of stages that determined the total run time.
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from instrumentation import track_stage
+
+logger = logging.getLogger(__name__)
+
+def pipeline_stage(name: str, function, inputs: tuple = (), outputs: tuple = (), cpu: int = 1,
+                   main_thread: bool = False) -> dict:
+    """
+    Declares a pipeline stage.
+
+    Args:
+        name (str): Unique stage name.
+        function (Callable): Called with the input values as positional arguments, in the
+            order of inputs. With one output it returns the value, with several a tuple.
+        inputs (tuple): Names of the values the stage reads.
+        outputs (tuple): Names of the values the stage produces.
+        cpu (int): CPU slots the stage occupies while it runs; None reserves the whole
+            budget, for stages that parallelize internally (e.g. n_jobs=-1 models).
+        main_thread (bool): Whether the stage must run on the calling thread, e.g. for
+            interactive matplotlib windows.
+
+    Returns:
+        dict: Stage definition for run_pipeline.
+
+    Example Usage:
+        pipeline_stage('daily', lambda data: calculate_daily_consumption(data, 'timestamp', 'energy_usage'),
+                       inputs=('features_data',), outputs=('daily_data',))
+    """
+    return {'name': name, 'function': function, 'inputs': tuple(inputs), 'outputs': tuple(outputs),
+            'cpu': cpu, 'main_thread': main_thread}
+
+def resolve_dependencies(stages: list, initial: dict = None) -> dict:
+    """
+    Derives stage dependencies from the declared inputs and outputs and validates the graph.
+
+    Args:
+        stages (list): Stage definitions from pipeline_stage.
+        initial (dict): Values available before any stage runs.
+
+    Returns:
+        dict: Maps each stage name to the set of stage names it depends on.
+
+    Raises:
+        ValueError: On duplicate stage names or outputs, unknown inputs, or cycles.
+    """
+    producers = {}
+    for stage in stages:
+        for output in stage['outputs']:
+            if output in producers or output in (initial or {}):
+                raise ValueError(f"Value '{output}' is produced more than once.")
+            producers[output] = stage['name']
+    dependencies = {}
+    for stage in stages:
+        if stage['name'] in dependencies:
+            raise ValueError(f"Duplicate stage name '{stage['name']}'.")
+        missing = [value for value in stage['inputs'] if value not in producers and value not in (initial or {})]
+        if missing:
+            raise ValueError(f"Stage '{stage['name']}' reads unknown values: {missing}")
+        dependencies[stage['name']] = {producers[value] for value in stage['inputs'] if value in producers}
+
+    # Kahn's algorithm: every stage must become ready at some point
+    remaining = {name: set(depends_on) for name, depends_on in dependencies.items()}
+    ready = [name for name, depends_on in remaining.items() if not depends_on]
+    while ready:
+        done = ready.pop()
+        for name, depends_on in remaining.items():
+            if done in depends_on:
+                depends_on.discard(done)
+                if not depends_on:
+                    ready.append(name)
+    cyclic = [name for name, depends_on in remaining.items() if depends_on]
+    if cyclic:
+        raise ValueError(f"Pipeline stages form a cycle: {cyclic}")
+    return dependencies
+
+def critical_path(results: dict, dependencies: dict) -> tuple:
+    """
+    Finds the chain of dependent stages with the largest total duration.
+
+    Args:
+        results (dict): Stage results from run_pipeline, with 'seconds' per stage.
+        dependencies (dict): Stage dependencies from resolve_dependencies.
+
+    Returns:
+        tuple: The stage names along the critical path and its total seconds.
+    """
+    longest = {}
+
+    def path_to(name):
+        if name not in longest:
+            before = max((path_to(dependency) for dependency in dependencies[name]),
+                         key=lambda path: path[1], default=((), 0.0))
+            longest[name] = (before[0] + (name,), before[1] + (results[name].get('seconds') or 0.0))
+        return longest[name]
+
+    return max((path_to(name) for name in dependencies), key=lambda path: path[1], default=((), 0.0))
+
+def run_pipeline(stages: list, initial: dict = None, max_workers: int = None, cpu_limit: int = None) -> tuple:
+    """
+    Runs the stages concurrently in dependency order.
+
+    A stage is started as soon as all its inputs exist and its CPU slots fit in the budget.
+    Stages run on threads because they share large DataFrames, which would have to be
+    copied to reach worker processes; pandas, numpy and scikit-learn release the GIL in
+    their heavy loops. When a stage raises, its error is recorded, every stage that
+    depends on it is skipped and all other stages still run.
+
+    Args:
+        stages (list): Stage definitions from pipeline_stage.
+        initial (dict): Values available before any stage runs.
+        max_workers (int): Size of the thread pool; defaults to the CPU count.
+        cpu_limit (int): CPU slots shared by running stages; defaults to the CPU count.
+
+    Returns:
+        tuple: The dict of all produced values and a report dict with per-stage 'stages'
+        results (status, start, seconds, error), 'wall_seconds', 'critical_path' and
+        'critical_path_seconds'.
+
+    Example Usage:
+        values, report = run_pipeline(stages, max_workers=4)
+    """
+    dependencies = resolve_dependencies(stages, initial)
+    by_name = {stage['name']: stage for stage in stages}
+    dependents = {name: [other for other, depends_on in dependencies.items() if name in depends_on]
+                  for name in dependencies}
+    cpu_limit = cpu_limit or os.cpu_count() or 1
+    values = dict(initial or {})
+    results = {name: {'status': 'pending'} for name in by_name}
+    waiting = {name: len(depends_on) for name, depends_on in dependencies.items()}
+    ready = [stage['name'] for stage in stages if not dependencies[stage['name']]]
+    running = {}
+    cpu_in_use = 0
+    pipeline_start = time.perf_counter()
+
+    def slots(stage):
+        return cpu_limit if stage['cpu'] is None else min(max(stage['cpu'], 1), cpu_limit)
+
+    def execute(stage):
+        start = time.perf_counter()
+        results[stage['name']].update(status='running', start=start - pipeline_start)
+        try:
+            with track_stage(f"pipeline.{stage['name']}"):
+                output = stage['function'](*(values[value] for value in stage['inputs']))
+        finally:
+            results[stage['name']]['seconds'] = time.perf_counter() - start
+        if len(stage['outputs']) == 1:
+            output = (output,)
+        elif len(stage['outputs']) > 1 and len(output) != len(stage['outputs']):
+            raise ValueError(f"Stage '{stage['name']}' returned {len(output)} values for outputs {stage['outputs']}")
+        return dict(zip(stage['outputs'], output)) if stage['outputs'] else {}
+
+    def skip_dependents(name):
+        for dependent in dependents[name]:
+            if results[dependent]['status'] == 'pending':
+                results[dependent].update(status='skipped', error=f"upstream stage '{name}' failed")
+                skip_dependents(dependent)
+
+    def finish(name, outcome):
+        try:
+            produced = outcome()
+        except Exception as e:
+            results[name].update(status='failed', error=repr(e))
+            logger.error(f"Stage '{name}' failed: {e}")
+            skip_dependents(name)
+            return
+        values.update(produced)
+        results[name]['status'] = 'done'
+        logger.info(f"Stage '{name}' completed in {results[name]['seconds']:.2f}s.")
+        for dependent in dependents[name]:
+            waiting[dependent] -= 1
+            if waiting[dependent] == 0 and results[dependent]['status'] == 'pending':
+                ready.append(dependent)
+
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count(), thread_name_prefix='stage') as executor:
+        while ready or running:
+            ran_inline = False
+            for name in list(ready):
+                stage = by_name[name]
+                if stage['main_thread']:
+                    continue
+                if cpu_in_use + slots(stage) <= cpu_limit:
+                    ready.remove(name)
+                    cpu_in_use += slots(stage)
+                    running[executor.submit(execute, stage)] = name
+            main_thread_stage = next((name for name in ready if by_name[name]['main_thread']), None)
+            if main_thread_stage is not None:
+                ready.remove(main_thread_stage)
+                finish(main_thread_stage, lambda name=main_thread_stage: execute(by_name[name]))
+                ran_inline = True
+            if running:
+                done, _ = wait(running, timeout=0 if ran_inline else None, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    cpu_in_use -= slots(by_name[name])
+                    finish(name, future.result)
+
+    path, path_seconds = critical_path(results, dependencies)
+    report = {
+        'stages': results,
+        'wall_seconds': time.perf_counter() - pipeline_start,
+        'critical_path': list(path),
+        'critical_path_seconds': path_seconds,
+    }
+    logger.info(f"Pipeline finished in {report['wall_seconds']:.2f}s; critical path "
+                f"({path_seconds:.2f}s): {' -> '.join(path)}")
+    return values, report
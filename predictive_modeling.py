@@ -7,13 +7,21 @@ It includes regression models for forecasting energy usage and classification mo
 to identify high-consumption households.
 """
 
+import logging
+import json
+import os
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LinearRegression
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import mean_squared_error, classification_report
+from instrumentation import instrumented
 
-def train_regression_model(data: pd.DataFrame, features: list, target: str):
+logger = logging.getLogger(__name__)
+
+@instrumented()
+def train_regression_model(data: pd.DataFrame, features: list, target: str, time_column: str = None):
     """
     Trains a regression model to forecast energy usage.
 
@@ -21,6 +29,9 @@ def train_regression_model(data: pd.DataFrame, features: list, target: str):
         data (pd.DataFrame): Input DataFrame containing features and target variable.
         features (list): List of feature column names.
         target (str): Target column name for regression.
+        time_column (str): Optional timestamp column. When given, the split is
+            chronological (the latest 20% of readings form the test set) instead of
+            shuffled, so no future readings leak into training.
 
     Returns:
         tuple: Trained model and the mean squared error on the test set.
@@ -28,11 +39,16 @@ def train_regression_model(data: pd.DataFrame, features: list, target: str):
     Example Usage:
         model, mse = train_regression_model(data, ['hour', 'temperature'], 'energy_usage')
     """
+    if time_column is not None:
+        data = data.sort_values(time_column, kind='stable')
     X = data[features]
     y = data[target]
     
     # Splitting data into training and testing sets
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    if time_column is not None:
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
+    else:
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
     
     # Training a linear regression model
     model = LinearRegression()
@@ -41,10 +57,11 @@ def train_regression_model(data: pd.DataFrame, features: list, target: str):
     # Predicting on the test set
     y_pred = model.predict(X_test)
     mse = mean_squared_error(y_test, y_pred)
-    print(f"Regression Model MSE: {mse}")
+    logger.info(f"Regression Model MSE: {mse}")
     return model, mse
 
-def train_classification_model(data: pd.DataFrame, features: list, target: str):
+@instrumented()
+def train_classification_model(data: pd.DataFrame, features: list, target: str, n_jobs: int = -1):
     """
     Trains a classification model to identify high-consumption households.
 
@@ -52,6 +69,7 @@ def train_classification_model(data: pd.DataFrame, features: list, target: str):
         data (pd.DataFrame): Input DataFrame containing features and target variable.
         features (list): List of feature column names.
         target (str): Target column name for classification.
+        n_jobs (int): Number of cores used to grow the forest (-1 uses all cores).
 
     Returns:
         tuple: Trained model and classification report on the test set.
@@ -66,11 +84,300 @@ def train_classification_model(data: pd.DataFrame, features: list, target: str):
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
     
     # Training a Random Forest classifier
-    model = RandomForestClassifier(random_state=42)
+    model = RandomForestClassifier(random_state=42, n_jobs=n_jobs)
     model.fit(X_train, y_train)
     
     # Predicting on the test set
     y_pred = model.predict(X_test)
     report = classification_report(y_test, y_pred)
-    print("Classification Report:\n", report)
+    logger.info("Classification Report:\n%s", report)
     return model, report
+
+def update_linear_statistics(state: dict, data: pd.DataFrame, features: list, target: str) -> dict:
+    """
+    Folds a batch of rows into the sufficient statistics of a linear regression.
+
+    The state holds the X^T X and X^T y accumulators (with a leading intercept column)
+    and the row count, so updating it costs O(rows * features^2) for the new batch only.
+
+    Args:
+        state (dict): Existing statistics, or None to start from scratch.
+        data (pd.DataFrame): New rows containing features and target variable.
+        features (list): List of feature column names.
+        target (str): Target column name for regression.
+
+    Returns:
+        dict: Updated statistics with 'xtx', 'xty' and 'n' entries.
+    """
+    X = np.column_stack([np.ones(len(data)), data[features].to_numpy(dtype=np.float64)])
+    y = data[target].to_numpy(dtype=np.float64)
+    if state is None:
+        state = {'xtx': np.zeros((X.shape[1], X.shape[1])), 'xty': np.zeros(X.shape[1]), 'n': 0}
+    state['xtx'] += X.T @ X
+    state['xty'] += X.T @ y
+    state['n'] += len(data)
+    return state
+
+def solve_linear_statistics(state: dict, features: list) -> LinearRegression:
+    """
+    Builds a fitted LinearRegression from accumulated sufficient statistics.
+
+    Solving the normal equations gives the same coefficients as fitting LinearRegression
+    on every row seen so far, without revisiting those rows.
+
+    Args:
+        state (dict): Statistics produced by update_linear_statistics.
+        features (list): List of feature column names, in accumulator order.
+
+    Returns:
+        LinearRegression: Model with coef_ and intercept_ set from the solution.
+    """
+    beta = np.linalg.lstsq(state['xtx'], state['xty'], rcond=None)[0]
+    model = LinearRegression()
+    model.intercept_ = beta[0]
+    model.coef_ = beta[1:]
+    model.n_features_in_ = len(features)
+    model.feature_names_in_ = np.asarray(features, dtype=object)
+    return model
+
+def warm_start_classification_model(model: RandomForestClassifier, data: pd.DataFrame, features: list, target: str,
+                                    new_estimators: int = 10, max_estimators: int = 200) -> RandomForestClassifier:
+    """
+    Grows a Random Forest with extra trees fitted on a new batch only (warm start).
+
+    Existing trees are kept as they are, so the cost of an update depends on the size
+    of the batch. Once the forest would exceed max_estimators, the oldest trees are
+    dropped, which bounds the model size and lets the forest follow recent data.
+    Batches whose classes differ from the fitted model are skipped, because trees
+    trained on a different label set cannot share one forest.
+
+    Args:
+        model (RandomForestClassifier): Previously fitted forest, or None to fit a new one.
+        data (pd.DataFrame): New rows containing features and target variable.
+        features (list): List of feature column names.
+        target (str): Target column name for classification.
+        new_estimators (int): Number of trees to add for this batch.
+        max_estimators (int): Maximum number of trees kept in the forest.
+
+    Returns:
+        RandomForestClassifier: The updated forest.
+    """
+    X = data[features]
+    y = data[target]
+    if model is None:
+        model = RandomForestClassifier(n_estimators=new_estimators, warm_start=True, random_state=42)
+        model.fit(X, y)
+        return model
+    if set(np.unique(y)) != set(model.classes_):
+        logger.warning(f"Skipping forest update: batch classes {sorted(np.unique(y))} "
+                       f"differ from model classes {list(model.classes_)}.")
+        return model
+    # estimators_ is in fitting order, so the oldest trees come first
+    keep = max(max_estimators - new_estimators, 0)
+    model.estimators_ = model.estimators_[-keep:] if keep else []
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + new_estimators)
+    model.fit(X, y)
+    return model
+
+def load_incremental_state(state_dir: str) -> dict:
+    """
+    Loads the persisted incremental training state from a directory.
+
+    Args:
+        state_dir (str): Directory holding the training state.
+
+    Returns:
+        dict: State with the 'manifest_position' (number of store files already folded
+        in), the latest reading time as 'watermark', 'linear' statistics and the
+        'classification_model', any of which may be None for a fresh directory.
+    """
+    import joblib
+
+    state = {'manifest_position': None, 'watermark': None, 'linear': None, 'classification_model': None}
+    meta_path = os.path.join(state_dir, 'state.json')
+    if os.path.exists(meta_path):
+        with open(meta_path) as meta_file:
+            meta = json.load(meta_file)
+        state['watermark'] = meta.get('watermark')
+        state['manifest_position'] = meta.get('manifest_position')
+    linear_path = os.path.join(state_dir, 'linear_state.npz')
+    if os.path.exists(linear_path):
+        with np.load(linear_path) as arrays:
+            state['linear'] = {'xtx': arrays['xtx'], 'xty': arrays['xty'], 'n': int(arrays['n'])}
+    forest_path = os.path.join(state_dir, 'classification_model.joblib')
+    if os.path.exists(forest_path):
+        state['classification_model'] = joblib.load(forest_path)
+    return state
+
+def save_incremental_state(state_dir: str, state: dict):
+    """
+    Persists the incremental training state, writing every file atomically.
+
+    The manifest position is written last, so an interrupted save is retried from the
+    previous position on the next run.
+
+    Args:
+        state_dir (str): Directory holding the training state; created if missing.
+        state (dict): State as returned by load_incremental_state.
+    """
+    import joblib
+    from data_store import atomic_write
+
+    os.makedirs(state_dir, exist_ok=True)
+    if state['linear'] is not None:
+        linear = state['linear']
+        def write_linear(temp_path):
+            with open(temp_path, 'wb') as linear_file:
+                np.savez(linear_file, xtx=linear['xtx'], xty=linear['xty'], n=linear['n'])
+        atomic_write(os.path.join(state_dir, 'linear_state.npz'), write_linear)
+    if state['classification_model'] is not None:
+        atomic_write(os.path.join(state_dir, 'classification_model.joblib'),
+                     lambda temp_path: joblib.dump(state['classification_model'], temp_path))
+    def write_meta(temp_path):
+        with open(temp_path, 'w') as meta_file:
+            json.dump({'manifest_position': state['manifest_position'], 'watermark': state['watermark']}, meta_file)
+    atomic_write(os.path.join(state_dir, 'state.json'), write_meta)
+
+def _make_group_model(kind: str):
+    """
+    Creates the estimator used for one group; forests use a single core because the
+    parallelism comes from the process pool.
+    """
+    if kind == 'regression':
+        return LinearRegression()
+    return RandomForestClassifier(random_state=42, n_jobs=1)
+
+def _fit_group_shard(shard_id: int, matrix_path: str, target_path: str, groups: list, kind: str, cv: int,
+                     param_grid: dict = None):
+    """
+    Fits the models of one shard of groups inside a worker process.
+
+    The feature matrix and target are opened as read-only memory maps, so the worker
+    only pages in the contiguous row ranges of its own groups. With a param_grid, each
+    group's parameters are chosen by a grid search over its own cross-validation folds.
+    """
+    import time
+    from sklearn.model_selection import GridSearchCV, cross_val_score
+
+    start_time = time.perf_counter()
+    X_all = np.load(matrix_path, mmap_mode='r')
+    y_all = np.load(target_path, mmap_mode='r')
+    scoring = 'neg_mean_squared_error' if kind == 'regression' else 'accuracy'
+    models, metrics = {}, []
+    for group, start, stop in groups:
+        X = np.asarray(X_all[start:stop])
+        y = np.asarray(y_all[start:stop])
+        entry = {'group': group, 'rows': stop - start, 'cv_mean': np.nan, 'cv_std': np.nan, 'error': None}
+        if param_grid:
+            entry['best_params'] = None
+        try:
+            folds = min(cv, len(y))
+            if folds >= 2 and param_grid:
+                # One job per search: the process pool already keeps every core busy
+                search = GridSearchCV(_make_group_model(kind), param_grid, cv=folds, scoring=scoring, n_jobs=1)
+                search.fit(X, y)
+                best_score = search.cv_results_['mean_test_score'][search.best_index_]
+                entry['cv_mean'] = float(-best_score if kind == 'regression' else best_score)
+                entry['cv_std'] = float(search.cv_results_['std_test_score'][search.best_index_])
+                entry['best_params'] = search.best_params_
+                models[group] = search.best_estimator_
+            else:
+                if folds >= 2:
+                    scores = cross_val_score(_make_group_model(kind), X, y, cv=folds, scoring=scoring)
+                    scores = -scores if kind == 'regression' else scores
+                    entry['cv_mean'], entry['cv_std'] = float(scores.mean()), float(scores.std())
+                models[group] = _make_group_model(kind).fit(X, y)
+        except ValueError as e:
+            # A group that cannot be fitted (e.g. too few rows per class) must not fail its shard
+            entry['error'] = str(e)
+        metrics.append(entry)
+    shard_metrics = {'shard': shard_id, 'groups': len(groups), 'rows': sum(stop - start for _, start, stop in groups),
+                     'seconds': time.perf_counter() - start_time}
+    return models, metrics, shard_metrics
+
+@instrumented()
+def train_models_by_group(data: pd.DataFrame, group_column: str, features: list, target: str,
+                          kind: str = 'regression', cv: int = 5, max_workers: int = None,
+                          shard_rows: int = 1_000_000, work_dir: str = None, param_grid: dict = None) -> tuple:
+    """
+    Trains one cross-validated model per household (or feeder) on a process pool.
+
+    The rows are sorted by group once and written as .npy files that every worker opens
+    as a read-only memory map, so the feature matrix is shared instead of pickled to each
+    task. Groups are packed into shards of about shard_rows rows, which bounds the data a
+    worker holds at a time.
+
+    Args:
+        data (pd.DataFrame): Input DataFrame containing groups, features and target.
+        group_column (str): Column identifying the household or feeder of each row.
+        features (list): List of feature column names.
+        target (str): Numeric target column name.
+        kind (str): 'regression' (LinearRegression, scored by MSE) or 'classification'
+            (RandomForestClassifier, scored by accuracy).
+        cv (int): Number of cross-validation folds per group.
+        max_workers (int): Number of worker processes; defaults to the CPU count.
+        shard_rows (int): Approximate number of rows per shard.
+        work_dir (str): Directory for the shared memory-mapped arrays; a temporary
+            directory is used and removed if not given.
+        param_grid (dict): Optional scikit-learn parameter grid; when given, every group
+            runs its own grid search and keeps its best model, and the metrics gain a
+            'best_params' column.
+
+    Returns:
+        tuple: Model registry (dict of group to fitted model), per-group metrics
+        DataFrame and per-shard metrics DataFrame.
+
+    Example Usage:
+        registry, group_metrics, shard_metrics = train_models_by_group(
+            data, 'household_id', ['hour', 'temperature'], 'energy_usage', max_workers=8)
+    """
+    import shutil
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+
+    if kind not in ('regression', 'classification'):
+        raise ValueError(f"Unsupported model kind '{kind}'; expected 'regression' or 'classification'")
+
+    codes, uniques = pd.factorize(data[group_column], sort=True)
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    skip = int((codes < 0).sum())  # Rows without a group sort first and are left out
+
+    temp_dir = work_dir or tempfile.mkdtemp(prefix='energy_models_')
+    os.makedirs(temp_dir, exist_ok=True)
+    matrix_path = os.path.join(temp_dir, 'features.npy')
+    target_path = os.path.join(temp_dir, 'target.npy')
+    try:
+        np.save(matrix_path, data[features].to_numpy(dtype=np.float64)[order])
+        target_dtype = np.float64 if kind == 'regression' else None
+        np.save(target_path, data[target].to_numpy(dtype=target_dtype)[order])
+
+        shards, current, current_rows = [], [], 0
+        for code, group in enumerate(uniques):
+            start, stop = skip + offsets[code], skip + offsets[code + 1]
+            current.append((group, int(start), int(stop)))
+            current_rows += stop - start
+            if current_rows >= shard_rows:
+                shards.append(current)
+                current, current_rows = [], 0
+        if current:
+            shards.append(current)
+
+        registry, group_metrics, shard_metrics = {}, [], []
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_fit_group_shard, shard_id, matrix_path, target_path, shard, kind, cv,
+                                       param_grid)
+                       for shard_id, shard in enumerate(shards)]
+            for future in futures:
+                models, metrics, shard_summary = future.result()
+                registry.update(models)
+                group_metrics.extend(metrics)
+                shard_metrics.append(shard_summary)
+    finally:
+        if work_dir is None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    failed = sum(entry['error'] is not None for entry in group_metrics)
+    logger.info(f"Trained {len(registry)} {kind} models across {len(shards)} shards ({failed} groups failed).")
+    return registry, pd.DataFrame(group_metrics), pd.DataFrame(shard_metrics)
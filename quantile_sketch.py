@@ -0,0 +1,119 @@
+"""
+Module: quantile_sketch.py
+Author: Satej
+Description:
+This script implements a mergeable streaming quantile sketch (KLL) with numpy.
+A sketch keeps a few hundred values in levels of compactors: level h holds values that each
+stand for 2^h inputs, and a full level is halved by keeping every other sorted value. Batches
+are added with one vectorized update, two sketches built on different chunks or workers can be
+merged, and any quantile is answered from the sketch with a rank error of about 1.7/k.
+"""
+
+import numpy as np
+
+def new_sketch(k: int = 200) -> dict:
+    """
+    Creates an empty sketch.
+
+    Args:
+        k (int): Accuracy parameter; the sketch keeps about 3k values.
+
+    Returns:
+        dict: Sketch with 'k', 'levels', 'count', 'min' and 'max'.
+    """
+    return {'k': k, 'levels': [np.empty(0)], 'count': 0, 'min': np.inf, 'max': -np.inf}
+
+def _capacity(k: int, level: int, height: int) -> int:
+    # Lower levels get geometrically smaller capacities, as in the KLL paper
+    return max(int(np.ceil(k * (2 / 3) ** (height - level - 1))), 2)
+
+def _compress(sketch: dict) -> dict:
+    levels = sketch['levels']
+    # Seeded by the count, so the same inputs always give the same sketch
+    rng = np.random.default_rng(sketch['count'])
+    level = 0
+    while level < len(levels):
+        if len(levels[level]) > _capacity(sketch['k'], level, len(levels)):
+            items = np.sort(levels[level])
+            leftover = items[len(items) - len(items) % 2:]
+            items = items[:len(items) - len(items) % 2]
+            promoted = items[rng.integers(2)::2]
+            if level + 1 == len(levels):
+                levels.append(np.empty(0))
+            levels[level + 1] = np.concatenate([levels[level + 1], promoted])
+            levels[level] = leftover
+        level += 1
+    return sketch
+
+def update_sketch(sketch: dict, values) -> dict:
+    """
+    Adds a batch of values to a sketch. NaN values are ignored.
+
+    The input sketch is left unchanged, so a sketch that was also merged elsewhere or
+    shared between workers is never modified behind their back.
+
+    Args:
+        sketch (dict): Sketch from new_sketch, or None to start a new one.
+        values (array-like): New values.
+
+    Returns:
+        dict: A new sketch including the values.
+    """
+    # The level arrays are replaced rather than modified, so copying the list is enough
+    sketch = {**sketch, 'levels': list(sketch['levels'])} if sketch is not None else new_sketch()
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return sketch
+    sketch['count'] += len(values)
+    sketch['min'] = min(sketch['min'], values.min())
+    sketch['max'] = max(sketch['max'], values.max())
+    sketch['levels'][0] = np.concatenate([sketch['levels'][0], values])
+    return _compress(sketch)
+
+def merge_sketches(left: dict, right: dict) -> dict:
+    """
+    Merges two sketches, e.g. built on different chunks or by different workers.
+
+    Args:
+        left (dict): First sketch, or None.
+        right (dict): Second sketch, or None.
+
+    Returns:
+        dict: A sketch summarizing the inputs of both; neither input is modified, and
+        when one of them is None the other is returned as is.
+    """
+    if left is None or right is None:
+        return left if right is None else right
+    height = max(len(left['levels']), len(right['levels']))
+    levels = [np.concatenate([sketch['levels'][level] for sketch in (left, right) if level < len(sketch['levels'])])
+              for level in range(height)]
+    merged = {'k': min(left['k'], right['k']), 'levels': levels, 'count': left['count'] + right['count'],
+              'min': min(left['min'], right['min']), 'max': max(left['max'], right['max'])}
+    return _compress(merged)
+
+def sketch_quantiles(sketch: dict, quantiles) -> np.ndarray:
+    """
+    Estimates quantiles from a sketch.
+
+    Args:
+        sketch (dict): Sketch with at least one value.
+        quantiles (array-like): Quantiles between 0 and 1.
+
+    Returns:
+        np.ndarray: Estimated values at the quantiles.
+    """
+    quantiles = np.asarray(quantiles, dtype=np.float64)
+    if sketch is None or sketch['count'] == 0:
+        return np.full(len(quantiles), np.nan)
+    items = np.concatenate(sketch['levels'])
+    weights = np.concatenate([np.full(len(level_items), 2.0 ** level)
+                              for level, level_items in enumerate(sketch['levels'])])
+    order = np.argsort(items, kind='stable')
+    items, cumulative = items[order], np.cumsum(weights[order])
+    positions = np.searchsorted(cumulative, quantiles * cumulative[-1], side='left')
+    estimates = items[np.clip(positions, 0, len(items) - 1)]
+    # The exact extremes are tracked, so the end quantiles need no estimate
+    estimates[quantiles <= 0] = sketch['min']
+    estimates[quantiles >= 1] = sketch['max']
+    return estimates
@@ -0,0 +1,118 @@
+"""
+Module: rendering.py
+Author: Satej
+Description:
+This script controls how the EDA and dashboard plots are rendered.
+By default figures are shown interactively. In headless mode they are drawn on a background
+worker and saved to files, so the pipeline keeps running while plots render. Large series are
+decimated with min/max downsampling to roughly screen resolution before they are plotted.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+_settings = {'output_dir': None, 'max_points': 2000, 'executor': None, 'futures': []}
+
+def configure_rendering(output_dir: str = None, max_points: int = 2000):
+    """
+    Selects interactive or headless rendering for all plots.
+
+    Args:
+        output_dir (str): Directory to save figures to. When set, figures are rendered
+            on a background worker with the Agg canvas instead of being shown with the
+            blocking plt.show(); when None, plots are shown interactively.
+        max_points (int): Maximum number of points drawn per line series.
+
+    Example Usage:
+        configure_rendering("C:/Users/Satej/Data/plots")
+    """
+    _settings['output_dir'] = output_dir
+    _settings['max_points'] = max_points
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+        if _settings['executor'] is None:
+            # One worker: figures are independent, but rendering is serialized to stay cheap
+            _settings['executor'] = ThreadPoolExecutor(max_workers=1, thread_name_prefix='render')
+
+def max_points() -> int:
+    """
+    Returns the configured maximum number of points per line series.
+    """
+    return _settings['max_points']
+
+def downsample_minmax(x: np.ndarray, y: np.ndarray, max_points: int) -> tuple:
+    """
+    Reduces a series to at most max_points points, keeping the min and max of each bucket.
+
+    Points are split into max_points / 2 consecutive buckets of equal size, and the
+    minimum and maximum of each bucket are kept in their original order, so peaks and
+    dips stay visible at screen resolution.
+
+    Args:
+        x (np.ndarray): X values, sorted.
+        y (np.ndarray): Y values aligned with x.
+        max_points (int): Maximum number of points to keep.
+
+    Returns:
+        tuple: Downsampled x and y arrays.
+    """
+    valid = ~pd.isna(y)
+    x, y = np.asarray(x)[valid], np.asarray(y, dtype=np.float64)[valid]
+    if len(y) <= max_points:
+        return x, y
+    buckets = max(max_points // 2, 1)
+    edges = np.linspace(0, len(y), buckets + 1).astype(np.int64)
+    bucket_ids = np.repeat(np.arange(buckets), np.diff(edges))
+    values = pd.Series(y)
+    grouped = values.groupby(bucket_ids)
+    keep = np.unique(np.concatenate([grouped.idxmin().to_numpy(), grouped.idxmax().to_numpy()]))
+    return x[keep], y[keep]
+
+def render(draw, name: str, figsize: tuple = (10, 6)):
+    """
+    Renders a figure interactively or, in headless mode, saves it from the background worker.
+
+    Args:
+        draw (Callable): Function taking a matplotlib Figure and drawing on it. It should
+            only use data already reduced for plotting, since it may run on another thread.
+        name (str): File name stem used when saving.
+        figsize (tuple): Figure size in inches.
+
+    Returns:
+        Future or None: The pending render in headless mode.
+    """
+    if _settings['output_dir'] is None:
+        import matplotlib.pyplot as plt
+
+        figure = plt.figure(figsize=figsize)
+        draw(figure)
+        plt.show()
+        return None
+
+    path = os.path.join(_settings['output_dir'], f"{name}.png")
+
+    def save():
+        from matplotlib.figure import Figure
+
+        # A bare Figure uses the Agg canvas and no pyplot state, so it is safe off the main thread
+        figure = Figure(figsize=figsize)
+        draw(figure)
+        figure.savefig(path)
+        print(f"Plot saved to {path}")
+        return path
+
+    future = _settings['executor'].submit(save)
+    _settings['futures'].append(future)
+    return future
+
+def wait_for_renders() -> list:
+    """
+    Waits for all pending background renders and re-raises the first render error.
+
+    Returns:
+        list: Paths of the saved figures.
+    """
+    futures, _settings['futures'] = _settings['futures'], []
+    return [future.result() for future in futures]
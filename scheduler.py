@@ -0,0 +1,239 @@
+"""
+Module: scheduler.py
+Author: Satej
+Description:
+This script runs periodic jobs such as ingestion, model retraining and rollup exports.
+Jobs run at a fixed rate on a grid anchored to their first scheduled time, so the cadence does
+not drift by the job runtime. They run side by side on a worker pool, an occurrence is
+skipped while the previous run of the same job is still going, and failed runs are retried
+with jittered exponential backoff. The last-run state of every job is persisted, so after a
+restart or a stall the missed occurrences are caught up with a single run.
+"""
+
+import json
+import math
+import os
+import random
+import signal
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from data_store import atomic_write
+from instrumentation import track_stage
+
+class JobScheduler:
+    """
+    Runs registered jobs at fixed rates on a background thread.
+
+    Example Usage:
+        scheduler = JobScheduler("C:/Users/Satej/Data/scheduler_state.json")
+        scheduler.add_job('ingest', ingest_new_readings, interval_seconds=15 * 60)
+        scheduler.add_job('retrain', update_regression_model, interval_seconds=24 * 3600)
+        scheduler.start()
+        ...
+        scheduler.shutdown()
+    """
+
+    def __init__(self, state_path: str = None, max_workers: int = 4, max_sleep_seconds: float = 60.0):
+        self.state_path = state_path
+        self.max_sleep_seconds = max_sleep_seconds
+        self.jobs = {}
+        self.stopping = threading.Event()
+        self._state = self._load_state()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._thread = None
+        self._random = random.Random()
+
+    def _load_state(self) -> dict:
+        if self.state_path is None or not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path) as state_file:
+            return json.load(state_file)
+
+    def _save_state(self):
+        if self.state_path is None:
+            return
+        state = json.dumps(self._state, indent=2, default=str)
+
+        def write_state(temp_path):
+            with open(temp_path, 'w') as state_file:
+                state_file.write(state)
+        atomic_write(self.state_path, write_state)
+
+    def add_job(self, name: str, function, interval_seconds: float, retries: int = 3, retry_delay: float = 60.0,
+                jitter: float = 0.2, start_at: float = None):
+        """
+        Registers a job.
+
+        Args:
+            name (str): Unique job name, also the key of its persisted state.
+            function (Callable): Function called without arguments on every run.
+            interval_seconds (float): Time between scheduled runs.
+            retries (int): Number of retries after a failed run.
+            retry_delay (float): Base retry delay in seconds, doubled on every attempt.
+            jitter (float): Relative random spread of the retry delays, so that jobs
+                failing on a shared dependency do not retry in lockstep.
+            start_at (float): Epoch seconds of the first run when the job has no persisted
+                state; defaults to now. With persisted state, the grid of the previous
+                runs is continued instead.
+        """
+        job_state = self._state.setdefault(name, {})
+        for counter in ('runs', 'failures', 'skipped'):
+            job_state.setdefault(counter, 0)
+        last_scheduled = job_state.get('last_scheduled')
+        with self._lock:
+            self.jobs[name] = {
+                'name': name,
+                'function': function,
+                'interval': float(interval_seconds),
+                'retries': retries,
+                'retry_delay': retry_delay,
+                'jitter': jitter,
+                'next_run': last_scheduled + interval_seconds if last_scheduled is not None
+                            else (start_at if start_at is not None else time.time()),
+                'retry_at': None,
+                'attempt': 0,
+                'running': False,
+            }
+            self._wakeup.notify()
+        print(f"Job '{name}' scheduled every {interval_seconds / 3600:.2f} hours.")
+
+    def _launch(self, job: dict, scheduled: float, attempt: int):
+        job['running'] = True
+        self._executor.submit(self._execute, job, scheduled, attempt)
+
+    def _dispatch(self, job: dict, now: float):
+        if now >= job['next_run']:
+            # Coalesce every grid point that has passed into a single occurrence
+            missed = math.floor((now - job['next_run']) / job['interval'])
+            scheduled = job['next_run'] + missed * job['interval']
+            job['next_run'] = scheduled + job['interval']
+            job_state = self._state[job['name']]
+            if missed:
+                print(f"Job '{job['name']}' missed {missed} scheduled runs; catching up with one run.")
+            if job['running']:
+                job_state['skipped'] += 1
+                print(f"Job '{job['name']}' is still running; skipping the run scheduled at "
+                      f"{datetime.fromtimestamp(scheduled)}.")
+                return
+            # A regular run supersedes a pending retry
+            job['retry_at'] = None
+            job_state['last_scheduled'] = scheduled
+            self._launch(job, scheduled, 0)
+        elif job['retry_at'] is not None and now >= job['retry_at'] and not job['running']:
+            job['retry_at'] = None
+            self._launch(job, self._state[job['name']]['last_scheduled'], job['attempt'])
+
+    def _execute(self, job: dict, scheduled: float, attempt: int):
+        started = time.time()
+        error = None
+        try:
+            with track_stage(f"job.{job['name']}"):
+                job['function']()
+        except Exception as e:
+            error = e
+            traceback.print_exc()
+        finished = time.time()
+        with self._lock:
+            job['running'] = False
+            job_state = self._state[job['name']]
+            job_state.update(last_started=datetime.fromtimestamp(started).isoformat(),
+                             last_finished=datetime.fromtimestamp(finished).isoformat(),
+                             last_duration_seconds=finished - started)
+            job_state['runs'] += 1
+            if error is None:
+                job['attempt'] = 0
+                job_state.update(last_status='ok', last_success=datetime.fromtimestamp(finished).isoformat(),
+                                 last_error=None, consecutive_failures=0)
+                print(f"Job '{job['name']}' completed in {finished - started:.1f}s.")
+            else:
+                job_state['failures'] += 1
+                job_state.update(last_status='error', last_error=repr(error),
+                                 consecutive_failures=job_state.get('consecutive_failures', 0) + 1)
+                if attempt < job['retries'] and not self.stopping.is_set():
+                    delay = job['retry_delay'] * 2 ** attempt
+                    delay *= self._random.uniform(1 - job['jitter'], 1 + job['jitter'])
+                    job['attempt'] = attempt + 1
+                    job['retry_at'] = finished + delay
+                    print(f"Job '{job['name']}' failed (attempt {attempt + 1}); retrying in {delay:.0f}s.")
+                else:
+                    job['attempt'] = 0
+                    print(f"Job '{job['name']}' failed; waiting for its next scheduled run.")
+            try:
+                self._save_state()
+            except OSError as e:
+                print(f"Error saving scheduler state: {e}")
+            self._wakeup.notify()
+
+    def _run_loop(self):
+        with self._lock:
+            while not self.stopping.is_set():
+                now = time.time()
+                for job in self.jobs.values():
+                    self._dispatch(job, now)
+                wake_times = [job['next_run'] for job in self.jobs.values()]
+                wake_times += [job['retry_at'] for job in self.jobs.values() if job['retry_at'] is not None]
+                # Sleep in bounded steps so wall-clock jumps (e.g. system suspend) are noticed
+                timeout = min(min(wake_times, default=now + self.max_sleep_seconds) - time.time(),
+                              self.max_sleep_seconds)
+                self._wakeup.wait(timeout=max(timeout, 0))
+
+    def start(self):
+        """
+        Starts the scheduling thread and returns immediately.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run_loop, name='scheduler', daemon=True)
+            self._thread.start()
+            print("Scheduler started.")
+        return self
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stops scheduling new runs and, by default, waits for running jobs to finish.
+
+        Long-running jobs can poll the scheduler's 'stopping' event to exit early.
+
+        Args:
+            wait (bool): Whether to wait for running jobs.
+        """
+        self.stopping.set()
+        with self._lock:
+            self._wakeup.notify()
+        if self._thread is not None:
+            self._thread.join()
+        self._executor.shutdown(wait=wait)
+        with self._lock:
+            self._save_state()
+        print("Scheduler stopped.")
+
+    def run_forever(self):
+        """
+        Runs the scheduler in the foreground until SIGINT or SIGTERM, then shuts down gracefully.
+        """
+        def request_stop(signum, frame):
+            print(f"Received signal {signum}; shutting down after running jobs finish.")
+            self.stopping.set()
+
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+        self.start()
+        while not self.stopping.wait(timeout=1.0):
+            pass
+        self.shutdown()
+
+    def status(self) -> dict:
+        """
+        Returns the persisted state of every job plus its next scheduled run.
+
+        Returns:
+            dict: Per-job run counts, last status, last error and timestamps.
+        """
+        with self._lock:
+            return {name: dict(self._state[name], running=job['running'],
+                               next_run=datetime.fromtimestamp(job['next_run']).isoformat())
+                    for name, job in self.jobs.items()}
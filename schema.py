@@ -0,0 +1,121 @@
+"""
+Module: schema.py
+Author: Satej
+Description:
+This script declares the compact column schema for smart-meter data. Readings are stored as
+float32, appliance, household and tier labels as categoricals, and timestamps as integer epoch
+seconds. The loaders apply the schema at read time, and a report shows the bytes saved per column.
+"""
+
+import pandas as pd
+from data_preprocessing import ensure_datetime
+
+# Declared dtype for each known column; 'epoch' marks timestamps stored as integer epoch seconds
+ENERGY_DATA_SCHEMA = {
+    'household_id': 'category',
+    'appliance': 'category',
+    'consumption_tier': 'category',
+    'energy_usage': 'float32',
+    'temperature': 'float32',
+    'timestamp': 'epoch',
+}
+
+def read_dtypes(schema: dict = None) -> dict:
+    """
+    Returns the part of a schema that can be passed as a dtype mapping to pandas readers.
+
+    Args:
+        schema (dict): Column-to-dtype schema; defaults to ENERGY_DATA_SCHEMA.
+
+    Returns:
+        dict: Column-to-dtype mapping without the 'epoch' timestamp columns.
+    """
+    schema = ENERGY_DATA_SCHEMA if schema is None else schema
+    return {column: kind for column, kind in schema.items() if kind != 'epoch'}
+
+def to_epoch_seconds(values: pd.Series) -> pd.Series:
+    """
+    Converts timestamps to integer epoch seconds, with missing values as <NA>.
+
+    Args:
+        values (pd.Series): Timestamp strings, datetime64 or integer values.
+
+    Returns:
+        pd.Series: Nullable Int64 epoch seconds.
+    """
+    if pd.api.types.is_integer_dtype(values):
+        return values.astype('Int64')
+    timestamps = ensure_datetime(values)
+    if timestamps.dt.tz is not None:
+        timestamps = timestamps.dt.tz_convert('UTC').dt.tz_localize(None)
+    epochs = (timestamps - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+    return epochs.astype('Int64')
+
+def apply_schema(data: pd.DataFrame, schema: dict = None) -> pd.DataFrame:
+    """
+    Converts the columns of a DataFrame to their declared compact types.
+
+    Columns missing from the frame are ignored, and columns already of the declared type
+    are left untouched, so applying the schema to data read with read_dtypes only
+    converts the timestamp columns.
+
+    Args:
+        data (pd.DataFrame): DataFrame to convert; modified in place.
+        schema (dict): Column-to-dtype schema; defaults to ENERGY_DATA_SCHEMA.
+
+    Returns:
+        pd.DataFrame: The DataFrame with compact column types.
+
+    Example Usage:
+        data = apply_schema(data)
+    """
+    schema = ENERGY_DATA_SCHEMA if schema is None else schema
+    for column, kind in schema.items():
+        if column not in data.columns:
+            continue
+        if kind == 'epoch':
+            if not pd.api.types.is_integer_dtype(data[column]):
+                data[column] = to_epoch_seconds(data[column])
+        elif str(data[column].dtype) != kind:
+            data[column] = data[column].astype(kind)
+    return data
+
+def memory_report(before: pd.Series, after: pd.Series) -> pd.DataFrame:
+    """
+    Builds a per-column report of memory usage before and after compaction.
+
+    Args:
+        before (pd.Series): Bytes per column before, from DataFrame.memory_usage(deep=True).
+        after (pd.Series): Bytes per column after, from DataFrame.memory_usage(deep=True).
+
+    Returns:
+        pd.DataFrame: 'bytes_before', 'bytes_after', 'bytes_saved' and 'ratio' per column,
+        with a 'total' row.
+    """
+    report = pd.DataFrame({'bytes_before': before, 'bytes_after': after}).fillna(0).astype('int64')
+    report.loc['total'] = report.sum()
+    report['bytes_saved'] = report['bytes_before'] - report['bytes_after']
+    report['ratio'] = report['bytes_before'] / report['bytes_after'].where(report['bytes_after'] > 0)
+    return report
+
+def compact_energy_data(data: pd.DataFrame, schema: dict = None) -> tuple:
+    """
+    Applies the compact schema to an already loaded DataFrame and reports the savings.
+
+    Args:
+        data (pd.DataFrame): DataFrame to convert; modified in place.
+        schema (dict): Column-to-dtype schema; defaults to ENERGY_DATA_SCHEMA.
+
+    Returns:
+        tuple: The compacted DataFrame and its memory report.
+
+    Example Usage:
+        data, report = compact_energy_data(data)
+    """
+    before = data.memory_usage(deep=True, index=False)
+    data = apply_schema(data, schema)
+    report = memory_report(before, data.memory_usage(deep=True, index=False))
+    total = report.loc['total']
+    print(f"Compacted data from {total['bytes_before']} to {total['bytes_after']} bytes "
+          f"({total['bytes_saved']} bytes saved).")
+    return data, report
@@ -0,0 +1,176 @@
+"""
+Module: store_query.py
+Author: Satej
+Description:
+This script answers household, time-range and appliance queries over the columnar store.
+The manifest is turned into an in-memory index of files sorted by start time, so the files
+overlapping a time range are found by binary search. Inside each file, the row-group ranges
+recorded at ingest (households, timestamps, appliances) prune the row groups, and only the
+matching row groups are read through memory-mapped Parquet I/O. A lookup therefore reads a
+few row groups no matter how long the stored history is.
+"""
+
+import os
+from bisect import bisect_left
+import numpy as np
+import pandas as pd
+from data_store import MANIFEST_FILE, read_manifest, _filter_range
+from instrumentation import instrumented
+
+# Index per store, rebuilt when the manifest changes
+_index_cache = {}
+
+def _to_nanoseconds(values) -> np.ndarray:
+    return pd.to_datetime(pd.Series(values, dtype=object)).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+def load_store_index(store_path: str) -> dict:
+    """
+    Builds, or returns the cached, query index of a store.
+
+    Files are sorted by their first timestamp. Next to the sorted start times the index
+    keeps the running maximum of the end times, which is sorted as well, so both bounds
+    of a time-range query are found with np.searchsorted.
+
+    Args:
+        store_path (str): Root directory of the store.
+
+    Returns:
+        dict: 'files' (manifest entries in start-time order), 'min_ns', 'max_ns' and
+        'running_max_ns' arrays, and per file the row-group time ranges in 'row_group_ns'.
+    """
+    manifest_mtime = os.path.getmtime(os.path.join(store_path, MANIFEST_FILE))
+    cached = _index_cache.get(store_path)
+    if cached is not None and cached[0] == manifest_mtime:
+        return cached[1]
+    files = read_manifest(store_path)['files']
+    min_ns = _to_nanoseconds([entry['min_timestamp'] for entry in files])
+    order = np.argsort(min_ns, kind='stable')
+    files = [files[position] for position in order]
+    max_ns = _to_nanoseconds([entry['max_timestamp'] for entry in files])
+    # Convert all row-group bounds in one vectorized call, then split them per file
+    row_groups = [entry.get('row_groups', []) for entry in files]
+    bounds = _to_nanoseconds([row_group[key] for groups in row_groups for row_group in groups
+                              for key in ('min_timestamp', 'max_timestamp')]).reshape(-1, 2)
+    offsets = np.cumsum([0] + [len(groups) for groups in row_groups])
+    index = {
+        'files': files,
+        'min_ns': min_ns[order],
+        'max_ns': max_ns,
+        'running_max_ns': np.maximum.accumulate(max_ns) if len(max_ns) else max_ns,
+        'row_group_ns': [bounds[offsets[position]:offsets[position + 1]] for position in range(len(files))],
+    }
+    _index_cache[store_path] = (manifest_mtime, index)
+    return index
+
+def _row_group_matches(row_group: dict, households: list, appliances: set) -> bool:
+    if households is not None and 'min_household' in row_group:
+        # households is sorted: find the first one not below the row group's range
+        position = bisect_left(households, row_group['min_household'])
+        if position == len(households) or households[position] > row_group['max_household']:
+            return False
+    if appliances is not None and 'appliances' in row_group:
+        if appliances.isdisjoint(row_group['appliances']):
+            return False
+    return True
+
+def plan_query(store_path: str, households: list = None, start=None, end=None, appliances: list = None) -> list:
+    """
+    Selects the files and row groups that can contain matching readings.
+
+    Args:
+        store_path (str): Root directory of the store.
+        households (list): Optional household ids.
+        start: Optional inclusive lower timestamp bound.
+        end: Optional inclusive upper timestamp bound.
+        appliances (list): Optional appliance names.
+
+    Returns:
+        list: (manifest entry, row group numbers or None for the whole file) pairs.
+    """
+    index = load_store_index(store_path)
+    start_ns = _to_nanoseconds([start])[0] if start is not None else None
+    end_ns = _to_nanoseconds([end])[0] if end is not None else None
+    first = int(np.searchsorted(index['running_max_ns'], start_ns, side='left')) if start_ns is not None else 0
+    last = int(np.searchsorted(index['min_ns'], end_ns, side='right')) if end_ns is not None else len(index['files'])
+    households = sorted(str(household) for household in households) if households is not None else None
+    appliances = {str(appliance) for appliance in appliances} if appliances is not None else None
+
+    plan = []
+    for position in range(first, last):
+        entry = index['files'][position]
+        if start_ns is not None and index['max_ns'][position] < start_ns:
+            continue
+        if 'row_groups' not in entry:
+            # Files written before row-group ranges were recorded are read whole
+            plan.append((entry, None))
+            continue
+        bounds = index['row_group_ns'][position]
+        in_range = np.ones(len(bounds), dtype=bool)
+        if start_ns is not None:
+            in_range &= bounds[:, 1] >= start_ns
+        if end_ns is not None:
+            in_range &= bounds[:, 0] <= end_ns
+        row_groups = [int(number) for number in np.flatnonzero(in_range)
+                      if _row_group_matches(entry['row_groups'][number], households, appliances)]
+        if row_groups:
+            plan.append((entry, row_groups))
+    return plan
+
+@instrumented()
+def query_store(store_path: str, households: list = None, start=None, end=None, appliances: list = None,
+                columns: list = None, timestamp_column: str = 'timestamp', household_column: str = 'household_id',
+                appliance_column: str = 'appliance') -> pd.DataFrame:
+    """
+    Reads the readings matching household, time-range and appliance predicates.
+
+    Only the row groups selected by plan_query are read, through memory-mapped files,
+    and the predicates are then applied to their rows.
+
+    Args:
+        store_path (str): Root directory of the store.
+        households (list): Optional household ids.
+        start: Optional inclusive lower timestamp bound.
+        end: Optional inclusive upper timestamp bound.
+        appliances (list): Optional appliance names.
+        columns (list): Optional columns to return.
+        timestamp_column (str): Column holding the reading timestamps.
+        household_column (str): Column holding the household ids.
+        appliance_column (str): Column holding the appliance names.
+
+    Returns:
+        pd.DataFrame: The matching readings.
+
+    Example Usage:
+        last_week = query_store("C:/Users/Satej/Data/energy_store", households=['H000042'],
+                                start='2024-03-01', end='2024-03-07 23:59:59')
+    """
+    import pyarrow.parquet as pq
+
+    read_columns = None
+    if columns is not None:
+        predicate_columns = [timestamp_column if start is not None or end is not None else None,
+                             household_column if households is not None else None,
+                             appliance_column if appliances is not None else None]
+        read_columns = list(dict.fromkeys(list(columns) + [column for column in predicate_columns if column]))
+
+    frames = []
+    for entry, row_groups in plan_query(store_path, households, start, end, appliances):
+        parquet_file = pq.ParquetFile(os.path.join(store_path, entry['path']), memory_map=True)
+        if row_groups is None:
+            table = parquet_file.read(columns=read_columns)
+        else:
+            table = parquet_file.read_row_groups(row_groups, columns=read_columns)
+        frame = _filter_range(table.to_pandas(), timestamp_column, start, end)
+        if households is not None and household_column in frame.columns:
+            frame = frame[frame[household_column].astype(str).isin([str(household) for household in households])]
+        if appliances is not None and appliance_column in frame.columns:
+            frame = frame[frame[appliance_column].astype(str).isin([str(appliance) for appliance in appliances])]
+        frames.append(frame)
+    if not frames:
+        files = load_store_index(store_path)['files']
+        if columns is None and files:
+            # Keep the store's columns on empty results, so callers can still select them
+            columns = pq.read_schema(os.path.join(store_path, files[0]['path'])).names
+        return pd.DataFrame(columns=columns)
+    data = pd.concat(frames, ignore_index=True)
+    return data if columns is None else data[list(columns)]
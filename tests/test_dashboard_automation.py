@@ -0,0 +1,108 @@
+import pytest
+
+pd = pytest.importorskip('pandas')
+pytest.importorskip('pyarrow')
+pytest.importorskip('sklearn')
+
+from dashboard_automation import update_data_source, update_regression_model
+from feature_engineering import load_tier_edges, save_tier_edges
+from predictive_modeling import load_incremental_state
+from visualization_dashboard import load_rollup
+
+
+def _readings(start, periods):
+    timestamps = pd.date_range(start, periods=periods, freq='h')
+    return pd.DataFrame({
+        'timestamp': timestamps,
+        'temperature': [15.0 + (index % 7) for index in range(periods)],
+        'energy_usage': [1.0 + 0.1 * (index % 5) for index in range(periods)],
+    })
+
+
+def test_late_batches_are_folded_into_the_next_update(tmp_path):
+    store, state_dir = str(tmp_path / 'store'), str(tmp_path / 'state')
+    update_data_source(store, _readings('2024-03-02', 24))
+    update_regression_model(store, state_dir, classification_target=None)
+    assert load_incremental_state(state_dir)['linear']['n'] == 24
+
+    # Backfilled readings are older than everything already folded in
+    update_data_source(store, _readings('2024-03-01', 12))
+    update_regression_model(store, state_dir, classification_target=None)
+    state = load_incremental_state(state_dir)
+    assert state['linear']['n'] == 36
+    assert state['manifest_position'] == 2
+
+    update_regression_model(store, state_dir, classification_target=None)
+    assert load_incremental_state(state_dir)['linear']['n'] == 36
+
+
+def test_update_without_new_files_leaves_the_state_unchanged(tmp_path):
+    store, state_dir = str(tmp_path / 'store'), str(tmp_path / 'state')
+    assert update_regression_model(store, state_dir, classification_target=None) == (None, None)
+
+    update_data_source(store, _readings('2024-03-02', 24))
+    update_regression_model(store, state_dir, classification_target=None)
+    saved = (tmp_path / 'state' / 'state.json').read_text()
+    update_regression_model(store, state_dir, classification_target=None)
+    assert (tmp_path / 'state' / 'state.json').read_text() == saved
+
+
+def test_ingest_and_full_rebuild_maintain_the_same_rollup_extract(tmp_path):
+    from feature_engineering import categorize_consumption
+    from data_preprocessing import preprocess_energy_data
+    from visualization_dashboard import ROLLUP_DIMENSIONS, compute_rollup, load_rollup, write_rollup
+
+    rollups = str(tmp_path / 'rollups')
+    edges = {None: [1.1, 1.3]}
+    first = _readings('2024-03-01', 12).assign(household_id='H1', appliance='oven')
+    second = _readings('2024-03-01 12:00', 12).assign(household_id='H2', appliance='oven')
+    update_data_source(str(tmp_path / 'store'), first, rollup_dir=rollups, tier_edges=edges)
+    update_data_source(str(tmp_path / 'store'), second, rollup_dir=rollups, tier_edges=edges)
+    incremental = load_rollup(rollups)
+
+    both = categorize_consumption(preprocess_energy_data(pd.concat([first, second], ignore_index=True)),
+                                  'energy_usage', edges=edges)
+    write_rollup(rollups, compute_rollup(both), replace=True)
+    rebuilt = load_rollup(rollups)
+
+    assert set(ROLLUP_DIMENSIONS) <= set(incremental.columns)
+    assert sorted(incremental.columns) == sorted(rebuilt.columns)
+    assert incremental['readings'].sum() == rebuilt['readings'].sum() == 24
+    assert incremental['total_usage'].sum() == pytest.approx(rebuilt['total_usage'].sum())
+
+
+def _household_readings():
+    return _readings('2024-03-01', 48).assign(household_id=['H1', 'H2'] * 24, appliance='heater')
+
+
+def test_appended_batches_are_tiered_with_the_saved_boundaries(tmp_path):
+    store, rollup_dir = str(tmp_path / 'store'), str(tmp_path / 'rollups')
+    # The last full run put all of these readings (1.0 to 1.4) in the lowest tier
+    save_tier_edges(rollup_dir, {None: [5.0, 10.0]})
+
+    update_data_source(store, _household_readings(), rollup_dir=rollup_dir)
+
+    rollup = load_rollup(rollup_dir)
+    assert set(rollup['consumption_tier']) == {'Low'}
+    assert rollup['readings'].sum() == 48
+
+
+def test_without_saved_boundaries_the_batch_is_tiered_on_its_own(tmp_path):
+    store, rollup_dir = str(tmp_path / 'store'), str(tmp_path / 'rollups')
+
+    update_data_source(store, _household_readings(), rollup_dir=rollup_dir)
+
+    assert set(load_rollup(rollup_dir)['consumption_tier']) == {'Low', 'Medium', 'High'}
+
+
+def test_tier_boundaries_round_trip_with_group_keys(tmp_path):
+    np = pytest.importorskip('numpy')
+    edges = {None: np.array([1.0, 2.0]), 'north': np.array([0.5, 1.5]), np.int64(7): np.array([3.0, 4.0])}
+
+    save_tier_edges(str(tmp_path), edges)
+    loaded = load_tier_edges(str(tmp_path))
+
+    assert list(loaded) == [None, 'north', 7]
+    for group, group_edges in edges.items():
+        np.testing.assert_array_equal(loaded[group], group_edges)
+    assert load_tier_edges(str(tmp_path / 'missing')) is None
@@ -0,0 +1,87 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+pd = pytest.importorskip('pandas')
+pytest.importorskip('requests')
+
+from data_collection import fetch_data_from_api, fetch_data_from_apis
+
+
+class _MeterHandler(BaseHTTPRequestHandler):
+    # Pages of one endpoint, linked by relative next-page URLs
+    pages = {
+        '/readings?page=1': {'data': [{'household_id': 'H1', 'energy_usage': 1.0}], 'next': '/readings?page=2'},
+        '/readings?page=2': {'data': [{'household_id': 'H2', 'energy_usage': 2.0}], 'next': '/readings?page=3'},
+        '/readings?page=3': {'data': [{'household_id': 'H1', 'energy_usage': 3.0}], 'next': None},
+        '/flat': [{'household_id': 'H3', 'energy_usage': 4.0}],
+    }
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            attempt = server.hits[self.path]
+        if self.path == '/flaky' and attempt <= server.failures:
+            self._reply(503, {'error': 'unavailable'})
+        elif self.path == '/flaky':
+            self._reply(200, [{'household_id': 'H4', 'energy_usage': 5.0}])
+        elif self.path in self.pages:
+            self._reply(200, self.pages[self.path])
+        else:
+            self._reply(404, {'error': 'not found'})
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def meter_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _MeterHandler)
+    server.lock, server.hits, server.failures = threading.Lock(), {}, 2
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _url(server, path):
+    return f'http://127.0.0.1:{server.server_address[1]}{path}'
+
+
+def test_fetch_follows_every_page(meter_server):
+    data = fetch_data_from_api(_url(meter_server, '/readings?page=1'))
+
+    assert list(data['energy_usage']) == [1.0, 2.0, 3.0]
+    assert list(data['household_id'].astype(str)) == ['H1', 'H2', 'H1']
+    assert all(meter_server.hits[f'/readings?page={page}'] == 1 for page in (1, 2, 3))
+
+
+def test_fetch_retries_unavailable_responses(meter_server):
+    data = fetch_data_from_apis([_url(meter_server, '/flaky')], retries=3, backoff_factor=0)
+
+    assert list(data['energy_usage']) == [5.0]
+    assert meter_server.hits['/flaky'] == 3
+
+
+def test_fetch_many_endpoints_keeps_their_order(meter_server):
+    data = fetch_data_from_apis([_url(meter_server, '/flat'), _url(meter_server, '/readings?page=2')], max_workers=2)
+
+    assert list(data['energy_usage']) == [4.0, 2.0, 3.0]
+
+
+def test_fetch_gives_up_after_the_retries(meter_server):
+    import requests
+
+    meter_server.failures = 10
+    with pytest.raises(requests.exceptions.RequestException):
+        fetch_data_from_api(_url(meter_server, '/flaky'), retries=1)
@@ -0,0 +1,146 @@
+import pytest
+
+pd = pytest.importorskip('pandas')
+
+from data_preprocessing import ensure_datetime, preprocess_energy_data_chunked
+
+
+def test_chunked_preprocessing_leaves_missing_timestamps_missing():
+    # Compact-schema chunks carry timestamps as Int64 epoch seconds
+    raw = pd.DataFrame({
+        'timestamp': pd.array([1_709_251_200, None, 1_709_258_400, 1_709_262_000], dtype='Int64'),
+        'energy_usage': [1.0, 2.0, None, 1.5],
+    })
+    chunks = list(preprocess_energy_data_chunked(lambda: iter([raw.iloc[:2], raw.iloc[2:]])))
+    result = pd.concat(chunks)
+
+    assert result['timestamp'].isna().sum() == 1
+    assert result['energy_usage'].notna().all()
+
+
+def test_chunked_preprocessing_scores_anomalies_per_group_across_chunks():
+    quiet = pd.DataFrame({'household_id': ['A'] * 50 + ['B'] * 50,
+                          'energy_usage': [1.0, 1.2] * 25 + [100.0, 101.0] * 25})
+    # 100 is normal for B but far outside A's history, which only the carried state knows
+    spike = pd.DataFrame({'household_id': ['A', 'B'], 'energy_usage': [100.0, 100.5]})
+    chunks = list(preprocess_energy_data_chunked(lambda: iter([quiet, spike]),
+                                                 anomaly_group_columns=['household_id']))
+
+    assert len(chunks[0]) == 100
+    assert list(chunks[1]['household_id']) == ['B']
+
+
+def test_chunked_preprocessing_fills_categories_missing_from_a_chunk(tmp_path):
+    from data_collection import load_energy_data
+
+    csv_path = tmp_path / 'energy.csv'
+    # 'oven' is the overall mode but never appears in the second chunk, which has a gap
+    pd.DataFrame({
+        'timestamp': pd.date_range('2024-03-01', periods=12, freq='h').astype(str),
+        'household_id': ['H1'] * 12,
+        'appliance': ['oven'] * 6 + ['hvac', None, 'lighting', 'hvac', 'lighting', 'washer'],
+        'energy_usage': [1.0] * 12,
+    }).to_csv(csv_path, index=False)
+
+    chunks = list(preprocess_energy_data_chunked(lambda: load_energy_data(str(csv_path), chunksize=6)))
+    result = pd.concat(chunks, ignore_index=True)
+
+    assert result['appliance'].iloc[7] == 'oven'
+    assert result['appliance'].notna().all()
+    assert isinstance(result['appliance'].dtype, pd.CategoricalDtype)
+    assert isinstance(result['household_id'].dtype, pd.CategoricalDtype)
+
+
+def _gappy_readings():
+    # Two households interleaved, with gaps that straddle chunk boundaries
+    usage_a = [0.0, 1.0, None, None, 4.0, 5.0, None, 7.0, None, None]
+    usage_b = [10.0, None, 30.0, None, None, None, 70.0, 80.0, None, 100.0]
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-03-01', periods=10, freq='h').repeat(2),
+        'household_id': ['A', 'B'] * 10,
+        'energy_usage': [value for pair in zip(usage_a, usage_b) for value in pair],
+    })
+
+
+@pytest.mark.parametrize('method', ['ffill', 'interpolate'])
+@pytest.mark.parametrize('chunksize', [1, 3, 5, 7, 20])
+def test_chunked_gap_filling_matches_filling_all_at_once(method, chunksize):
+    from data_preprocessing import handle_missing_values_chunk
+
+    data = _gappy_readings()
+    expected, _ = handle_missing_values_chunk(data.copy(), method, 'household_id', fill_remaining=False)
+
+    carry, chunks = None, []
+    for start in range(0, len(data), chunksize):
+        chunk, carry = handle_missing_values_chunk(data.iloc[start:start + chunksize].copy(), method, 'household_id',
+                                                   carry=carry, fill_remaining=False, hold_back=True)
+        chunks.append(chunk)
+    rest, carry = handle_missing_values_chunk(carry['pending'].iloc[:0], method, 'household_id', carry=carry,
+                                              fill_remaining=False)
+    result = pd.concat(chunks + [rest]).sort_index()
+
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_interpolation_uses_observed_readings_across_chunks():
+    from data_preprocessing import handle_missing_values_chunk
+
+    data = _gappy_readings()
+    filled, _ = handle_missing_values_chunk(data.copy(), 'interpolate', 'household_id', fill_remaining=False)
+
+    household_a = filled.loc[filled['household_id'] == 'A', 'energy_usage'].tolist()
+    household_b = filled.loc[filled['household_id'] == 'B', 'energy_usage'].tolist()
+    assert household_a[:8] == [0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0]
+    assert household_b == [10.0, 20.0, 30.0, 40.0, 50.0, 60.0, 70.0, 80.0, 90.0, 100.0]
+
+
+def test_chunked_interpolation_pipeline_releases_held_rows():
+    data = _gappy_readings()
+    chunks = list(preprocess_energy_data_chunked(lambda: (data.iloc[start:start + 5] for start in range(0, 20, 5)),
+                                                 fill_method='interpolate', threshold=10.0))
+    result = pd.concat(chunks).sort_index()
+
+    assert len(result) == len(data)
+    assert result.loc[result['household_id'] == 'B', 'energy_usage'].tolist()[3] == 40.0
+
+
+@pytest.mark.parametrize('strings, expected', [
+    (['2024-03-01 00:00:00', '2024-03-01 01:30:00'], ['2024-03-01 00:00', '2024-03-01 01:30']),
+    (['2024-03-01T00:00:00', '2024-12-31T23:59:59'], ['2024-03-01 00:00:00', '2024-12-31 23:59:59']),
+    # The format is guessed from the first value, so later ambiguous dates stay day-first
+    (['25/03/2024 10:00', '01/04/2024 11:00'], ['2024-03-25 10:00', '2024-04-01 11:00']),
+    ([None, '2024-03-01 05:00:00'], [None, '2024-03-01 05:00']),
+])
+def test_ensure_datetime_parses_strings_with_one_fixed_format(strings, expected):
+    result = ensure_datetime(pd.Series(strings, dtype=object))
+
+    pd.testing.assert_series_equal(result, pd.Series(pd.to_datetime(expected)), check_dtype=False)
+
+
+def test_ensure_datetime_uses_an_explicit_format():
+    result = ensure_datetime(pd.Series(['03/04/2024', '12/04/2024']), format='%m/%d/%Y')
+
+    assert list(result) == [pd.Timestamp('2024-03-04'), pd.Timestamp('2024-12-04')]
+
+
+@pytest.mark.parametrize('values', [
+    pd.Series(pd.date_range('2024-03-01', periods=3, freq='h')),
+    pd.Series(pd.date_range('2024-03-01', periods=3, freq='h', tz='Europe/Berlin')),
+])
+def test_ensure_datetime_returns_datetime_columns_untouched(values):
+    assert ensure_datetime(values) is values
+
+
+@pytest.mark.parametrize('values, unit', [
+    (pd.Series([1_709_251_200, 1_709_254_800]), 's'),
+    (pd.Series([1_709_251_200_000, 1_709_254_800_000]), 'ms'),
+    (pd.Series(pd.array([1_709_251_200, None], dtype='Int64')), 's'),
+])
+def test_ensure_datetime_treats_integers_as_epochs(values, unit):
+    result = ensure_datetime(values, unit=unit)
+
+    assert result.iloc[0] == pd.Timestamp('2024-03-01')
+    if pd.isna(values.iloc[1]):
+        assert pd.isna(result.iloc[1])
+    else:
+        assert result.iloc[1] == pd.Timestamp('2024-03-01 01:00')
@@ -0,0 +1,42 @@
+import pytest
+
+pd = pytest.importorskip('pandas')
+pytest.importorskip('pyarrow')
+
+from data_store import append_to_store, read_manifest, read_store
+
+
+def _readings(households, start):
+    return pd.DataFrame({
+        'timestamp': pd.date_range(start, periods=3, freq='h'),
+        'household_id': households,
+        'energy_usage': [1.0, 2.0, 3.0],
+    })
+
+
+def test_append_with_non_unique_index_writes_each_row_once(tmp_path):
+    store = str(tmp_path / 'store')
+    # Both frames carry index 0..2, so the concatenated index repeats every label
+    data = pd.concat([_readings(['H1', 'H2', 'H1'], '2024-01-01'), _readings(['H3', 'H1', 'H2'], '2024-01-01 06:00')])
+
+    written = append_to_store(store, data)
+
+    stored = read_store(store)
+    assert len(stored) == len(data) == 6
+    assert sum(entry['rows'] for entry in written) == 6
+    assert sum(entry['rows'] for entry in read_manifest(store)['files']) == 6
+    assert sorted(stored['energy_usage']) == sorted(data['energy_usage'])
+
+
+def test_append_sorts_partitions_by_household_and_time(tmp_path):
+    store = str(tmp_path / 'store')
+    data = pd.concat([_readings(['H2', 'H1', 'H2'], '2024-01-01'), _readings(['H1', 'H2', 'H1'], '2024-01-02')])
+
+    written = append_to_store(store, data, row_group_size=2)
+
+    assert [entry['date'] for entry in written] == ['2024-01-01', '2024-01-02']
+    first_day = pd.read_parquet(str(tmp_path / 'store' / written[0]['path']))
+    assert list(first_day['household_id']) == ['H1', 'H2', 'H2']
+    assert first_day.loc[first_day['household_id'] == 'H2', 'timestamp'].is_monotonic_increasing
+    assert [group['rows'] for group in written[0]['row_groups']] == [2, 1]
+    assert written[0]['row_groups'][0]['min_household'] == 'H1'
@@ -0,0 +1,73 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+
+from feature_engineering import (aggregate_consumption, calculate_daily_consumption, calculate_daily_consumption_chunked,
+                                 consumption_partial, finalize_consumption, merge_consumption_partials)
+
+
+def _readings(seed=3):
+    random = np.random.default_rng(seed)
+    rows = 600
+    # Irregular timestamps across several days, unsorted, with gaps and missing usage
+    data = pd.DataFrame({
+        'timestamp': pd.Timestamp('2024-02-27 21:00') + pd.to_timedelta(random.integers(0, 5 * 24 * 60, rows), unit='min'),
+        'household_id': random.choice(['H1', 'H2', 'H3'], rows),
+        'energy_usage': random.gamma(2.0, 1.5, rows),
+    })
+    data.loc[random.choice(rows, 40, replace=False), 'energy_usage'] = np.nan
+    return data
+
+
+def _resampled(data, rule):
+    grouped = data.set_index('timestamp').groupby('household_id')['energy_usage'].resample(rule)
+    expected = grouped.agg(['sum', 'count', 'max', 'size'])
+    # Resampling also emits empty periods; the aggregation only reports periods with readings
+    expected = expected[expected['size'] > 0].reset_index()
+    return expected.rename(columns={'timestamp': 'period'})
+
+
+@pytest.mark.parametrize('frequency, rule', [('daily', 'D'), ('hourly', 'h')])
+def test_aggregation_matches_grouped_resample(frequency, rule):
+    data = _readings()
+
+    result = aggregate_consumption(data, 'timestamp', 'energy_usage', frequency=frequency)
+
+    expected = _resampled(data, rule)
+    result = result.assign(household_id=result['household_id'].astype(str))
+    merged = expected.merge(result, on=['household_id', 'period'], how='outer', validate='one_to_one', indicator=True)
+    assert (merged['_merge'] == 'both').all()
+    np.testing.assert_allclose(merged['total_usage'], merged['sum'])
+    np.testing.assert_array_equal(merged['readings'], merged['count'])
+    np.testing.assert_allclose(merged['peak_usage'], merged['max'])
+    np.testing.assert_allclose(merged['mean_usage'], merged['sum'] / merged['count'])
+
+
+def test_daily_consumption_renames_the_daily_columns():
+    data = _readings()
+
+    daily = calculate_daily_consumption(data, 'timestamp', 'energy_usage')
+
+    expected = _resampled(data, 'D')
+    assert list(daily.columns[:3]) == ['household_id', 'date', 'daily_consumption']
+    assert len(daily) == len(expected)
+    assert daily['daily_consumption'].sum() == pytest.approx(expected['sum'].sum())
+
+
+@pytest.mark.parametrize('chunk_size', [5, 37, 600])
+def test_merged_partials_match_a_single_pass(chunk_size):
+    data = _readings()
+    chunks = [data.iloc[start:start + chunk_size] for start in range(0, len(data), chunk_size)]
+
+    partial = None
+    for chunk in chunks:
+        partial = merge_consumption_partials(partial, consumption_partial(chunk, 'timestamp', 'energy_usage',
+                                                                          frequency='hourly'))
+
+    pd.testing.assert_frame_equal(finalize_consumption(partial),
+                                  aggregate_consumption(data, 'timestamp', 'energy_usage', frequency='hourly'),
+                                  check_dtype=False, check_categorical=False)
+    pd.testing.assert_frame_equal(calculate_daily_consumption_chunked(chunks, 'timestamp', 'energy_usage'),
+                                  calculate_daily_consumption(data, 'timestamp', 'energy_usage'),
+                                  check_dtype=False, check_categorical=False)
@@ -0,0 +1,35 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+pytest.importorskip('sklearn')
+
+from forecasting import _group_positions, grouped_rolling_max, grouped_rolling_mean
+
+
+def _readings(seed=0):
+    rng = np.random.default_rng(seed)
+    groups = np.repeat([0, 1, 2, 3], [7, 1, 12, 5])
+    values = rng.normal(size=len(groups))
+    values[rng.random(len(groups)) < 0.3] = np.nan
+    values[8:11] = np.nan  # A run of missing readings at the start of a group
+    return groups, values
+
+
+@pytest.mark.parametrize('window', [1, 2, 3, 4, 7, 30])
+@pytest.mark.parametrize('function, aggregate', [(grouped_rolling_mean, 'mean'), (grouped_rolling_max, 'max')])
+def test_grouped_rolling_matches_pandas(function, aggregate, window):
+    groups, values = _readings()
+    positions, _ = _group_positions(groups)
+
+    expected = getattr(pd.Series(values).groupby(groups).rolling(window, min_periods=1), aggregate)()
+
+    np.testing.assert_allclose(function(values, positions, window), expected.to_numpy(), equal_nan=True)
+
+
+def test_rolling_max_skips_missing_readings():
+    values = np.array([1.0, 5.0, np.nan, 2.0])
+    positions, _ = _group_positions(np.zeros(4, dtype=np.int64))
+
+    np.testing.assert_array_equal(grouped_rolling_max(values, positions, 4), [1.0, 5.0, 5.0, 5.0])
+    np.testing.assert_array_equal(grouped_rolling_max(np.array([np.nan, 3.0]), positions[:2], 2), [np.nan, 3.0])
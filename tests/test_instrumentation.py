@@ -0,0 +1,35 @@
+import pytest
+
+pd = pytest.importorskip('pandas')
+
+from data_collection import load_energy_data
+from instrumentation import stage_summary
+
+
+def test_chunked_load_records_the_chunk_iteration(tmp_path):
+    csv_path = tmp_path / 'energy.csv'
+    pd.DataFrame({'timestamp': pd.date_range('2024-01-01', periods=10, freq='h').astype(str),
+                  'energy_usage': range(10)}).to_csv(csv_path, index=False)
+    before = stage_summary().get('load_energy_data.chunks', {'calls': 0, 'rows': 0})
+
+    chunks = list(load_energy_data(str(csv_path), chunksize=4))
+
+    after = stage_summary()['load_energy_data.chunks']
+    assert len(chunks) == 3
+    assert after['calls'] == before['calls'] + 1
+    assert after['rows'] == before['rows'] + 10
+
+
+def test_stage_progress_and_records_go_to_logging(caplog):
+    from data_preprocessing import preprocess_energy_data
+
+    data = pd.DataFrame({'timestamp': pd.date_range('2024-01-01', periods=6, freq='h'),
+                         'energy_usage': [1.0, None, 1.2, 0.9, 1.1, 1.0]})
+
+    with caplog.at_level('DEBUG'):
+        preprocess_energy_data(data)
+
+    messages = [(record.name, record.levelname, record.getMessage()) for record in caplog.records]
+    assert ('data_preprocessing', 'INFO', 'Data preprocessing completed.') in messages
+    assert any(name == 'instrumentation' and level == 'DEBUG' and message.startswith('Stage preprocess_energy_data ok')
+               for name, level, message in messages)
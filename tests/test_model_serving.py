@@ -0,0 +1,53 @@
+import json
+import urllib.error
+import urllib.request
+import pytest
+
+pd = pytest.importorskip('pandas')
+pytest.importorskip('sklearn')
+pytest.importorskip('joblib')
+
+from sklearn.linear_model import LinearRegression
+from model_serving import ScoringService, save_model_artifact, serve_http
+
+
+@pytest.fixture
+def service(tmp_path):
+    data = pd.DataFrame({'hour': [0, 6, 12, 18], 'temperature': [10.0, 12.0, 20.0, 15.0]})
+    model = LinearRegression().fit(data, [1.0, 2.0, 3.0, 2.5])
+    save_model_artifact(model, str(tmp_path / 'regression'), ['hour', 'temperature'], 'energy_usage', 'regression')
+    service = ScoringService({'regression': str(tmp_path / 'regression')})
+    yield service
+    service.close()
+
+
+def _post(port, path, body):
+    request = urllib.request.Request(f'http://127.0.0.1:{port}{path}', data=json.dumps(body).encode(), method='POST')
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status
+    except urllib.error.HTTPError as error:
+        return error.code
+
+
+def test_http_status_separates_unknown_models_from_invalid_input(service):
+    server = serve_http(service, port=0)
+    port = server.server_address[1]
+    try:
+        assert _post(port, '/predict/regression', {'hour': 18, 'temperature': 21.5}) == 200
+        assert _post(port, '/predict/missing', {'hour': 18, 'temperature': 21.5}) == 404
+        assert _post(port, '/predict/regression', [{'hour': 18}]) == 400
+        assert _post(port, '/predict/regression', 42) == 400
+    finally:
+        server.shutdown()
+
+
+def test_bulk_scoring_does_not_enter_single_request_percentiles(service):
+    service.predict_one('regression', {'hour': 18, 'temperature': 21.5})
+    service.score_frame('regression', pd.DataFrame({'hour': range(1000), 'temperature': 20.0}))
+
+    metrics = service.metrics()['regression']
+    assert metrics['requests'] == 1
+    assert metrics['bulk_requests'] == 1
+    assert metrics['rows'] == 1001
+    assert metrics['bulk_p50_ms'] is not None
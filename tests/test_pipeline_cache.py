@@ -0,0 +1,56 @@
+import os
+import threading
+import pytest
+
+pd = pytest.importorskip('pandas')
+pytest.importorskip('pyarrow')
+
+import data_collection
+import data_preprocessing
+import schema
+from data_store import append_to_store
+from pipeline_cache import _local_dependencies, code_version, evict_lru, fingerprint_file
+
+
+def test_store_fingerprint_changes_when_a_batch_is_appended(tmp_path):
+    store = str(tmp_path / 'store')
+    readings = pd.DataFrame({'timestamp': pd.date_range('2024-01-01', periods=3, freq='h'),
+                             'energy_usage': [1.0, 2.0, 3.0]})
+    append_to_store(store, readings)
+    before = fingerprint_file(store)
+
+    append_to_store(store, readings.assign(timestamp=readings['timestamp'] + pd.Timedelta(days=1)))
+
+    assert fingerprint_file(store) != before
+
+
+def test_code_version_follows_project_imports():
+    collection_dependencies = _local_dependencies(os.path.abspath(data_collection.__file__))
+    schema_dependencies = _local_dependencies(os.path.abspath(schema.__file__))
+
+    # load_energy_data reaches data_preprocessing only through schema
+    assert os.path.abspath(schema.__file__) in collection_dependencies
+    assert os.path.abspath(data_preprocessing.__file__) in schema_dependencies
+    assert not any('pandas' in path for path in collection_dependencies)
+    assert code_version(data_collection.load_energy_data) == code_version(data_collection.load_energy_data)
+
+
+def test_concurrent_eviction_tolerates_removed_entries(tmp_path):
+    for number in range(20):
+        (tmp_path / f'{number:02d}.joblib').write_bytes(b'x' * 100)
+    errors = []
+
+    def evict():
+        try:
+            evict_lru(str(tmp_path), max_bytes=0)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=evict) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert os.listdir(tmp_path) == []
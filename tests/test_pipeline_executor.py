@@ -0,0 +1,99 @@
+import threading
+import time
+import pytest
+
+from pipeline_executor import pipeline_stage, resolve_dependencies, run_pipeline
+
+
+def test_stages_run_after_the_stages_they_read_from():
+    order = []
+
+    def record(name, result):
+        def function(*inputs):
+            order.append(name)
+            return result(*inputs)
+        return function
+
+    stages = [
+        pipeline_stage('report', record('report', lambda total, count: f'{total}/{count}'),
+                       inputs=('total', 'count'), outputs=('report',)),
+        pipeline_stage('total', record('total', lambda rows: sum(rows)), inputs=('rows',), outputs=('total',)),
+        pipeline_stage('count', record('count', lambda rows: len(rows)), inputs=('rows',), outputs=('count',)),
+        pipeline_stage('load', record('load', lambda: [1, 2, 3]), outputs=('rows',)),
+    ]
+
+    values, report = run_pipeline(stages, max_workers=4)
+
+    assert values['report'] == '6/3'
+    assert order[0] == 'load' and order[-1] == 'report'
+    assert all(result['status'] == 'done' for result in report['stages'].values())
+    assert report['critical_path'][0] == 'load' and report['critical_path'][-1] == 'report'
+
+
+def test_failed_stage_skips_only_its_dependents():
+    def fail(rows):
+        raise RuntimeError('boom')
+
+    stages = [
+        pipeline_stage('load', lambda: [1, 2], outputs=('rows',)),
+        pipeline_stage('broken', fail, inputs=('rows',), outputs=('model',)),
+        pipeline_stage('save', lambda model: model, inputs=('model',), outputs=('saved',)),
+        pipeline_stage('export', lambda saved: saved, inputs=('saved',)),
+        pipeline_stage('summary', lambda rows: len(rows), inputs=('rows',), outputs=('summary',)),
+    ]
+
+    values, report = run_pipeline(stages)
+
+    statuses = {name: result['status'] for name, result in report['stages'].items()}
+    assert statuses == {'load': 'done', 'broken': 'failed', 'save': 'skipped', 'export': 'skipped', 'summary': 'done'}
+    assert 'boom' in report['stages']['broken']['error']
+    assert values['summary'] == 2 and 'model' not in values
+
+
+def test_main_thread_stages_run_on_the_calling_thread():
+    threads = {}
+
+    def remember(name):
+        def function(*inputs):
+            threads[name] = threading.current_thread()
+        return function
+
+    stages = [
+        pipeline_stage('plot', remember('plot'), inputs=('rows',), main_thread=True),
+        pipeline_stage('summary', remember('summary'), inputs=('rows',)),
+    ]
+
+    run_pipeline(stages, initial={'rows': [1]}, max_workers=2)
+
+    assert threads['plot'] is threading.current_thread()
+    assert threads['summary'] is not threading.current_thread()
+
+
+@pytest.mark.parametrize('cpu, cpu_limit, expected', [(1, 2, 2), (2, 2, 1), (None, 4, 1), (1, 3, 3)])
+def test_running_stages_stay_within_the_cpu_budget(cpu, cpu_limit, expected):
+    lock = threading.Lock()
+    running, peak = [0], [0]
+
+    def work():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+
+    stages = [pipeline_stage(f'work_{number}', work, cpu=cpu) for number in range(6)]
+
+    run_pipeline(stages, max_workers=6, cpu_limit=cpu_limit)
+
+    assert peak[0] == expected
+
+
+def test_invalid_graphs_are_rejected():
+    with pytest.raises(ValueError, match='cycle'):
+        resolve_dependencies([pipeline_stage('a', None, inputs=('y',), outputs=('x',)),
+                              pipeline_stage('b', None, inputs=('x',), outputs=('y',))])
+    with pytest.raises(ValueError, match='unknown values'):
+        resolve_dependencies([pipeline_stage('a', None, inputs=('missing',))])
+    with pytest.raises(ValueError, match='more than once'):
+        resolve_dependencies([pipeline_stage('a', None, outputs=('x',)), pipeline_stage('b', None, outputs=('x',))])
@@ -0,0 +1,61 @@
+import pytest
+
+pd = pytest.importorskip('pandas')
+pytest.importorskip('sklearn')
+
+from predictive_modeling import warm_start_classification_model
+
+
+def test_warm_started_forest_is_capped_at_max_estimators():
+    data = pd.DataFrame({'hour': list(range(24)) * 4, 'temperature': [10.0, 20.0] * 48,
+                         'high_usage_flag': ([0] * 12 + [1] * 12) * 4})
+    model = None
+    for _ in range(5):
+        model = warm_start_classification_model(model, data, ['hour', 'temperature'], 'high_usage_flag',
+                                                new_estimators=10, max_estimators=25)
+    assert len(model.estimators_) == 25
+    assert model.n_estimators == 25
+    assert model.predict(data[['hour', 'temperature']]).shape == (len(data),)
+
+
+def _grouped_lines(seed=0):
+    np = pytest.importorskip('numpy')
+    random = np.random.default_rng(seed)
+    slopes = {'H3': 3.0, 'H1': -1.0, 'H2': 0.5, 'H4': 8.0}
+    # Interleave the groups so each model only sees its rows if the sort by group is right
+    groups = random.choice(list(slopes), 400)
+    x = random.uniform(0, 10, 400)
+    y = [slopes[group] * value + 5.0 for group, value in zip(groups, x)]
+    return pd.DataFrame({'household_id': groups, 'x': x, 'energy_usage': y}), slopes
+
+
+def test_each_group_model_is_trained_on_its_own_rows_only():
+    from predictive_modeling import train_models_by_group
+
+    data, slopes = _grouped_lines()
+    registry, group_metrics, shard_metrics = train_models_by_group(
+        data, 'household_id', ['x'], 'energy_usage', max_workers=2, shard_rows=150)
+
+    assert sorted(registry) == sorted(slopes)
+    assert len(shard_metrics) > 1
+    for group, slope in slopes.items():
+        assert registry[group].coef_[0] == pytest.approx(slope)
+        assert registry[group].intercept_ == pytest.approx(5.0)
+    rows = group_metrics.set_index('group')['rows']
+    assert rows.to_dict() == data['household_id'].value_counts().to_dict()
+
+
+def test_parameter_search_keeps_the_best_model_per_group():
+    from predictive_modeling import train_models_by_group
+
+    data, slopes = _grouped_lines(seed=1)
+    registry, group_metrics, _ = train_models_by_group(
+        data, 'household_id', ['x'], 'energy_usage', cv=3, max_workers=2,
+        param_grid={'fit_intercept': [False, True]})
+
+    # Every line has a non-zero intercept, so each search must pick fit_intercept=True
+    assert all(params == {'fit_intercept': True} for params in group_metrics['best_params'])
+    assert (group_metrics['cv_mean'] < 1e-12).all()
+    for group, slope in slopes.items():
+        assert registry[group].fit_intercept
+        assert registry[group].coef_[0] == pytest.approx(slope)
@@ -0,0 +1,46 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+
+from quantile_sketch import merge_sketches, new_sketch, sketch_quantiles, update_sketch
+from feature_engineering import categorize_consumption
+
+
+def test_update_leaves_the_input_sketch_unchanged():
+    rng = np.random.default_rng(0)
+    base = update_sketch(new_sketch(50), rng.normal(size=1000))
+    levels_before = [level.copy() for level in base['levels']]
+    count_before = base['count']
+
+    updated = update_sketch(base, rng.normal(size=1000))
+
+    assert updated is not base
+    assert base['count'] == count_before and updated['count'] == count_before + 1000
+    assert len(base['levels']) == len(levels_before)
+    assert all(np.array_equal(level, before) for level, before in zip(base['levels'], levels_before))
+
+
+def test_merged_sketches_estimate_quantiles_of_both_inputs():
+    rng = np.random.default_rng(1)
+    left_values, right_values = rng.uniform(0, 1, 20_000), rng.uniform(1, 2, 20_000)
+    left, right = update_sketch(None, left_values), update_sketch(None, right_values)
+
+    merged = merge_sketches(left, right)
+
+    estimates = sketch_quantiles(merged, [0.0, 0.25, 0.5, 0.75, 1.0])
+    expected = np.quantile(np.concatenate([left_values, right_values]), [0.0, 0.25, 0.5, 0.75, 1.0])
+    assert np.allclose(estimates, expected, atol=0.05)
+    assert left['count'] == right['count'] == 20_000
+
+
+@pytest.mark.filterwarnings('error')
+@pytest.mark.parametrize('dtype', ['object', 'category'])
+def test_grouped_tiers_use_each_groups_boundaries(dtype):
+    data = pd.DataFrame({'region': pd.Series(['north', 'south', 'north', 'east', 'south', 'north'], dtype=dtype),
+                         'energy_usage': [1.0, 1.0, 5.0, 5.0, np.nan, 2.0]})
+    edges = {None: np.array([3.0, 6.0]), 'north': np.array([1.5, 4.0]), 'south': np.array([0.5, 0.8])}
+
+    tiers = categorize_consumption(data, 'energy_usage', edges=edges, group_column='region')['consumption_tier']
+
+    assert list(tiers.astype(object).fillna('missing')) == ['Low', 'High', 'High', 'Medium', 'missing', 'Medium']
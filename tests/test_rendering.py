@@ -0,0 +1,27 @@
+import pytest
+
+pd = pytest.importorskip('pandas')
+np = pytest.importorskip('numpy')
+
+from rendering import downsample_minmax
+
+
+def test_downsampling_keeps_peaks_and_the_point_budget():
+    x = np.arange(10_000)
+    y = np.sin(x / 100.0)
+    y[1234], y[8765] = 50.0, -50.0
+
+    sampled_x, sampled_y = downsample_minmax(x, y, 200)
+
+    assert len(sampled_x) <= 200
+    assert np.all(np.diff(sampled_x) > 0)
+    assert 50.0 in sampled_y and -50.0 in sampled_y
+
+
+def test_short_series_are_returned_without_missing_values():
+    x, y = np.arange(5), np.array([1.0, np.nan, 3.0, 4.0, 5.0])
+
+    sampled_x, sampled_y = downsample_minmax(x, y, 200)
+
+    assert list(sampled_x) == [0, 2, 3, 4]
+    assert list(sampled_y) == [1.0, 3.0, 4.0, 5.0]
@@ -0,0 +1,103 @@
+import json
+import threading
+import time
+
+from scheduler import JobScheduler
+
+
+def _wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'condition not met in time'
+        time.sleep(0.005)
+
+
+def _dispatch(scheduler, name, now):
+    # Drives the scheduling decisions with a fake clock instead of the background thread
+    with scheduler._lock:
+        scheduler._dispatch(scheduler.jobs[name], now)
+    _wait_until(lambda: not scheduler.jobs[name]['running'])
+
+
+def test_runs_stay_on_the_fixed_rate_grid():
+    scheduler = JobScheduler()
+    runs = []
+    scheduler.add_job('ingest', lambda: runs.append(1), interval_seconds=10, start_at=1000.0)
+
+    _dispatch(scheduler, 'ingest', 1000.4)
+    _dispatch(scheduler, 'ingest', 1013.2)  # Late by 3.2s, e.g. after a slow run
+    _dispatch(scheduler, 'ingest', 1020.1)
+
+    assert len(runs) == 3
+    assert scheduler._state['ingest']['last_scheduled'] == 1020.0
+    assert scheduler.jobs['ingest']['next_run'] == 1030.0
+    scheduler.shutdown()
+
+
+def test_missed_runs_are_caught_up_with_one_run():
+    scheduler = JobScheduler()
+    runs = []
+    scheduler.add_job('retrain', lambda: runs.append(1), interval_seconds=10, start_at=1000.0)
+
+    _dispatch(scheduler, 'retrain', 1000.0)
+    _dispatch(scheduler, 'retrain', 1047.5)
+
+    assert len(runs) == 2
+    assert scheduler._state['retrain']['last_scheduled'] == 1040.0
+    assert scheduler.jobs['retrain']['next_run'] == 1050.0
+    scheduler.shutdown()
+
+
+def test_run_is_skipped_while_the_previous_one_is_still_going():
+    scheduler = JobScheduler()
+    release = threading.Event()
+    scheduler.add_job('export', release.wait, interval_seconds=10, start_at=1000.0)
+
+    with scheduler._lock:
+        scheduler._dispatch(scheduler.jobs['export'], 1000.0)
+        scheduler._dispatch(scheduler.jobs['export'], 1010.0)
+    release.set()
+    _wait_until(lambda: not scheduler.jobs['export']['running'])
+
+    assert scheduler._state['export']['skipped'] == 1
+    assert scheduler._state['export']['runs'] == 1
+    scheduler.shutdown()
+
+
+def test_failed_job_is_retried_until_it_succeeds(tmp_path):
+    attempts = []
+
+    def flaky():
+        attempts.append(time.monotonic())
+        if len(attempts) < 3:
+            raise RuntimeError('store unavailable')
+
+    scheduler = JobScheduler(str(tmp_path / 'state.json'))
+    scheduler.add_job('ingest', flaky, interval_seconds=3600, retries=3, retry_delay=0.01, jitter=0.0)
+    scheduler.start()
+    _wait_until(lambda: scheduler.status()['ingest'].get('last_status') == 'ok')
+    scheduler.shutdown()
+
+    state = json.loads((tmp_path / 'state.json').read_text())['ingest']
+    assert len(attempts) == 3
+    assert state['runs'] == 3 and state['failures'] == 2 and state['consecutive_failures'] == 0
+
+
+def test_shutdown_stops_scheduling_and_the_grid_resumes_from_saved_state(tmp_path):
+    state_path = str(tmp_path / 'state.json')
+    runs = []
+    scheduler = JobScheduler(state_path)
+    scheduler.add_job('ingest', lambda: runs.append(time.time()), interval_seconds=0.05)
+    scheduler.start()
+    _wait_until(lambda: len(runs) >= 3)
+    scheduler.shutdown()
+    stopped_at = len(runs)
+    time.sleep(0.2)
+
+    assert len(runs) == stopped_at
+    assert not scheduler._thread.is_alive()
+    saved = json.loads(open(state_path).read())['ingest']
+    resumed = JobScheduler(state_path)
+    resumed.add_job('ingest', lambda: None, interval_seconds=0.05)
+    assert resumed.jobs['ingest']['next_run'] == saved['last_scheduled'] + 0.05
+    resumed.shutdown()
@@ -0,0 +1,87 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+pytest.importorskip('pyarrow')
+
+from data_store import append_to_store, read_store
+from store_query import plan_query, query_store
+
+
+@pytest.fixture
+def store(tmp_path):
+    store_path = str(tmp_path / 'store')
+    random = np.random.default_rng(7)
+    # Two batches with overlapping days, so files of the same date hold different households
+    for first_day, households in (('2024-03-01', 6), ('2024-03-03', 4)):
+        timestamps = pd.date_range(first_day, periods=4 * 24, freq='h')
+        batch = pd.DataFrame({
+            'timestamp': np.tile(timestamps, households),
+            'household_id': np.repeat([f'H{number:03d}' for number in range(households)], len(timestamps)),
+            'appliance': random.choice(['heater', 'fridge', 'washer', 'oven'], households * len(timestamps)),
+            'energy_usage': random.gamma(2.0, 1.5, households * len(timestamps)),
+        })
+        append_to_store(store_path, batch, row_group_size=10)
+    return store_path
+
+
+def _expected(data, households=None, start=None, end=None, appliances=None):
+    keep = pd.Series(True, index=data.index)
+    if households is not None:
+        keep &= data['household_id'].isin(households)
+    if start is not None:
+        keep &= data['timestamp'] >= pd.Timestamp(start)
+    if end is not None:
+        keep &= data['timestamp'] <= pd.Timestamp(end)
+    if appliances is not None:
+        keep &= data['appliance'].isin(appliances)
+    return data[keep]
+
+
+def _sorted(data):
+    return data.sort_values(['household_id', 'timestamp', 'appliance']).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('predicates', [
+    {'households': ['H002']},
+    {'households': ['H000', 'H005', 'H999']},
+    {'start': '2024-03-02 05:00', 'end': '2024-03-03 18:30'},
+    {'start': '2024-03-05 12:00'},
+    {'end': '2024-03-01 03:00'},
+    {'appliances': ['oven']},
+    {'households': ['H001', 'H003'], 'start': '2024-03-03', 'end': '2024-03-04 23:00', 'appliances': ['heater', 'washer']},
+    {'households': ['H777']},
+    {'start': '2025-01-01'},
+])
+def test_pruned_query_matches_a_filtered_full_read(store, predicates):
+    full = read_store(store)
+
+    result = query_store(store, **predicates)
+
+    expected = _expected(full, **predicates)
+    assert list(result.columns) == list(full.columns)
+    if len(expected):
+        pd.testing.assert_frame_equal(_sorted(result), _sorted(expected), check_dtype=False)
+    else:
+        assert len(result) == 0
+
+
+def test_query_reads_only_a_fraction_of_the_row_groups(store):
+    every_row_group = sum(len(row_groups) for _, row_groups in plan_query(store))
+
+    household_plan = plan_query(store, households=['H002'])
+    time_plan = plan_query(store, start='2024-03-02 05:00', end='2024-03-02 06:00')
+
+    assert sum(len(row_groups) for _, row_groups in household_plan) < every_row_group / 2
+    assert sum(len(row_groups) for _, row_groups in time_plan) < every_row_group / 4
+    assert {entry['date'] for entry, _ in time_plan} == {'2024-03-02'}
+
+
+def test_column_projection_keeps_only_the_requested_columns(store):
+    full = read_store(store)
+
+    result = query_store(store, households=['H004'], start='2024-03-04', columns=['energy_usage'])
+
+    expected = _expected(full, households=['H004'], start='2024-03-04')
+    assert list(result.columns) == ['energy_usage']
+    assert sorted(result['energy_usage']) == sorted(expected['energy_usage'])
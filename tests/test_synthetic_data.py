@@ -0,0 +1,45 @@
+import pytest
+
+pd = pytest.importorskip('pandas')
+np = pytest.importorskip('numpy')
+
+from synthetic_data import APPLIANCES, generate_energy_data, write_synthetic_csv
+
+
+def test_same_seed_gives_the_same_data():
+    first = generate_energy_data(households=5, days=2, seed=7)
+    second = generate_energy_data(households=5, days=2, seed=7)
+
+    pd.testing.assert_frame_equal(first, second)
+    assert not first.equals(generate_energy_data(households=5, days=2, seed=8))
+
+
+def test_shape_and_columns_follow_the_scale():
+    data = generate_energy_data(households=4, days=3, resolution_minutes=30)
+
+    assert len(data) == 4 * 3 * 48
+    assert list(data.columns) == ['timestamp', 'household_id', 'appliance', 'energy_usage', 'temperature',
+                                  'high_usage_flag']
+    assert data['household_id'].nunique() == 4
+    assert set(data['appliance'].astype(str)) <= set(APPLIANCES)
+    assert data.groupby('household_id', observed=True)['timestamp'].apply(
+        lambda times: times.is_monotonic_increasing and times.diff().dropna().eq(pd.Timedelta(minutes=30)).all()).all()
+    assert set(data['high_usage_flag'].unique()) <= {0, 1}
+
+
+def test_missing_and_anomaly_rates_are_applied():
+    clean = generate_energy_data(households=10, days=10, missing_rate=0.0, anomaly_rate=0.0)
+    noisy = generate_energy_data(households=10, days=10, missing_rate=0.05, anomaly_rate=0.0)
+
+    assert clean['energy_usage'].notna().all()
+    assert 0.02 < noisy['energy_usage'].isna().mean() < 0.08
+    assert (clean['energy_usage'] >= 0).all()
+
+
+def test_csv_round_trip_keeps_every_reading(tmp_path):
+    path = tmp_path / 'energy.csv'
+    data = write_synthetic_csv(str(path), households=2, days=1)
+
+    loaded = pd.read_csv(path, parse_dates=['timestamp'])
+    assert len(loaded) == len(data)
+    assert (loaded['timestamp'] == data['timestamp']).all()
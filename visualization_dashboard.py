@@ -6,8 +6,14 @@ This script prepares and exports data for visualization in Tableau. It includes
 key insights and saving processed data for integration with Tableau dashboards.
 """
 
+import os
 import pandas as pd
-import matplotlib.pyplot as plt
+from typing import Iterable
+from data_preprocessing import ensure_datetime
+from rendering import render
+
+# Dimensions of the rollup cube, from the finest grain the dashboards slice by
+ROLLUP_DIMENSIONS = ('appliance', 'household_id', 'hour', 'date', 'consumption_tier')
 
 def export_dashboard_data(data: pd.DataFrame, export_path: str):
     """
@@ -15,13 +21,17 @@ def export_dashboard_data(data: pd.DataFrame, export_path: str):
 
     Args:
         data (pd.DataFrame): DataFrame containing data to export.
-        export_path (str): File path to save the exported data.
+        export_path (str): File path to save the exported data. Paths ending in
+            '.parquet' are written as compact Parquet extracts, anything else as CSV.
 
     Example Usage:
         export_dashboard_data(data, "C:/Users/Satej/Data/dashboard_data.csv")
     """
     try:
-        data.to_csv(export_path, index=False)
+        if export_path.endswith('.parquet'):
+            data.to_parquet(export_path, index=False)
+        else:
+            data.to_csv(export_path, index=False)
         print(f"Dashboard data exported successfully to {export_path}.")
     except Exception as e:
         print("Error exporting dashboard data.")
@@ -42,11 +52,197 @@ def generate_usage_summary(data: pd.DataFrame, group_by_column: str, usage_colum
     Example Usage:
         summary = generate_usage_summary(data, 'appliance', 'energy_usage')
     """
-    summary = data.groupby(group_by_column)[usage_column].sum().reset_index()
+    # observed=True keeps categorical keys from expanding to unused categories
+    summary = data.groupby(group_by_column, observed=True)[usage_column].sum().reset_index()
     summary.rename(columns={usage_column: 'total_usage'}, inplace=True)
     print(f"Generated usage summary grouped by '{group_by_column}'.")
     return summary
 
+def usage_summary_partial(chunk: pd.DataFrame, group_by_column: str, usage_column: str) -> pd.Series:
+    """
+    Reduces one chunk to per-group usage sums that can be merged with Series.add.
+
+    Args:
+        chunk (pd.DataFrame): Chunk containing energy usage data.
+        group_by_column (str): Column to group data by.
+        usage_column (str): Column representing energy usage.
+
+    Returns:
+        pd.Series: Usage sums indexed by group.
+    """
+    return chunk.groupby(group_by_column, observed=True)[usage_column].sum()
+
+def generate_usage_summary_chunked(chunks: Iterable[pd.DataFrame], group_by_column: str, usage_column: str) -> pd.DataFrame:
+    """
+    Streaming counterpart of generate_usage_summary that merges per-chunk partial sums.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): Chunks containing energy usage data.
+        group_by_column (str): Column to group data by (e.g., household, appliance).
+        usage_column (str): Column representing energy usage.
+
+    Returns:
+        pd.DataFrame: DataFrame containing grouped summary data.
+    """
+    totals = pd.Series(dtype='float64')
+    for chunk in chunks:
+        totals = totals.add(usage_summary_partial(chunk, group_by_column, usage_column), fill_value=0)
+    summary = totals.rename('total_usage').rename_axis(group_by_column).reset_index()
+    print(f"Generated usage summary grouped by '{group_by_column}' from chunks.")
+    return summary
+
+def compute_rollup(data: pd.DataFrame, usage_column: str = 'energy_usage', timestamp_column: str = 'timestamp',
+                   dimensions: tuple = ROLLUP_DIMENSIONS) -> pd.DataFrame:
+    """
+    Computes the base rollup cube: usage totals at the finest grain of all dimensions.
+
+    A single grouped pass over the raw readings produces the sum, reading count and peak
+    for every combination of the dimensions present in the data. Coarser summaries are
+    then derived from the cube with summarize_rollup instead of rescanning raw data.
+    'hour' and 'date' are derived from the timestamp when they are not already columns.
+
+    Args:
+        data (pd.DataFrame): Readings with usage and timestamp columns.
+        usage_column (str): Column representing energy usage.
+        timestamp_column (str): Column containing timestamp values.
+        dimensions (tuple): Dimension columns of the cube.
+
+    Returns:
+        pd.DataFrame: Dimension columns plus 'total_usage', 'readings' and 'peak_usage'.
+
+    Example Usage:
+        cube = compute_rollup(processed_data)
+    """
+    keys = []
+    timestamps = None
+    for dimension in dimensions:
+        if dimension in data.columns:
+            keys.append(data[dimension])
+        elif dimension in ('hour', 'date') and timestamp_column in data.columns:
+            timestamps = ensure_datetime(data[timestamp_column]) if timestamps is None else timestamps
+            derived = timestamps.dt.hour.astype('int8') if dimension == 'hour' else timestamps.dt.normalize()
+            keys.append(derived.rename(dimension))
+    grouped = data[usage_column].groupby(keys, observed=True, dropna=False, sort=False)
+    cube = grouped.agg(['sum', 'count', 'max']).rename(
+        columns={'sum': 'total_usage', 'count': 'readings', 'max': 'peak_usage'})
+    return cube.reset_index()
+
+def merge_rollups(left: pd.DataFrame, right: pd.DataFrame) -> pd.DataFrame:
+    """
+    Merges two rollup cubes with the same dimensions.
+
+    Args:
+        left (pd.DataFrame): Existing cube, or None.
+        right (pd.DataFrame): Cube to fold in.
+
+    Returns:
+        pd.DataFrame: Combined cube.
+    """
+    if left is None or len(left) == 0:
+        return right
+    dimensions = [column for column in right.columns if column not in ('total_usage', 'readings', 'peak_usage')]
+    combined = pd.concat([left, right], ignore_index=True)
+    return combined.groupby(dimensions, observed=True, dropna=False, sort=False).agg(
+        {'total_usage': 'sum', 'readings': 'sum', 'peak_usage': 'max'}).reset_index()
+
+def summarize_rollup(cube: pd.DataFrame, group_by_columns: list) -> pd.DataFrame:
+    """
+    Derives a coarser usage summary from a rollup cube without touching raw data.
+
+    Args:
+        cube (pd.DataFrame): Cube from compute_rollup or load_rollup.
+        group_by_columns (list): Dimensions to keep, e.g. ['appliance'] or ['household_id', 'hour'].
+
+    Returns:
+        pd.DataFrame: 'total_usage', 'readings', 'peak_usage' and 'mean_usage' per group.
+
+    Example Usage:
+        summary = summarize_rollup(cube, ['appliance'])
+    """
+    summary = cube.groupby(list(group_by_columns), observed=True).agg(
+        {'total_usage': 'sum', 'readings': 'sum', 'peak_usage': 'max'}).reset_index()
+    summary['mean_usage'] = summary['total_usage'] / summary['readings']
+    return summary
+
+def write_rollup(rollup_dir: str, cube: pd.DataFrame, replace: bool = False) -> list:
+    """
+    Writes a rollup cube to the extracts stored per date.
+
+    Every extract has the full set of ROLLUP_DIMENSIONS, so the incremental updates and
+    the full rebuilds in main.py maintain one and the same extract. Only the dates in the
+    cube are touched, and each is rewritten atomically.
+
+    Args:
+        rollup_dir (str): Directory holding one Parquet extract per date; created if missing.
+        cube (pd.DataFrame): Cube from compute_rollup.
+        replace (bool): Whether to replace the extracts of the cube's dates, e.g. after
+            recomputing them from the full history, instead of merging into them.
+
+    Returns:
+        list: Dates whose extracts were written.
+    """
+    from data_store import atomic_write
+
+    missing = [dimension for dimension in ROLLUP_DIMENSIONS if dimension not in cube.columns]
+    if missing:
+        raise ValueError(f"Rollup cube is missing the dimensions {missing}.")
+    os.makedirs(rollup_dir, exist_ok=True)
+    written = []
+    for day, partition in cube.groupby('date', sort=True):
+        date = pd.Timestamp(day).strftime('%Y-%m-%d')
+        path = os.path.join(rollup_dir, f"date={date}.parquet")
+        existing = pd.read_parquet(path) if os.path.exists(path) and not replace else None
+        merged = merge_rollups(existing, partition)
+        atomic_write(path, lambda temp_path, merged=merged: merged.to_parquet(temp_path, index=False))
+        written.append(date)
+    print(f"Rollup extracts written for {len(written)} dates in {rollup_dir}.")
+    return written
+
+def update_rollup(rollup_dir: str, data: pd.DataFrame, usage_column: str = 'energy_usage',
+                  timestamp_column: str = 'timestamp') -> list:
+    """
+    Folds new preprocessed readings into the rollup extracts stored per date.
+
+    Only the date partitions touched by the new readings are read, merged and rewritten
+    (atomically), so refreshing the extracts costs time proportional to the new batch.
+
+    Args:
+        rollup_dir (str): Directory holding one Parquet extract per date; created if missing.
+        data (pd.DataFrame): New preprocessed readings with a 'consumption_tier' column.
+        usage_column (str): Column representing energy usage.
+        timestamp_column (str): Column containing timestamp values.
+
+    Returns:
+        list: Dates whose extracts were updated.
+
+    Example Usage:
+        update_rollup("C:/Users/Satej/Data/rollups", categorize_consumption(preprocess_energy_data(new_data),
+                                                                            'energy_usage', edges=tier_edges))
+    """
+    return write_rollup(rollup_dir, compute_rollup(data, usage_column, timestamp_column))
+
+def load_rollup(rollup_dir: str, start=None, end=None) -> pd.DataFrame:
+    """
+    Loads the rollup extracts, optionally restricted to a date range.
+
+    Args:
+        rollup_dir (str): Directory written by update_rollup or write_rollup.
+        start: Optional inclusive first date.
+        end: Optional inclusive last date.
+
+    Returns:
+        pd.DataFrame: The combined rollup cube.
+    """
+    frames = []
+    for name in sorted(os.listdir(rollup_dir)):
+        if not (name.startswith('date=') and name.endswith('.parquet')):
+            continue
+        day = pd.Timestamp(name[len('date='):-len('.parquet')])
+        if (start is not None and day < pd.Timestamp(start)) or (end is not None and day > pd.Timestamp(end)):
+            continue
+        frames.append(pd.read_parquet(os.path.join(rollup_dir, name)))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
 def plot_usage_summary(summary: pd.DataFrame, group_by_column: str, usage_column: str):
     """
     Visualizes the energy usage summary with a bar chart.
@@ -59,12 +255,17 @@ def plot_usage_summary(summary: pd.DataFrame, group_by_column: str, usage_column
     Example Usage:
         plot_usage_summary(summary, 'appliance', 'total_usage')
     """
-    plt.figure(figsize=(10, 6))
-    plt.bar(summary[group_by_column], summary[usage_column], color='skyblue')
-    plt.title(f"Energy Usage Summary by {group_by_column.capitalize()}")
-    plt.xlabel(group_by_column.capitalize())
-    plt.ylabel('Total Energy Usage (kWh)')
-    plt.xticks(rotation=45)
-    plt.grid(axis='y')
-    plt.tight_layout()
-    plt.show()
+    labels = summary[group_by_column].astype(str).to_numpy()
+    values = summary[usage_column].to_numpy()
+
+    def draw(figure):
+        ax = figure.add_subplot()
+        ax.bar(labels, values, color='skyblue')
+        ax.set_title(f"Energy Usage Summary by {group_by_column.capitalize()}")
+        ax.set_xlabel(group_by_column.capitalize())
+        ax.set_ylabel('Total Energy Usage (kWh)')
+        ax.tick_params(axis='x', labelrotation=45)
+        ax.grid(axis='y')
+        figure.tight_layout()
+
+    render(draw, f"usage_summary_by_{group_by_column}")